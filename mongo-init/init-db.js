@@ -121,6 +121,9 @@ db.createCollection('system_config', {
   }
 });
 
+// 7. Performance Rollups Collection (materialized stats, keyed by "<scope>:<dimension>:<value>")
+db.createCollection('performance_rollups');
+
 print('📊 Creating optimized indexes...');
 
 // Create indexes for optimal query performance
@@ -185,6 +188,30 @@ db.system_config.insertMany([
     updated_at: new Date(),
     description: "Risk/reward ratios by timeframe and confidence"
   },
+  {
+    config_key: "timeframe_settings",
+    config_value: {
+      "5m": { "base_position": 300, "atr_multiplier": 1.0, "tp_ratios": [1.2, 1.8, 2.5], "sl_ratio": 1.0, "expiration_minutes": 5 },
+      "15m": { "base_position": 500, "atr_multiplier": 1.2, "tp_ratios": [1.5, 2.2, 3.0], "sl_ratio": 1.2, "expiration_minutes": 15 },
+      "1h": { "base_position": 800, "atr_multiplier": 1.5, "tp_ratios": [2.0, 3.0, 4.0], "sl_ratio": 1.5, "expiration_minutes": 60 },
+      "4h": { "base_position": 1000, "atr_multiplier": 2.0, "tp_ratios": [2.5, 3.5, 5.0], "sl_ratio": 2.0, "expiration_minutes": 240 },
+      "1d": { "base_position": 1200, "atr_multiplier": 2.5, "tp_ratios": [3.0, 4.5, 6.0], "sl_ratio": 2.5, "expiration_minutes": 1440 }
+    },
+    updated_at: new Date(),
+    description: "Precision engine settings by timeframe"
+  },
+  {
+    config_key: "execution_levels",
+    config_value: {
+      "5m": { "entry_offset": 0.0002, "tp_multipliers": [0.8, 1.2, 1.8], "sl_multiplier": 0.6, "use_vwap": false },
+      "15m": { "entry_offset": 0.001, "tp_multipliers": [1.5, 2.2, 3.0], "sl_multiplier": 1.0, "use_vwap": false },
+      "1h": { "entry_offset": 0.002, "tp_multipliers": [2.0, 3.0, 4.0], "sl_multiplier": 1.5, "use_vwap": true },
+      "4h": { "entry_offset": 0.003, "tp_multipliers": [2.5, 3.5, 5.0], "sl_multiplier": 2.0, "use_vwap": true },
+      "1d": { "entry_offset": 0.005, "tp_multipliers": [3.0, 4.5, 6.0], "sl_multiplier": 2.5, "use_vwap": true }
+    },
+    updated_at: new Date(),
+    description: "Execution engine entry offsets and ATR multipliers by timeframe"
+  },
   {
     config_key: "feature_names",
     config_value: [
@@ -195,6 +222,12 @@ db.system_config.insertMany([
     ],
     updated_at: new Date(),
     description: "AI feature names for ML models"
+  },
+  {
+    config_key: "profiling",
+    config_value: { "enabled": false, "sample_rate": 0.0, "slow_call_ms": 0, "memory_tracking": false, "output_dir": "profiles" },
+    updated_at: new Date(),
+    description: "Runtime profiling hooks (sampled stacks, slow-call traces, memory snapshots)"
   }
 ]);
 
@@ -206,4 +239,5 @@ print('   - price_history: Historical price and volume data');
 print('   - computed_indicators: Cached indicator calculations');
 print('   - model_performance: AI model accuracy tracking');
 print('   - system_config: Application configuration');
+print('   - performance_rollups: Incrementally maintained performance stats');
 print('🚀 Database is ready for the trading assistant!'); 
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Trading services package
+Engines are re-exported lazily so `import services` stays cheap; heavy
+dependencies load on first use (see services.startup)
+"""
+
+import importlib
+
+_EXPORTS = {
+    "PrecisionTradingEngine": "services.precision_trading",
+    "SignalExecutionEngine": "services.signal_execution",
+    "import_time_report": "services.startup",
+    "readiness": "services.startup",
+    "start_preload": "services.startup",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'services' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
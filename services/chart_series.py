@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTH = 800
+# Upper bound on returned points whatever width is requested; keeps payloads to a few KB
+MAX_POINTS = 2000
+METHODS = ("lttb", "minmax")
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape
+    One Python step per output bucket; the triangle areas inside a bucket are vectorized
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average stands in for the point not chosen yet
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of `buckets` equal-count buckets, in order"""
+    n = len(y)
+    if buckets * 2 >= n:
+        return np.arange(n)
+    bucket = (np.arange(n) * buckets) // n
+    # Sorting by (bucket, value) puts each bucket's min first and max last
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = "lttb") -> np.ndarray:
+    if method == "minmax":
+        return minmax_indices(y, max(points // 2, 1))
+    return lttb(x, y, points)
+
+class _Column:
+    """Append-only float64 buffer with amortized O(1) growth"""
+
+    def __init__(self, capacity: int = 1024):
+        self.data = np.empty(capacity)
+        self.size = 0
+
+    def extend(self, values: np.ndarray):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)))
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+class SeriesPyramid:
+    """
+    Multi-resolution copy of one time series
+    Level 0 is the raw series; each level above keeps the min and max of every
+    `block` points of the level below, so level k holds ~n / (block/2)^k real
+    points. Appends fold completed blocks upwards, and a query picks the
+    coarsest level that still has more points than the chart can draw
+    """
+
+    def __init__(self, block: int = 8, max_levels: int = 8):
+        self.block = block
+        self.max_levels = max_levels
+        self.x: List[_Column] = [_Column()]
+        self.y: List[_Column] = [_Column()]
+        # Points of each level already folded into the level above
+        self.folded: List[int] = [0]
+
+    def __len__(self) -> int:
+        return self.x[0].size
+
+    @property
+    def last_x(self) -> Optional[float]:
+        return float(self.x[0].view[-1]) if len(self) else None
+
+    def extend(self, x: np.ndarray, y: np.ndarray):
+        """Append points (x ascending, after the current last point)"""
+        self.x[0].extend(np.asarray(x, dtype=np.float64))
+        self.y[0].extend(np.asarray(y, dtype=np.float64))
+        level = 0
+        while level + 1 < self.max_levels:
+            complete = (self.x[level].size - self.folded[level]) // self.block * self.block
+            if complete == 0:
+                break
+            if level + 1 == len(self.x):
+                self.x.append(_Column())
+                self.y.append(_Column())
+                self.folded.append(0)
+
+            start = self.folded[level]
+            xs = self.x[level].view[start:start + complete].reshape(-1, self.block)
+            ys = self.y[level].view[start:start + complete].reshape(-1, self.block)
+            low, high = ys.argmin(axis=1), ys.argmax(axis=1)
+            first, second = np.minimum(low, high), np.maximum(low, high)
+            rows = np.arange(len(xs))
+            self.x[level + 1].extend(np.column_stack((xs[rows, first], xs[rows, second])).ravel())
+            self.y[level + 1].extend(np.column_stack((ys[rows, first], ys[rows, second])).ravel())
+            self.folded[level] += complete
+            level += 1
+
+    def _parts(self, level: int, start: Optional[float], end: Optional[float]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Views of level `level` and of the not-yet-folded tails below it inside [start, end], in time order
+        Each part is searched on its own, so nothing is concatenated until a level is chosen
+        """
+        parts = []
+        for current in range(level, -1, -1):
+            first = 0 if current == level else self.folded[current]
+            x = self.x[current].view[first:]
+            y = self.y[current].view[first:]
+            lo = 0 if start is None else int(np.searchsorted(x, start, side="left"))
+            hi = len(x) if end is None else int(np.searchsorted(x, end, side="right"))
+            if hi > lo:
+                parts.append((x[lo:hi], y[lo:hi]))
+        return parts
+
+    def query(self, start: Optional[float], end: Optional[float], points: int,
+              method: str = "lttb") -> Dict:
+        """Downsampled points in [start, end] from the coarsest level that still covers `points`"""
+        level = len(self.x) - 1
+        while True:
+            parts = self._parts(level, start, end)
+            count = sum(len(x) for x, _ in parts)
+            # Drop to a finer level until there are at least 4 source points per output point
+            if level == 0 or count >= 4 * points:
+                break
+            level -= 1
+
+        if len(parts) == 1:
+            x, y = parts[0]
+        elif parts:
+            x, y = np.concatenate([x for x, _ in parts]), np.concatenate([y for _, y in parts])
+        else:
+            x, y = np.empty(0), np.empty(0)
+        # The latest raw point is always drawn, even when a min/max block swallowed it
+        last_x = self.last_x
+        if last_x is not None and (end is None or last_x <= end) and (start is None or last_x >= start) \
+                and (len(x) == 0 or x[-1] < last_x):
+            x, y = np.append(x, last_x), np.append(y, self.y[0].view[-1])
+            count += 1
+
+        keep = downsample(x, y, points, method) if len(x) > points else np.arange(len(x))
+        return {"x": x[keep], "y": y[keep], "level": level, "source_points": count}
+
+def _timestamp_ms(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp() * 1000
+    return float(value)
+
+class ChartSeriesService:
+    """
+    Chart endpoints for the dashboards, downsampled server-side
+    - price_chart: closes from price_history per symbol and timeframe
+    - performance_chart: cumulative P&L of resolved trading_signals
+    Each series lives in a SeriesPyramid refreshed incrementally from MongoDB,
+    so a request only slices a level and runs LTTB/min-max over a few thousand points
+    """
+
+    def __init__(self, db, refresh_interval: float = 15.0):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.pyramids: Dict[str, SeriesPyramid] = {}
+        self.refreshed: Dict[str, float] = {}
+        self.resolved_counts: Dict[str, int] = {}
+
+    def _due(self, key: str) -> bool:
+        return time.monotonic() - self.refreshed.get(key, 0.0) >= self.refresh_interval
+
+    async def _refresh_prices(self, symbol: str, timeframe: str) -> SeriesPyramid:
+        key = f"price:{symbol}:{timeframe}"
+        pyramid = self.pyramids.setdefault(key, SeriesPyramid())
+        if not self._due(key):
+            return pyramid
+
+        query = {"symbol": symbol, "timeframe": timeframe}
+        if pyramid.last_x is not None:
+            query["timestamp"] = {"$gt": datetime.fromtimestamp(pyramid.last_x / 1000)}
+        cursor = self.db.price_history.find(query, {"_id": 0, "timestamp": 1, "close": 1}).sort("timestamp", 1)
+
+        times, closes = [], []
+        async for doc in cursor:
+            times.append(_timestamp_ms(doc["timestamp"]))
+            closes.append(doc["close"])
+        if times:
+            pyramid.extend(np.array(times), np.array(closes))
+        self.refreshed[key] = time.monotonic()
+        return pyramid
+
+    async def _refresh_performance(self, timeframe: Optional[str]) -> SeriesPyramid:
+        key = f"performance:{timeframe or 'all'}"
+        pyramid = self.pyramids.get(key)
+        if pyramid is not None and not self._due(key):
+            return pyramid
+
+        query = {"result": {"$in": ["Win", "Loss"]}}
+        if timeframe:
+            query["timeframe"] = timeframe
+        # Signals resolve after they are created, so an outcome can land behind the
+        # last point; rebuild whenever the resolved count is not what appending explains
+        resolved = await self.db.trading_signals.count_documents(query)
+        if pyramid is not None and pyramid.last_x is not None:
+            newer = {**query, "timestamp": {"$gt": datetime.fromtimestamp(pyramid.last_x / 1000)}}
+            if self.resolved_counts.get(key, 0) + await self.db.trading_signals.count_documents(newer) != resolved:
+                pyramid = None
+        else:
+            newer = query
+        if pyramid is None:
+            pyramid = SeriesPyramid()
+            newer = query
+
+        cursor = self.db.trading_signals.find(newer, {"_id": 0, "timestamp": 1, "profit_loss_usd": 1}).sort("timestamp", 1)
+        times, pnl = [], []
+        async for doc in cursor:
+            times.append(_timestamp_ms(doc["timestamp"]))
+            pnl.append(doc.get("profit_loss_usd") or 0.0)
+        if times:
+            base = float(pyramid.y[0].view[-1]) if len(pyramid) else 0.0
+            pyramid.extend(np.array(times), base + np.cumsum(pnl))
+
+        self.pyramids[key] = pyramid
+        self.resolved_counts[key] = resolved
+        self.refreshed[key] = time.monotonic()
+        return pyramid
+
+    def _payload(self, pyramid: SeriesPyramid, start: Optional[datetime], end: Optional[datetime],
+                 width: int, method: str, decimals: int) -> Dict:
+        points = min(max(int(width), 3), MAX_POINTS)
+        method = method if method in METHODS else "lttb"
+        result = pyramid.query(_timestamp_ms(start) if start else None,
+                               _timestamp_ms(end) if end else None, points, method)
+        # Columnar arrays keep the JSON compact: ~2000 points is still only a few KB gzipped
+        return {
+            "method": method,
+            "level": result["level"],
+            "source_points": result["source_points"],
+            "points": len(result["x"]),
+            "t": result["x"].astype(np.int64).tolist(),
+            "v": np.round(result["y"], decimals).tolist()
+        }
+
+    async def price_chart(self, symbol: str = "BTCUSDT", timeframe: str = "1h",
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          width: int = DEFAULT_WIDTH, method: str = "lttb") -> Dict:
+        try:
+            pyramid = await self._refresh_prices(symbol, timeframe)
+            return {"symbol": symbol, "timeframe": timeframe,
+                    **self._payload(pyramid, start, end, width, method, 2)}
+        except Exception as e:
+            logger.error("Error building price chart: %s", e)
+            return {"symbol": symbol, "timeframe": timeframe, "error": str(e), "t": [], "v": []}
+
+    async def performance_chart(self, timeframe: Optional[str] = None,
+                                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                width: int = DEFAULT_WIDTH, method: str = "lttb") -> Dict:
+        try:
+            pyramid = await self._refresh_performance(timeframe)
+            return {"timeframe": timeframe or "all", "series": "cumulative_profit_loss_usd",
+                    **self._payload(pyramid, start, end, width, method, 2)}
+        except Exception as e:
+            logger.error("Error building performance chart: %s", e)
+            return {"timeframe": timeframe or "all", "error": str(e), "t": [], "v": []}
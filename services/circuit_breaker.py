@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+from services.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency that is known to be down"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for async calls
+    CLOSED: calls pass through. OPEN: calls fail immediately until
+    recovery_timeout passes. HALF_OPEN: a single probe decides which way to go
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def _before_call(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit open")
+            self.state = self.HALF_OPEN
+            self.probing = False
+
+        if self.state == self.HALF_OPEN:
+            if self.probing:
+                # Only one probe at a time; everyone else keeps failing fast
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit half-open, probe in flight")
+            self.probing = True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"✅ {self.name} circuit closed (dependency recovered)")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("⚠️ %s circuit opened after %s failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run fn through the breaker"""
+        self._before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled before the dependency answered: no verdict, so free the probe slot
+            self.probing = False
+            raise
+        self.record_success()
+        return result
+
+    def get_status(self) -> Dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected_calls": self.rejected,
+            "open_for": round(time.monotonic() - self.opened_at, 1) if self.state != self.CLOSED else 0
+        }
+
+@dataclass
+class MarketSnapshot:
+    """Last market data that was fetched successfully"""
+    price: float
+    ohlcv: pd.DataFrame
+    captured_at: float = field(default_factory=time.monotonic)
+
+    def age(self) -> float:
+        return time.monotonic() - self.captured_at
+
+class SnapshotStore:
+    """Last-known-good market data per timeframe, used while the breakers are open"""
+
+    def __init__(self, max_age: float = 900.0):
+        # Past max_age a snapshot is too old to trade on and is not served
+        self.max_age = max_age
+        self.snapshots: Dict[str, MarketSnapshot] = {}
+
+    def save(self, timeframe: str, price: float, ohlcv: pd.DataFrame):
+        self.snapshots[timeframe] = MarketSnapshot(price=price, ohlcv=ohlcv)
+
+    def get(self, timeframe: str) -> Optional[MarketSnapshot]:
+        snapshot = self.snapshots.get(timeframe)
+        if snapshot is None or snapshot.age() > self.max_age:
+            return None
+        return snapshot
+
+# Shared across engines: one view of exchange health per process
+price_breaker = CircuitBreaker("price_feed")
+klines_breaker = CircuitBreaker("klines")
+market_snapshots = SnapshotStore()
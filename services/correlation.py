@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+from services.rate_limiter import Priority, binance_get
+from services.resampler import TIMEFRAME_MS
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+BINANCE_STREAMS = "wss://stream.binance.com:9443/stream"
+
+# Symbols the shared engine streams by default; BTCUSDT is the benchmark
+WATCHLIST = ("BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT", "ADAUSDT", "DOGEUSDT", "AVAXUSDT")
+
+class CorrelationEngine:
+    """
+    Rolling return correlation and beta versus a benchmark across a watchlist
+    Closes are bucketed into bars; each finished bar adds one row of log returns
+    to a (window x symbols) ring and updates running column sums and the
+    cross-product matrix by (new row outer product - dropped row outer product).
+    Reading the correlation matrix is then a few O(symbols^2) array operations
+    into a preallocated buffer, never a pass over raw candles
+    """
+
+    def __init__(self, window: int = 500, timeframe: str = "1h", benchmark: str = "BTCUSDT",
+                 capacity: int = 64):
+        self.window = window
+        self.timeframe = timeframe
+        self.bar_ms = TIMEFRAME_MS[timeframe]
+        self.benchmark = benchmark
+        self.capacity = capacity
+        self.symbols: Dict[str, int] = {}
+        self.rows = 0
+        self.next_row = 0
+        self.rolled = 0
+        self.current_bar: Optional[int] = None
+        # Arrays are allocated on first use so importing this module does not load numpy
+        self.returns: Optional[np.ndarray] = None
+        self._dirty = True
+
+    def _allocate(self):
+        if self.returns is not None:
+            return
+        self.returns = np.zeros((self.window, self.capacity))
+        self.sum = np.zeros(self.capacity)
+        self.cross = np.zeros((self.capacity, self.capacity))
+        self.last_close = np.zeros(self.capacity)  # close of the last finished bar
+        self.bar_close = np.zeros(self.capacity)   # latest close inside the current bar
+        self._corr = np.zeros((self.capacity, self.capacity))
+        self._beta = np.zeros(self.capacity)
+
+    def _column(self, symbol: str) -> int:
+        self._allocate()
+        column = self.symbols.get(symbol)
+        if column is not None:
+            return column
+        column = len(self.symbols)
+        if column == self.returns.shape[1]:
+            grow = self.returns.shape[1]
+            self.returns = np.hstack([self.returns, np.zeros((self.window, grow))])
+            self.cross = np.pad(self.cross, ((0, grow), (0, grow)))
+            self._corr = np.pad(self._corr, ((0, grow), (0, grow)))
+            for name in ("sum", "last_close", "bar_close", "_beta"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(grow)]))
+        self.symbols[symbol] = column
+        return column
+
+    def seed(self, closes: Dict[str, np.ndarray], last_bar: Optional[int] = None):
+        """
+        Load recent bar closes per symbol (oldest first, same bars for every symbol)
+        `last_bar` is the bar index of the final close; candles of that bar or
+        earlier replayed afterwards are ignored instead of rolling a zero return
+        """
+        length = min(len(series) for series in closes.values())
+        for symbol in closes:
+            self._column(symbol)
+        self.rows = max(min(length - 1, self.window), 0)
+        self.next_row = self.rows % self.window
+        self.returns[:] = 0.0
+        for symbol, series in closes.items():
+            if length == 0:
+                break
+            column = self.symbols[symbol]
+            series = np.asarray(series, dtype=np.float64)[-length:]
+            # Guarded: with a single close [-0:] would select every return, not none
+            if self.rows:
+                self.returns[:self.rows, column] = np.diff(np.log(series))[-self.rows:]
+            self.last_close[column] = self.bar_close[column] = series[-1]
+        self.current_bar = None if last_bar is None else last_bar + 1
+        self._rebuild()
+
+    def _rebuild(self):
+        """Running sums from the ring in one pass (seeding, and periodically to shed float drift)"""
+        filled = self.returns[:self.rows]
+        self.sum = filled.sum(axis=0)
+        self.cross = filled.T @ filled
+        self._dirty = True
+
+    def _roll(self):
+        """Finish the current bar: one return row in, the oldest row out"""
+        active = (self.bar_close > 0) & (self.last_close > 0)
+        row = np.zeros(self.returns.shape[1])
+        # A symbol with no close this bar contributes a zero return
+        row[active] = np.log(self.bar_close[active] / self.last_close[active])
+        old = self.returns[self.next_row]
+
+        self.sum += row - old
+        self.cross += np.outer(row, row) - np.outer(old, old)
+        self.returns[self.next_row] = row
+        self.next_row = (self.next_row + 1) % self.window
+        self.rows = min(self.rows + 1, self.window)
+
+        seen = self.bar_close > 0
+        self.last_close[seen] = self.bar_close[seen]
+        self.rolled += 1
+        if self.rolled % self.window == 0:
+            self._rebuild()
+        self._dirty = True
+
+    def on_close(self, symbol: str, timestamp: int, close: float):
+        """Closed candle (any timeframe up to the bar size); the first candle of a new bar rolls the last"""
+        column = self._column(symbol)
+        bar = timestamp // self.bar_ms
+        if self.current_bar is None:
+            self.current_bar = bar
+        elif bar < self.current_bar:
+            return  # a reconnecting stream replays candles of bars already rolled
+        elif bar > self.current_bar:
+            self._roll()
+            self.current_bar = bar
+        if self.last_close[column] == 0:
+            self.last_close[column] = close
+        self.bar_close[column] = close
+
+    def on_candle(self, symbol: str, timestamp: int, open_: float, high: float, low: float,
+                  close: float, volume: float):
+        """CandleResampler closed-candle listener; bind the symbol with functools.partial"""
+        self.on_close(symbol, timestamp, close)
+
+    def _refresh(self):
+        if not self._dirty:
+            return
+        n = len(self.symbols)
+        corr = self._corr[:n, :n]
+        if self.rows < 2:
+            corr[:] = np.eye(n)
+            self._beta[:n] = 0.0
+            self._dirty = False
+            return
+
+        mean = self.sum[:n] / self.rows
+        np.subtract(self.cross[:n, :n], self.rows * np.outer(mean, mean), out=corr)
+        corr /= self.rows - 1  # covariance for now
+        variance = np.clip(np.diag(corr).copy(), 0.0, None)
+        std = np.sqrt(variance)
+
+        benchmark = self.symbols.get(self.benchmark)
+        if benchmark is not None and variance[benchmark] > 0:
+            self._beta[:n] = corr[:, benchmark] / variance[benchmark]
+        else:
+            self._beta[:n] = 0.0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr /= np.outer(std, std)
+        np.nan_to_num(corr, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        np.clip(corr, -1.0, 1.0, out=corr)
+        np.fill_diagonal(corr, 1.0)
+        self._dirty = False
+
+    def correlation_matrix(self) -> np.ndarray:
+        """(symbols x symbols) correlation, a view into a buffer refreshed in place; do not keep it across updates"""
+        self._allocate()
+        self._refresh()
+        n = len(self.symbols)
+        return self._corr[:n, :n]
+
+    def betas(self) -> np.ndarray:
+        """Beta of every symbol versus the benchmark, in column order (view)"""
+        self._allocate()
+        self._refresh()
+        return self._beta[:len(self.symbols)]
+
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        if a not in self.symbols or b not in self.symbols:
+            return None
+        return float(self.correlation_matrix()[self.symbols[a], self.symbols[b]])
+
+    def beta(self, symbol: str) -> Optional[float]:
+        if symbol not in self.symbols:
+            return None
+        return float(self.betas()[self.symbols[symbol]])
+
+    def discount(self, symbol: str, open_symbols: Iterable[str], floor: float = 0.5) -> float:
+        """
+        Multiplier for a new signal's confidence or size given the symbols already
+        held: 1.0 when uncorrelated, down to `floor` when perfectly correlated
+        """
+        if symbol not in self.symbols:
+            return 1.0
+        others = [self.symbols[other] for other in open_symbols if other in self.symbols and other != symbol]
+        if not others:
+            return 1.0
+        highest = float(np.max(self.correlation_matrix()[self.symbols[symbol], others]))
+        return 1.0 - (1.0 - floor) * max(highest, 0.0)
+
+    def get_summary(self, top: int = 10) -> Dict:
+        """Beta/correlation versus the benchmark and the most correlated pairs"""
+        matrix = self.correlation_matrix()
+        names: List[str] = list(self.symbols)
+        benchmark = self.symbols.get(self.benchmark)
+        upper = np.triu_indices(len(names), k=1)
+        values = matrix[upper]
+        pairs = np.argsort(values)[::-1][:top]
+        betas = self.betas()
+        return {
+            "symbols": len(names),
+            "bars": int(self.rows),
+            "timeframe": self.timeframe,
+            "versus_benchmark": {
+                name: {"beta": round(float(betas[column]), 3),
+                       "correlation": round(float(matrix[column, benchmark]), 3) if benchmark is not None else None}
+                for name, column in self.symbols.items()
+            },
+            "most_correlated": [
+                {"pair": [names[upper[0][i]], names[upper[1][i]]], "correlation": round(float(values[i]), 3)}
+                for i in pairs
+            ]
+        }
+
+# Shared watchlist engine, fed by the resamplers' closed base candles
+correlations = CorrelationEngine()
+
+def attach_correlations(resampler, engine: CorrelationEngine = correlations):
+    """Feed a symbol's closed base candles into the correlation engine (once per resampler)"""
+    for listener in resampler.listeners:
+        if isinstance(listener, functools.partial) and listener.func == engine.on_candle:
+            return listener
+    listener = functools.partial(engine.on_candle, resampler.symbol)
+    resampler.listeners.append(listener)
+    return listener
+
+class CorrelationStream:
+    """
+    Feeds a CorrelationEngine from one combined Binance kline stream for the whole watchlist
+    On (re)connect every symbol is seeded with its last `window` closed bars over
+    REST; after that only closed klines from the stream are applied
+    """
+
+    def __init__(self, engine: CorrelationEngine, symbols: Sequence[str] = WATCHLIST):
+        self.engine = engine
+        self.symbols = list(dict.fromkeys(symbols))
+        streams = "/".join(f"{symbol.lower()}@kline_{engine.timeframe}" for symbol in self.symbols)
+        self.stream_url = f"{BINANCE_STREAMS}?streams={streams}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _seed(self):
+        engine = self.engine
+        closes = {}
+        last_bar = None
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            for symbol in self.symbols:
+                params = {"symbol": symbol, "interval": engine.timeframe, "limit": min(engine.window + 2, 1000)}
+                response = await binance_get(client, "/api/v3/klines", params, priority=Priority.BACKFILL)
+                response.raise_for_status()
+                # The last kline is the bar still forming; the stream closes it
+                klines = response.json()[:-1]
+                if not klines:
+                    continue
+                closes[symbol] = np.array([float(k[4]) for k in klines])
+                bar = int(klines[-1][0]) // engine.bar_ms
+                last_bar = bar if last_bar is None else min(last_bar, bar)
+        if closes:
+            engine.seed(closes, last_bar)
+
+    def on_message(self, message: Dict):
+        """Combined-stream kline event; only closed candles reach the engine"""
+        kline = message.get("data", {}).get("k")
+        if not kline or not kline.get("x"):
+            return
+        self.engine.on_close(kline["s"], int(kline["t"]), float(kline["c"]))
+
+    async def _run(self):
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.stream_url) as stream:
+                    # Seed after subscribing so no close falls between history and stream
+                    await self._seed()
+                    logger.info(f"✅ Correlations seeded: {self.engine.rows} {self.engine.timeframe} bars "
+                                f"for {len(self.engine.symbols)} symbols")
+                    async for raw in stream:
+                        self.on_message(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Correlation stream error: %s", e)
+                await asyncio.sleep(5)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# One combined stream per engine
+_streams: Dict[int, CorrelationStream] = {}
+
+def start_correlations(symbols: Sequence[str] = WATCHLIST, engine: CorrelationEngine = correlations) -> CorrelationStream:
+    """Seed and stream the watchlist into the correlation engine (once per engine)"""
+    stream = _streams.get(id(engine))
+    if stream is None:
+        stream = _streams[id(engine)] = CorrelationStream(engine, symbols)
+    stream.start()
+    return stream
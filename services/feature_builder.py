@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Must stay in the same order as system_config.feature_names
+FEATURE_NAMES = [
+    "price_sma_ratio", "price_ema_ratio", "sma_ema_divergence",
+    "rsi_norm", "stoch_norm", "williams_norm", "cci_norm", "mfi_norm",
+    "macd_divergence", "adx_norm", "bb_position", "volatility_ratio",
+    "cmf", "volume_osc_norm", "price_range_position"
+]
+
+# Value used when an indicator is undefined after warm-up (e.g. a flat range)
+FEATURE_NEUTRAL = {
+    "rsi_norm": 0.5, "stoch_norm": 0.5, "williams_norm": 0.5, "mfi_norm": 0.5,
+    "bb_position": 0.5, "price_range_position": 0.5, "volatility_ratio": 1.0
+}
+
+# Longest lookback of any feature; rows before this are warm-up
+WARMUP_PERIODS = 50
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+def _rolling(x: np.ndarray, window: int) -> np.ndarray:
+    """Strided (n - window + 1, window) view over x"""
+    return sliding_window_view(x, window)
+
+def _pad(values: np.ndarray, n: int) -> np.ndarray:
+    """Left-pad a rolling result with NaN back to length n"""
+    out = np.full(n, np.nan)
+    out[n - len(values):] = values
+    return out
+
+def _sma(x: np.ndarray, window: int) -> np.ndarray:
+    if len(x) < window:
+        return np.full(len(x), np.nan)
+    return _pad(_rolling(x, window).mean(axis=-1), len(x))
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    if len(x) < window:
+        return np.full(len(x), np.nan)
+    return _pad(_rolling(x, window).sum(axis=-1), len(x))
+
+def _rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    if len(x) < window:
+        return np.full(len(x), np.nan)
+    return _pad(_rolling(x, window).std(axis=-1, ddof=1), len(x))
+
+def _rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    if len(x) < window:
+        return np.full(len(x), np.nan)
+    return _pad(_rolling(x, window).max(axis=-1), len(x))
+
+def _rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    if len(x) < window:
+        return np.full(len(x), np.nan)
+    return _pad(_rolling(x, window).min(axis=-1), len(x))
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Recursive exponential average (pandas ewm(adjust=False)) as a single IIR filter pass"""
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+    start = valid[0]
+    series = x[start:]
+    out[start:], _ = lfilter([alpha], [1.0, alpha - 1.0], series, zi=[(1.0 - alpha) * series[0]])
+    return out
+
+def _ema(x: np.ndarray, span: int) -> np.ndarray:
+    return _ewm(x, 2.0 / (span + 1.0))
+
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    return _ewm(x, 1.0 / period)
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields NaN instead of inf for zero denominators"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+def _as_arrays(candles) -> Dict[str, np.ndarray]:
+    """Accept a DataFrame or a mapping of columns and return float64 arrays"""
+    return {col: np.asarray(candles[col], dtype=np.float64) for col in OHLCV_COLUMNS}
+
+def build_feature_matrix(candles, drop_warmup: bool = False) -> np.ndarray:
+    """
+    Compute the full (n_candles, 15) feature matrix in one vectorized pass
+    Columns follow FEATURE_NAMES; warm-up rows are NaN unless drop_warmup is set
+    """
+    data = _as_arrays(candles)
+    high, low, close, volume = data["high"], data["low"], data["close"], data["volume"]
+    n = len(close)
+    features = np.full((n, len(FEATURE_NAMES)), np.nan)
+    if n == 0:
+        return features
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    typical = (high + low + close) / 3
+
+    # Trend
+    sma_20 = _sma(close, 20)
+    ema_20 = _ema(close, 20)
+    features[:, 0] = _divide(close, sma_20) - 1
+    features[:, 1] = _divide(close, ema_20) - 1
+    features[:, 2] = _divide(sma_20 - ema_20, close)
+
+    # RSI (Wilder)
+    delta = np.diff(close, prepend=np.nan)
+    avg_gain = _wilder(np.where(delta > 0, delta, 0.0)[1:], 14)
+    avg_loss = _wilder(np.where(delta < 0, -delta, 0.0)[1:], 14)
+    rsi = np.concatenate(([np.nan], 100 - 100 / (1 + _divide(avg_gain, avg_loss))))
+    rsi[1:][avg_loss == 0] = 100.0
+    features[:, 3] = rsi / 100
+
+    # Stochastic %D and Williams %R
+    highest_14 = _rolling_max(high, 14)
+    lowest_14 = _rolling_min(low, 14)
+    range_14 = highest_14 - lowest_14
+    stoch_k = _divide(close - lowest_14, range_14)
+    features[:, 4] = _sma(stoch_k, 3)
+    features[:, 5] = 1 - _divide(highest_14 - close, range_14)
+
+    # CCI, clipped to +-200 and scaled to +-1
+    tp_sma = _sma(typical, 20)
+    mean_dev = np.full(n, np.nan)
+    if n >= 20:
+        windows = _rolling(typical, 20)
+        mean_dev[19:] = np.abs(windows - tp_sma[19:, None]).mean(axis=-1)
+    cci = _divide(typical - tp_sma, 0.015 * mean_dev)
+    features[:, 6] = np.clip(cci / 200, -1, 1)
+
+    # MFI
+    money_flow = typical * volume
+    tp_change = np.diff(typical, prepend=np.nan)
+    positive_flow = _rolling_sum(np.where(tp_change > 0, money_flow, 0.0), 14)
+    negative_flow = _rolling_sum(np.where(tp_change < 0, money_flow, 0.0), 14)
+    mfi = 100 - 100 / (1 + _divide(positive_flow, negative_flow))
+    mfi[negative_flow == 0] = 100.0
+    features[:, 7] = mfi / 100
+
+    # MACD histogram relative to price
+    macd = _ema(close, 12) - _ema(close, 26)
+    features[:, 8] = _divide(macd - _ema(macd, 9), close)
+
+    # ADX (Wilder)
+    up_move = np.diff(high, prepend=np.nan)
+    down_move = -np.diff(low, prepend=np.nan)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)[1:]
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)[1:]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = _wilder(true_range[1:], 14)
+    plus_di = _divide(_wilder(plus_dm, 14), atr)
+    minus_di = _divide(_wilder(minus_dm, 14), atr)
+    dx = _divide(np.abs(plus_di - minus_di), plus_di + minus_di)
+    # DX is 0/0 without directional movement: NaN until the first defined value, so
+    # the ADX starts from real DX, and 0 (no trend) after it
+    defined = np.flatnonzero(~np.isnan(dx))
+    if len(defined):
+        dx[defined[0]:] = np.nan_to_num(dx[defined[0]:])
+    features[1:, 9] = _wilder(dx, 14)
+
+    # Bollinger position
+    std_20 = _rolling_std(close, 20)
+    features[:, 10] = _divide(close - (sma_20 - 2 * std_20), 4 * std_20)
+
+    # Short / long realized volatility
+    returns = _divide(close - prev_close, prev_close)
+    features[:, 11] = _divide(_rolling_std(returns, 10), _rolling_std(returns, 50))
+
+    # Chaikin money flow
+    multiplier = _divide((close - low) - (high - close), high - low)
+    features[:, 12] = _divide(_rolling_sum(np.nan_to_num(multiplier) * volume, 20), _rolling_sum(volume, 20))
+
+    # Volume oscillator
+    volume_slow = _ema(volume, 20)
+    features[:, 13] = _divide(_ema(volume, 5) - volume_slow, volume_slow)
+
+    # Position within the 20-period range
+    features[:, 14] = _divide(close - _rolling_min(low, 20), _rolling_max(high, 20) - _rolling_min(low, 20))
+
+    # Warm-up rows are undefined; after warm-up, undefined values become neutral
+    features[:WARMUP_PERIODS] = np.nan
+    settled = features[WARMUP_PERIODS:]
+    for i, name in enumerate(FEATURE_NAMES):
+        column = settled[:, i]
+        column[np.isnan(column)] = FEATURE_NEUTRAL.get(name, 0.0)
+
+    if drop_warmup:
+        return features[WARMUP_PERIODS:]
+    return features
+
+def build_latest_features(candles) -> Dict[str, float]:
+    """Feature vector for the most recent candle, keyed by feature name"""
+    matrix = build_feature_matrix(candles)
+    if len(matrix) == 0:
+        return {}
+    return {name: float(value) for name, value in zip(FEATURE_NAMES, matrix[-1])}
+
+def chunks_from_records(records: Iterable[Dict], chunk_size: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+    """Group price_history documents (oldest first) into columnar chunks"""
+    buffer: List[Dict] = []
+    for record in records:
+        buffer.append(record)
+        if len(buffer) >= chunk_size:
+            yield _records_to_columns(buffer)
+            buffer = []
+    if buffer:
+        yield _records_to_columns(buffer)
+
+def _records_to_columns(records: List[Dict]) -> Dict[str, np.ndarray]:
+    columns = {col: np.fromiter((r[col] for r in records), dtype=np.float64, count=len(records))
+               for col in OHLCV_COLUMNS}
+    columns["timestamp"] = np.array(
+        [r["timestamp"].timestamp() * 1000 if isinstance(r["timestamp"], datetime) else r["timestamp"]
+         for r in records],
+        dtype=np.int64
+    )
+    return columns
+
+class FeatureExporter:
+    """
+    Streaming training-set exporter
+    Consumes candle chunks one at a time and writes one columnar .npz file per
+    chunk, carrying a tail of history between chunks so indicators stay continuous
+    """
+
+    def __init__(self, output_dir: str, overlap: int = 500):
+        # Exponential indicators have infinite memory; a long overlap makes the
+        # difference versus a single full-history pass negligible
+        self.output_dir = output_dir
+        self.overlap = max(overlap, WARMUP_PERIODS)
+
+    def export(self, candle_chunks: Iterable[Dict[str, np.ndarray]], prefix: str = "features") -> Dict:
+        """Write every chunk and return the manifest (also saved as manifest.json)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = {"feature_names": FEATURE_NAMES, "files": [], "rows": 0,
+                    "created_at": datetime.now().isoformat()}
+        tail: Optional[Dict[str, np.ndarray]] = None
+
+        for index, chunk in enumerate(candle_chunks):
+            chunk = {col: np.asarray(values) for col, values in chunk.items()}
+            new_rows = len(chunk["close"])
+            if new_rows == 0:
+                continue
+
+            if tail is not None:
+                window = {col: np.concatenate((tail[col], chunk[col])) for col in chunk}
+            else:
+                window = chunk
+
+            features = build_feature_matrix(window)[-new_rows:]
+            valid = ~np.isnan(features).any(axis=1)
+
+            columns = {name: features[valid, i].astype(np.float32) for i, name in enumerate(FEATURE_NAMES)}
+            if "timestamp" in chunk:
+                columns["timestamp"] = chunk["timestamp"][valid]
+
+            filename = f"{prefix}_{index:05d}.npz"
+            np.savez(os.path.join(self.output_dir, filename), **columns)
+            manifest["files"].append({"file": filename, "rows": int(valid.sum())})
+            manifest["rows"] += int(valid.sum())
+
+            tail = {col: values[-self.overlap:] for col, values in window.items()}
+
+        with open(os.path.join(self.output_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"📦 Exported {manifest['rows']} feature rows in {len(manifest['files'])} files")
+        return manifest
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import pickle
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import logging
+
+from services.feature_builder import build_feature_matrix
+from services.precision_trading import PrecisionTradingEngine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = os.getenv("AI_MODEL_DIR", "ai_models")
+
+MODEL_NAMES = ["random_forest", "gradient_boost", "neural_network"]
+
+ACTIONS = ["BUY", "SELL", "HOLD"]
+# ai_training_data outcomes -> engine actions
+OUTCOME_TO_ACTION = {"buy": "BUY", "sell": "SELL", "wait": "HOLD"}
+
+# Loaded ensembles shared by every predictor in the process, keyed by model dir
+_ensemble_cache: Dict[str, Tuple[Dict, Optional[object]]] = {}
+
+def load_ensemble(model_dir: str = DEFAULT_MODEL_DIR, reload: bool = False) -> Tuple[Dict, Optional[object]]:
+    """Load (and cache) the pickled sklearn models and feature scaler"""
+    if model_dir in _ensemble_cache and not reload:
+        return _ensemble_cache[model_dir]
+
+    models = {}
+    scaler = None
+    for name in MODEL_NAMES:
+        path = os.path.join(model_dir, f"{name}.pkl")
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "rb") as f:
+                models[name] = pickle.load(f)
+        except Exception as e:
+            logger.error("Error loading model %s: %s", name, e)
+
+    scaler_path = os.path.join(model_dir, "scaler_main.pkl")
+    if os.path.exists(scaler_path):
+        try:
+            with open(scaler_path, "rb") as f:
+                scaler = pickle.load(f)
+        except Exception as e:
+            logger.error("Error loading feature scaler: %s", e)
+
+    logger.info(f"🤖 Loaded {len(models)} AI models from {model_dir}")
+    _ensemble_cache[model_dir] = (models, scaler)
+    return models, scaler
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests and runs them as one predict_proba call
+    A batch is flushed when it is full or when its oldest request hits max_wait_ms
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, features: np.ndarray) -> np.ndarray:
+        """Queue one feature row and wait for its probability row"""
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                # A malformed row fails its own batch here, never the worker
+                rows = np.vstack([features for features, _ in batch])
+                # Keep model inference off the event loop
+                probabilities = await loop.run_in_executor(None, self.predict_fn, rows)
+                if len(probabilities) != len(batch):
+                    raise ValueError(f"Model returned {len(probabilities)} rows for a batch of {len(batch)}")
+                for (_, future), row in zip(batch, probabilities):
+                    if not future.done():
+                        future.set_result(row)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error("Error in batched prediction: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self.batches += 1
+            self.requests += len(batch)
+
+    async def close(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+class HybridPredictor:
+    """
+    Hybrid rule-based + AI predictor
+    Blends PrecisionTradingEngine levels with the sklearn ensemble's action probabilities
+    """
+
+    def __init__(self, engine: Optional[PrecisionTradingEngine] = None, model_dir: str = DEFAULT_MODEL_DIR,
+                 model_weights: Optional[Dict[str, float]] = None, hybrid_weights: Optional[Dict[str, float]] = None,
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.engine = engine or PrecisionTradingEngine()
+        self.model_dir = model_dir
+        config = self.engine.config.current
+        self.model_weights = dict(model_weights or config.ai_model_weights)
+        self.hybrid_weights = dict(hybrid_weights or config.hybrid_weights)
+        if model_weights is None and hybrid_weights is None:
+            self.engine.config.subscribe(self._on_config_change)
+        self.models, self.scaler = load_ensemble(model_dir)
+        self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait_ms)
+
+    def _on_config_change(self, config):
+        """Follow weight changes made in system_config"""
+        self.model_weights = dict(config.ai_model_weights)
+        self.hybrid_weights = dict(config.hybrid_weights)
+
+    def reload_models(self):
+        """Pick up freshly trained models"""
+        self.models, self.scaler = load_ensemble(self.model_dir, reload=True)
+
+    def adjust_weights(self, rule_weight: float, ai_weight: float):
+        """Change the rule/AI blend"""
+        total = rule_weight + ai_weight
+        self.hybrid_weights = {"rule_based": rule_weight / total, "ai_based": ai_weight / total}
+
+    def _predict_batch(self, rows: np.ndarray) -> np.ndarray:
+        """Weighted ensemble probabilities, columns ordered as ACTIONS"""
+        if self.scaler is not None:
+            rows = self.scaler.transform(rows)
+
+        blended = np.zeros((len(rows), len(ACTIONS)))
+        total_weight = 0.0
+        for name, model in self.models.items():
+            weight = self.model_weights.get(name, 0.0)
+            if weight <= 0:
+                continue
+            probabilities = model.predict_proba(rows)
+            for column, label in enumerate(model.classes_):
+                action = OUTCOME_TO_ACTION.get(str(label).lower(), str(label).upper())
+                if action in ACTIONS:
+                    blended[:, ACTIONS.index(action)] += weight * probabilities[:, column]
+            total_weight += weight
+
+        if total_weight > 0:
+            blended /= total_weight
+        return blended
+
+    async def predict_proba(self, features: np.ndarray) -> Dict[str, float]:
+        """AI action probabilities for one feature vector (batched with concurrent callers)"""
+        row = np.asarray(features, dtype=np.float64).reshape(1, -1)
+        probabilities = await self.batcher.submit(row)
+        return {action: float(p) for action, p in zip(ACTIONS, probabilities)}
+
+    def _rule_probabilities(self, signal: Dict) -> Dict[str, float]:
+        """Express the rule-based action and confidence as a probability vector"""
+        confidence = signal.get("confidence", 0) / 100
+        action = signal.get("action", "HOLD")
+        remainder = (1 - confidence) / (len(ACTIONS) - 1)
+        return {a: (confidence if a == action else remainder) for a in ACTIONS}
+
+    async def generate_hybrid_signal(self, timeframe: str = '15m') -> Dict:
+        """Generate a precision signal with the AI ensemble blended in"""
+        try:
+            ohlcv_data = await self.engine._get_ohlcv_data(timeframe, 200)
+            signal = await self.engine.generate_trade_recommendation(timeframe, ohlcv_data=ohlcv_data)
+
+            if not self.models or ohlcv_data.empty:
+                signal["prediction_method"] = "rule_based"
+                return signal
+
+            features = build_feature_matrix(ohlcv_data)[-1]
+            if np.isnan(features).any():
+                signal["prediction_method"] = "rule_based"
+                return signal
+
+            ai_probabilities = await self.predict_proba(features)
+            rule_probabilities = self._rule_probabilities(signal)
+            rule_weight = self.hybrid_weights.get("rule_based", 0.6)
+            ai_weight = self.hybrid_weights.get("ai_based", 0.4)
+
+            blended = {
+                action: rule_weight * rule_probabilities[action] + ai_weight * ai_probabilities[action]
+                for action in ACTIONS
+            }
+            action = max(blended, key=blended.get)
+            rule_action = signal["action"]
+
+            signal["confidence"] = round(blended[action] * 100, 1)
+            signal["prediction_method"] = "hybrid"
+            signal["ai_analysis"] = {
+                "probabilities": {a: round(p, 3) for a, p in ai_probabilities.items()},
+                "blended": {a: round(p, 3) for a, p in blended.items()},
+                "rule_action": rule_action,
+                "weights": dict(self.hybrid_weights)
+            }
+            if action != rule_action:
+                # Levels are only defined for the rule-based direction; disagreement means stand aside.
+                # The confidence is then the blend's confidence in holding, not in the winning action
+                signal["action"] = "HOLD"
+                signal["confidence"] = round(blended["HOLD"] * 100, 1)
+                signal["ai_analysis"]["disagreement_margin"] = round(blended[action] - blended.get(rule_action, 0.0), 3)
+                signal["key_triggers"] = signal["key_triggers"] + ["AI and rule-based signals disagree"]
+
+            return signal
+
+        except Exception as e:
+            logger.error("Error generating hybrid signal: %s", e)
+            return self.engine._generate_no_signal(timeframe)
+
+    def get_system_status(self) -> Dict:
+        """AI subsystem status for /api/ai-status"""
+        return {
+            "models_loaded": len(self.models),
+            "model_names": list(self.models),
+            "ready_for_prediction": bool(self.models),
+            "hybrid_mode": bool(self.models),
+            "hybrid_weights": dict(self.hybrid_weights),
+            "batches_run": self.batcher.batches,
+            "requests_served": self.batcher.requests,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def close(self):
+        self.engine.config.unsubscribe(self._on_config_change)
+        await self.batcher.close()
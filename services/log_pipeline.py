@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+import atexit
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StructuredFormatter(logging.Formatter):
+    """Appends `extra={"fields": {...}}` as key=value pairs; runs on the writer thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (suppressed {suppressed} similar messages)"
+        return text
+
+class RepeatFilter(logging.Filter):
+    """
+    Rate-limits identical warnings/errors: each (logger, level, message) key may
+    emit `burst` records per `interval` seconds; the rest are counted and the
+    total is attached to the next record that gets through
+    """
+
+    def __init__(self, burst: int = 5, interval: float = 60.0, min_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.min_level = min_level
+        # key -> [window start, emitted in window, suppressed since last emit]
+        self.windows: Dict[Tuple, List] = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Keyed on the unformatted message, so callers pass values as %-style arguments
+        if record.levelno < self.min_level:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else repr(record.msg))
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            if len(self.windows) > 10000:
+                self.windows.clear()
+            suppressed = window[2] if window else 0
+            self.windows[key] = window = [now, 0, suppressed]
+
+        if window[1] >= self.burst:
+            window[2] += 1
+            self.suppressed_total += 1
+            return False
+
+        window[1] += 1
+        if window[2]:
+            record.suppressed = window[2]
+            window[2] = 0
+        return True
+
+class BoundedQueueHandler(QueueHandler):
+    """Enqueues records without formatting them and drops (counting) when the queue is full"""
+
+    def __init__(self, record_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(record_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is deferred to the writer thread; only exception info is
+        # rendered here because the traceback objects do not outlive the caller
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue is lock-free for the caller; the bound is checked against its size
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+class BatchWriter:
+    """
+    Background thread draining the record queue in batches
+    Stream and file handlers get one write and one flush per batch; any other
+    handler is called record by record
+    """
+
+    def __init__(self, record_queue: queue.SimpleQueue, handlers: List[logging.Handler], batch_size: int = 256):
+        self.queue = record_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._stopping = threading.Event()
+
+    def _drain(self, first: logging.LogRecord) -> List[logging.LogRecord]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[logging.LogRecord]):
+        for handler in self.handlers:
+            records = [record for record in batch if record.levelno >= handler.level and handler.filter(record)]
+            if not records:
+                continue
+            try:
+                if isinstance(handler, logging.StreamHandler):
+                    text = "".join(handler.format(record) + handler.terminator for record in records)
+                    handler.acquire()
+                    try:
+                        if getattr(handler, "stream", None) is None and hasattr(handler, "_open"):
+                            handler.stream = handler._open()  # delayed FileHandler
+                        handler.stream.write(text)
+                        handler.flush()
+                    finally:
+                        handler.release()
+                else:
+                    for record in records:
+                        handler.handle(record)
+            except Exception:
+                handler.handleError(records[0])
+        self.written += len(batch)
+        self.batches += 1
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            self._write(self._drain(first))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Write out everything queued so far, then end the thread"""
+        self._stopping.set()
+        self._thread.join(timeout)
+
+class LogPipeline:
+    """Root logging routed through a bounded queue to a batching writer thread"""
+
+    def __init__(self, queue_size: int = 10000, batch_size: int = 256, burst: int = 5, interval: float = 60.0):
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = BoundedQueueHandler(self.queue, queue_size)
+        self.repeat_filter = RepeatFilter(burst=burst, interval=interval)
+        self.handler.addFilter(self.repeat_filter)
+        self.writer: Optional[BatchWriter] = None
+        self._previous_handlers: List[logging.Handler] = []
+
+    def install(self, level: int = logging.INFO, handlers: Optional[List[logging.Handler]] = None):
+        """Move the root logger's handlers (or `handlers`) behind the queue; later calls are no-ops"""
+        if self.writer is not None:
+            return self
+        root = logging.getLogger()
+        self._previous_handlers = list(root.handlers)
+        targets = handlers or self._previous_handlers or [logging.StreamHandler()]
+        for target in targets:
+            if target.formatter is None or type(target.formatter) is logging.Formatter:
+                fmt = target.formatter._fmt if target.formatter else "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+                target.setFormatter(StructuredFormatter(fmt))
+
+        for existing in self._previous_handlers:
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+
+        self.writer = BatchWriter(self.queue, targets)
+        self.writer.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        root = logging.getLogger()
+        if self.handler in root.handlers:
+            root.removeHandler(self.handler)
+            for existing in self._previous_handlers:
+                root.addHandler(existing)
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "suppressed": self.repeat_filter.suppressed_total,
+            "written": self.writer.written if self.writer else 0,
+            "batches": self.writer.batches if self.writer else 0
+        }
+
+# Installed once per worker by services.startup.start_preload()
+log_pipeline = LogPipeline()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+# How many candles a trade is given to resolve after entry
+HORIZON_CANDLES = {'5m': 12, '15m': 16, '1h': 24, '4h': 30, '1d': 20}
+
+# GARCH(1,1) persistence used by the "garch" method; omega is set by variance targeting
+GARCH_ALPHA = 0.08
+GARCH_BETA = 0.90
+
+def bar_moves(candles: pd.DataFrame, lookback: int = 500) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-candle log moves from the previous close: (close return, high excursion, low excursion)"""
+    count = min(lookback, len(candles) - 1)
+    close = candles['close'].to_numpy(dtype=np.float64)[-(count + 1):]
+    high = candles['high'].to_numpy(dtype=np.float64)[-count:]
+    low = candles['low'].to_numpy(dtype=np.float64)[-count:]
+    previous = close[:-1]
+    returns = np.log(close[1:] / previous)
+    return returns, np.log(high / previous), np.log(low / previous)
+
+def _garch_filter(returns: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    """Conditional variance of each historical return, the one-step-ahead forecast and omega"""
+    long_run = returns.var()
+    omega = long_run * (1 - GARCH_ALPHA - GARCH_BETA)
+    variance = np.empty(len(returns))
+    current = long_run
+    for i, r in enumerate(returns):
+        variance[i] = current
+        current = omega + GARCH_ALPHA * r * r + GARCH_BETA * current
+    return variance, current, omega
+
+def _first_hit(mask: np.ndarray) -> np.ndarray:
+    """Index of the first True per row, or the row length when there is none"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+class MonteCarloSimulator:
+    """
+    Simulates price paths after entry to estimate how a signal resolves
+    Whole candles (close return plus high/low excursion) are resampled from recent
+    history, optionally rescaled by a GARCH(1,1) volatility path, so intrabar
+    touches of TP and SL are captured without simulating ticks
+    """
+
+    def __init__(self, n_paths: int = 5000, lookback: int = 500, method: str = "bootstrap",
+                 seed: Optional[int] = None):
+        if method not in ("bootstrap", "garch"):
+            raise ValueError(f"Unknown simulation method: {method}")
+        self.n_paths = n_paths
+        self.lookback = lookback
+        self.method = method
+        self.seed = seed
+        self._rng = None
+
+    @property
+    def rng(self):
+        # Created on first use so importing the module does not load numpy
+        if self._rng is None:
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
+
+    def simulate_moves(self, candles: pd.DataFrame, horizon: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Log close, high and low of each simulated candle relative to the start, shape (n_paths, horizon)"""
+        returns, ups, downs = bar_moves(candles, self.lookback)
+        # Remove the lookback's drift so outcomes reflect the levels and volatility, not the recent trend
+        drift = returns.mean()
+        returns, ups, downs = returns - drift, ups - drift, downs - drift
+
+        picks = self.rng.integers(0, len(returns), size=(self.n_paths, horizon))
+        step_returns, step_ups, step_downs = returns[picks], ups[picks], downs[picks]
+
+        if self.method == "garch":
+            # Filtered historical simulation: standardise each picked candle by its own
+            # conditional volatility and rescale it by the simulated one
+            history_variance, forecast, omega = _garch_filter(returns)
+            history_sigma = np.sqrt(history_variance)[picks]
+            variance = np.full(self.n_paths, forecast)
+            for step in range(horizon):
+                scale = np.sqrt(variance) / np.maximum(history_sigma[:, step], 1e-12)
+                step_returns[:, step] *= scale
+                step_ups[:, step] *= scale
+                step_downs[:, step] *= scale
+                variance = omega + GARCH_ALPHA * step_returns[:, step] ** 2 + GARCH_BETA * variance
+
+        closes = np.cumsum(step_returns, axis=1)
+        opens = closes - step_returns
+        return closes, opens + step_ups, opens + step_downs
+
+    def simulate(self, candles: pd.DataFrame, action: str, entry: float, take_profits: List[Dict],
+                 stop_loss: float, horizon: int) -> Dict:
+        """
+        Probabilities of each TP filling before the SL within the horizon, and expected value
+        Paths start at the last close and the order fills when a candle reaches the entry
+        (immediately if the entry is marketable); TP and SL only count from the fill on
+        """
+        if len(candles) < 30 or entry <= 0 or stop_loss <= 0:
+            return {}
+
+        closes, highs, lows = self.simulate_moves(candles, horizon)
+        entry_log = np.log(entry / float(candles['close'].iloc[-1]))
+        risk = min(abs(entry - stop_loss) / entry, 0.999)
+        # Favourable/adverse log excursions from the entry so BUY and SELL share one code path
+        if action == "BUY":
+            favourable, adverse = highs - entry_log, entry_log - lows
+            final_pnl = np.expm1(closes[:, -1] - entry_log)
+            sl_barrier = -np.log1p(-risk)
+            reached, marketable = lows <= entry_log, entry_log >= 0
+        else:
+            favourable, adverse = entry_log - lows, highs - entry_log
+            final_pnl = -np.expm1(closes[:, -1] - entry_log)
+            sl_barrier = np.log1p(risk)
+            reached, marketable = highs >= entry_log, entry_log <= 0
+
+        steps = np.arange(horizon)
+        if marketable:
+            fill_step = np.zeros(len(closes), dtype=np.int64)
+            tp_from = fill_step
+        else:
+            fill_step = _first_hit(reached)
+            # The fill candle may have touched the TP before coming back to the entry
+            tp_from = fill_step + 1
+        filled = fill_step < horizon
+        final_pnl = np.where(filled, final_pnl, 0.0)
+
+        # The fill candle can stop the trade out: the order within it is unknown, so assume the worst
+        sl_step = _first_hit((adverse >= sl_barrier) & (steps >= fill_step[:, None]))
+        sl_hit = sl_step < horizon
+
+        targets = []
+        weighted_ev = 0.0
+        expiry_probability = float((filled & ~sl_hit).mean())
+        for i, tp in enumerate(take_profits):
+            reward = min(abs(tp["level"] - entry) / entry, 0.999)
+            tp_barrier = np.log1p(reward) if action == "BUY" else -np.log1p(-reward)
+            tp_step = _first_hit((favourable >= tp_barrier) & (steps >= tp_from[:, None]))
+            # A candle touching both levels counts as a loss: the order within it is unknown
+            wins = tp_step < sl_step
+            outcome = np.where(wins, reward, np.where(sl_hit, -risk, final_pnl))
+            expected = float(outcome.mean())
+            weighted_ev += tp.get("weight", 0.0) * expected
+            if i == 0:
+                expiry_probability = float((filled & ~wins & ~sl_hit).mean())
+            targets.append({
+                "level": float(tp["level"]),
+                "probability": round(float(wins.mean()), 4),
+                "expected_value_pct": round(expected * 100, 3)
+            })
+
+        return {
+            "method": self.method,
+            "paths": self.n_paths,
+            "horizon_candles": horizon,
+            "fill_probability": round(float(filled.mean()), 4),
+            "take_profit": targets,
+            "stop_loss_probability": round(float(sl_hit.mean()), 4),
+            "expiry_probability": round(expiry_probability, 4),
+            "expected_value_pct": round(weighted_ev * 100, 3)
+        }
+
+    def simulate_signal(self, signal: Dict, candles: pd.DataFrame) -> Dict:
+        """Simulation summary for an engine signal dict; empty for HOLD or insufficient data"""
+        try:
+            if signal.get("action") not in ("BUY", "SELL") or candles is None:
+                return {}
+            started = time.perf_counter()
+            horizon = HORIZON_CANDLES.get(signal["timeframe"], 16)
+            result = self.simulate(candles, signal["action"], signal["entry_price"], signal["take_profit"],
+                                   signal["stop_loss"], horizon)
+            if result:
+                result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+        except Exception as e:
+            logger.error("Error simulating signal outcome: %s", e)
+            return {}
+
+# Shared simulator attached to live recommendations
+outcome_simulator = MonteCarloSimulator()
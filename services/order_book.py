@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import json
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.rate_limiter import Priority, binance_get
+from services.startup import lazy_import
+
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS = "wss://stream.binance.com:9443/ws"
+
+class BookSide:
+    """One side of the book: price -> quantity plus an ascending sorted price index"""
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.levels: Dict[float, float] = {}
+        self.prices: List[float] = []
+
+    def clear(self):
+        self.levels.clear()
+        self.prices.clear()
+
+    def set(self, price: float, quantity: float):
+        if quantity == 0:
+            if self.levels.pop(price, None) is not None:
+                del self.prices[bisect_left(self.prices, price)]
+        else:
+            if price not in self.levels:
+                insort(self.prices, price)
+            self.levels[price] = quantity
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def iter_from_best(self):
+        """(price, quantity) pairs from the best level outward"""
+        prices = reversed(self.prices) if self.descending else self.prices
+        for price in prices:
+            yield price, self.levels[price]
+
+    def quantity_between(self, low: float, high: float) -> Tuple[float, float]:
+        """Total (base quantity, quote notional) resting in [low, high]"""
+        start = bisect_left(self.prices, low)
+        quantity = notional = 0.0
+        for price in self.prices[start:]:
+            if price > high:
+                break
+            quantity += self.levels[price]
+            notional += self.levels[price] * price
+        return quantity, notional
+
+class OrderBook:
+    """
+    In-memory L2 order book for one symbol
+    Built from a REST depth snapshot and kept current with diff-depth events;
+    a sequence gap marks the book unsynced until a fresh snapshot is applied
+    """
+
+    def __init__(self, symbol: str = "BTCUSDT"):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = 0
+        self.synced = False
+        self.updated_at: Optional[datetime] = None
+        self.updates = 0
+        self.resyncs = 0
+
+    def apply_snapshot(self, snapshot: Dict):
+        """Replace the book with a /api/v3/depth snapshot (not yet synced: see resync)"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, quantity in snapshot["bids"]:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in snapshot["asks"]:
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = snapshot["lastUpdateId"]
+        self.updated_at = datetime.now()
+
+    def resync(self, snapshot: Dict, buffered: List[Dict]) -> bool:
+        """Apply a snapshot and replay the diffs buffered while it loaded; synced only if none left a gap"""
+        self.synced = False
+        self.apply_snapshot(snapshot)
+        for event in buffered:
+            if not self.apply_diff(event):
+                return False
+        self.synced = True
+        return True
+
+    def apply_diff(self, event: Dict) -> bool:
+        """Apply one depthUpdate event; returns False on a sequence gap (resync needed)"""
+        first_id, final_id = event["U"], event["u"]
+        if final_id <= self.last_update_id:
+            return True  # already covered by the snapshot
+        if first_id > self.last_update_id + 1:
+            self.synced = False
+            return False
+
+        for price, quantity in event["b"]:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in event["a"]:
+            self.asks.set(float(price), float(quantity))
+
+        self.last_update_id = final_id
+        self.updated_at = datetime.now()
+        self.updates += 1
+        return True
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def depth_within_bps(self, bps: float) -> Dict[str, float]:
+        """Base quantity and quote notional on each side within `bps` of the mid"""
+        mid = self.mid()
+        if mid is None:
+            return {"bid_quantity": 0.0, "bid_notional": 0.0, "ask_quantity": 0.0, "ask_notional": 0.0}
+        band = mid * bps / 10000
+        bid_quantity, bid_notional = self.bids.quantity_between(mid - band, mid)
+        ask_quantity, ask_notional = self.asks.quantity_between(mid, mid + band)
+        return {"bid_quantity": bid_quantity, "bid_notional": bid_notional,
+                "ask_quantity": ask_quantity, "ask_notional": ask_notional}
+
+    def estimate_fill(self, action: str, notional: float) -> Dict[str, float]:
+        """Walk the book to fill `notional` quote currency as a market order"""
+        side = self.asks if action == "BUY" else self.bids
+        best = side.best()
+        if best is None or notional <= 0:
+            return {"average_price": best or 0.0, "slippage_bps": 0.0, "filled_notional": 0.0, "levels_used": 0}
+
+        remaining = notional
+        quantity = 0.0
+        levels_used = 0
+        for price, available in side.iter_from_best():
+            take = min(available, remaining / price)
+            quantity += take
+            remaining -= take * price
+            levels_used += 1
+            if remaining <= 1e-9:
+                break
+
+        filled = notional - remaining
+        average_price = filled / quantity if quantity else best
+        return {
+            "average_price": average_price,
+            "slippage_bps": abs(average_price - best) / best * 10000,
+            "filled_notional": filled,
+            "levels_used": levels_used
+        }
+
+    def liquidity_summary(self, action: str, notional: float) -> Dict:
+        """Liquidity figures attached to a signal's market context"""
+        mid = self.mid()
+        spread = self.spread()
+        depth = self.depth_within_bps(10)
+        fill = self.estimate_fill(action, notional)
+        return {
+            "best_bid": self.best_bid(),
+            "best_ask": self.best_ask(),
+            "spread_bps": round(spread / mid * 10000, 2) if mid else None,
+            "bid_depth_10bps_usd": round(depth["bid_notional"], 0),
+            "ask_depth_10bps_usd": round(depth["ask_notional"], 0),
+            "estimated_slippage_bps": round(fill["slippage_bps"], 2)
+        }
+
+class OrderBookSync:
+    """
+    Keeps an OrderBook in sync with Binance's diff-depth stream
+    Events are buffered while the snapshot loads, replayed from the snapshot's
+    lastUpdateId, and any gap triggers a fresh snapshot
+    """
+
+    def __init__(self, book: OrderBook, snapshot_limit: int = 1000, stream_speed: str = "100ms"):
+        self.book = book
+        self.snapshot_limit = snapshot_limit
+        self.stream_url = f"{BINANCE_WS}/{book.symbol.lower()}@depth@{stream_speed}"
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._snapshot: Optional[asyncio.Task] = None
+        self._pending: List[Dict] = []
+
+    async def _fetch_snapshot(self) -> Dict:
+        params = {"symbol": self.book.symbol, "limit": self.snapshot_limit}
+        response = await binance_get(self._client, "/api/v3/depth", params, priority=Priority.NORMAL)
+        response.raise_for_status()
+        return response.json()
+
+    def _request_snapshot(self):
+        self.book.synced = False
+        self._pending = []
+        self._snapshot = asyncio.create_task(self._fetch_snapshot())
+
+    def on_event(self, event: Dict):
+        """Apply one diff-depth event, buffering while a snapshot loads and resyncing on a gap"""
+        if self._snapshot is not None:
+            self._pending.append(event)
+            if not self._snapshot.done():
+                return
+            snapshot, self._snapshot = self._snapshot, None
+            pending, self._pending = self._pending, []
+            # Raises if the snapshot request failed; the stream loop reconnects
+            if self.book.resync(snapshot.result(), pending):
+                return
+        elif self.book.apply_diff(event):
+            return
+
+        # Missed events: rebuild from a new snapshot
+        self.book.resyncs += 1
+        logger.warning("Order book gap for %s, resyncing", self.book.symbol)
+        self._request_snapshot()
+
+    async def _run(self):
+        import websockets
+
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            self._client = client
+            while True:
+                try:
+                    async with websockets.connect(self.stream_url) as stream:
+                        self._request_snapshot()
+                        async for raw in stream:
+                            self.on_event(json.loads(raw))
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.book.synced = False
+                    logger.error("Order book stream error for %s: %s", self.book.symbol, e)
+                    await asyncio.sleep(5)
+                finally:
+                    if self._snapshot is not None:
+                        self._snapshot.cancel()
+                        self._snapshot = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Live books by symbol; engines use a book only while it is synced
+order_books: Dict[str, OrderBook] = {}
+
+def start_order_book(symbol: str = "BTCUSDT") -> OrderBookSync:
+    """Create, register and start syncing the book for a symbol"""
+    book = order_books.setdefault(symbol, OrderBook(symbol))
+    sync = OrderBookSync(book)
+    sync.start()
+    return sync
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS = "wss://stream.binance.com:9443/ws"
+
+# Rolling windows in seconds
+DEFAULT_WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+
+class RollingWindow:
+    """
+    Time window of trades kept as one-second buckets
+    Running sums make every update and read O(1); memory is at most one bucket per second
+    """
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        # [second, price*qty, qty, buy qty, sell qty]
+        self.buckets = deque()
+        self.pv = 0.0
+        self.volume = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+
+    def add(self, second: int, price: float, quantity: float, is_buy: bool):
+        if self.buckets and self.buckets[-1][0] == second:
+            bucket = self.buckets[-1]
+        else:
+            bucket = [second, 0.0, 0.0, 0.0, 0.0]
+            self.buckets.append(bucket)
+
+        pv = price * quantity
+        bucket[1] += pv
+        bucket[2] += quantity
+        self.pv += pv
+        self.volume += quantity
+        if is_buy:
+            bucket[3] += quantity
+            self.buy_volume += quantity
+        else:
+            bucket[4] += quantity
+            self.sell_volume += quantity
+
+        self.expire(second)
+
+    def expire(self, now_second: int):
+        cutoff = now_second - self.seconds
+        while self.buckets and self.buckets[0][0] <= cutoff:
+            _, pv, quantity, buy, sell = self.buckets.popleft()
+            self.pv -= pv
+            self.volume -= quantity
+            self.buy_volume -= buy
+            self.sell_volume -= sell
+
+    def vwap(self) -> Optional[float]:
+        return self.pv / self.volume if self.volume > 1e-12 else None
+
+    def imbalance(self) -> float:
+        """(buy - sell) / (buy + sell), between -1 and 1"""
+        total = self.buy_volume + self.sell_volume
+        return (self.buy_volume - self.sell_volume) / total if total > 1e-12 else 0.0
+
+class OrderFlowAggregator:
+    """
+    Streaming order-flow statistics from aggregate trades
+    Cumulative volume delta, session-anchored (UTC day) VWAP and rolling
+    VWAP / buy-sell imbalance per window, each trade costing O(1)
+    """
+
+    def __init__(self, symbol: str = "BTCUSDT", windows: Optional[Dict[str, int]] = None):
+        self.symbol = symbol
+        self.windows = {name: RollingWindow(seconds) for name, seconds in (windows or DEFAULT_WINDOWS).items()}
+        self.cvd = 0.0
+        self.session_day = None
+        self.session_pv = 0.0
+        self.session_volume = 0.0
+        self.last_price: Optional[float] = None
+        self.last_trade_time = 0
+        self.trades = 0
+
+    def on_trade(self, price: float, quantity: float, trade_time_ms: int, buyer_is_maker: bool):
+        """Fold one trade in; buyer_is_maker means the aggressor sold"""
+        is_buy = not buyer_is_maker
+        second = trade_time_ms // 1000
+
+        self.cvd += quantity if is_buy else -quantity
+
+        day = second // 86400
+        if day != self.session_day:
+            self.session_day = day
+            self.session_pv = 0.0
+            self.session_volume = 0.0
+        self.session_pv += price * quantity
+        self.session_volume += quantity
+
+        for window in self.windows.values():
+            window.add(second, price, quantity, is_buy)
+
+        self.last_price = price
+        self.last_trade_time = trade_time_ms
+        self.trades += 1
+
+    def on_agg_trade(self, event: Dict):
+        """Binance aggTrade payload"""
+        self.on_trade(float(event["p"]), float(event["q"]), event["T"], event["m"])
+
+    def expire(self, now_ms: Optional[int] = None):
+        """Drop window buckets older than their window as of now, not just as of the last trade"""
+        second = int(time.time() if now_ms is None else now_ms / 1000)
+        for window in self.windows.values():
+            window.expire(second)
+
+    def session_vwap(self, now_ms: Optional[int] = None) -> Optional[float]:
+        """VWAP since the start of the UTC day, or None before the day's first trade"""
+        day = int(time.time() if now_ms is None else now_ms / 1000) // 86400
+        if day != self.session_day or self.session_volume <= 1e-12:
+            return None
+        return self.session_pv / self.session_volume
+
+    def imbalance(self, window: str = "5m", now_ms: Optional[int] = None) -> float:
+        if window not in self.windows:
+            return 0.0
+        self.expire(now_ms)
+        return self.windows[window].imbalance()
+
+    def is_live(self, now_ms: int, max_silence_ms: int = 10000) -> bool:
+        """True when trades have arrived recently enough to trust the figures"""
+        return self.trades > 0 and now_ms - self.last_trade_time <= max_silence_ms
+
+    def snapshot(self, now_ms: Optional[int] = None) -> Dict:
+        """Current figures for signal context and the /api/bitcoin/order-flow endpoint"""
+        self.expire(now_ms)
+        session_vwap = self.session_vwap(now_ms)
+        return {
+            "symbol": self.symbol,
+            "last_price": self.last_price,
+            "cvd": round(self.cvd, 4),
+            "session_vwap": round(session_vwap, 2) if session_vwap else None,
+            "windows": {
+                name: {
+                    "vwap": round(window.vwap(), 2) if window.vwap() else None,
+                    "volume": round(window.volume, 4),
+                    "buy_volume": round(window.buy_volume, 4),
+                    "sell_volume": round(window.sell_volume, 4),
+                    "imbalance": round(window.imbalance(), 3)
+                }
+                for name, window in self.windows.items()
+            },
+            "trades": self.trades
+        }
+
+class OrderFlowStream:
+    """Feeds an OrderFlowAggregator from Binance's aggTrade stream"""
+
+    def __init__(self, aggregator: OrderFlowAggregator):
+        self.aggregator = aggregator
+        self.stream_url = f"{BINANCE_WS}/{aggregator.symbol.lower()}@aggTrade"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.stream_url) as stream:
+                    async for raw in stream:
+                        self.aggregator.on_agg_trade(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Order flow stream error for %s: %s", self.aggregator.symbol, e)
+                await asyncio.sleep(5)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Live aggregators by symbol
+order_flows: Dict[str, OrderFlowAggregator] = {}
+
+def start_order_flow(symbol: str = "BTCUSDT") -> OrderFlowStream:
+    """Create, register and start the aggregator for a symbol"""
+    aggregator = order_flows.setdefault(symbol, OrderFlowAggregator(symbol))
+    stream = OrderFlowStream(aggregator)
+    stream.start()
+    return stream
+
+def live_order_flow(symbol: str = "BTCUSDT") -> Optional[OrderFlowAggregator]:
+    """The symbol's aggregator if it is receiving trades, else None"""
+    aggregator = order_flows.get(symbol)
+    if aggregator is None or not aggregator.is_live(int(time.time() * 1000)):
+        return None
+    return aggregator
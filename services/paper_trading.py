@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+
+import asyncio
+import heapq
+import json
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS = "wss://stream.binance.com:9443/ws"
+
+@dataclass
+class PaperOrder:
+    """One simulated resting order"""
+    order_id: int
+    position_id: int
+    symbol: str
+    side: str  # BUY or SELL
+    kind: str  # entry, stop, take_profit
+    price: float
+    quantity: float
+    status: str = "open"  # open, filled, cancelled
+    fill_price: Optional[float] = None
+    fill_ts: Optional[float] = None
+
+    @property
+    def falling(self) -> bool:
+        """True when the order triggers as price falls to its level, False when it rises to it"""
+        # Buy limits/take-profits and sell stops sit below the market
+        return (self.side == "BUY") != (self.kind == "stop")
+
+@dataclass
+class PaperPosition:
+    """A signal being traded: entry order, then an OCO bracket of one stop and weighted take-profits"""
+    position_id: int
+    symbol: str
+    action: str
+    timeframe: str
+    entry_price: float
+    stop_loss: float
+    take_profit: List[Dict]
+    quantity: float
+    submitted_ts: float
+    expires_ts: Optional[float] = None
+    status: str = "pending"  # pending, open, closed, expired
+    entry_order: Optional[int] = None
+    stop_order: Optional[int] = None
+    tp_orders: List[int] = field(default_factory=list)
+    filled_quantity: float = 0.0
+    remaining: float = 0.0
+    fill_price: Optional[float] = None
+    exits: List[Tuple[str, float, float]] = field(default_factory=list)  # (kind, price, quantity)
+    realized_pnl: float = 0.0
+    closed_ts: Optional[float] = None
+
+class TriggerLevels:
+    """
+    Resting orders on one trigger direction, keyed by price level
+    The level closest to the market is at the end of the sorted key list, so a
+    tick pops triggered levels off the end until it reaches one it does not cross
+    """
+
+    def __init__(self, falling: bool):
+        self.falling = falling
+        # Falling side: ascending prices (highest triggers first)
+        # Rising side: ascending negated prices (lowest triggers first)
+        self.keys: List[float] = []
+        self.orders: Dict[float, Deque[int]] = {}
+
+    def _key(self, price: float) -> float:
+        return price if self.falling else -price
+
+    def add(self, price: float, order_id: int):
+        key = self._key(price)
+        queue = self.orders.get(key)
+        if queue is None:
+            queue = self.orders[key] = deque()
+            insort(self.keys, key)
+        queue.append(order_id)
+
+    def discard(self, price: float, order_id: int):
+        """Remove a cancelled order, dropping its level once empty"""
+        key = self._key(price)
+        queue = self.orders.get(key)
+        if queue is None or order_id not in queue:
+            return
+        queue.remove(order_id)
+        if not queue:
+            del self.orders[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def pop_triggered(self, price: float) -> List[int]:
+        """Order ids whose level the price has reached, nearest level first, FIFO within a level"""
+        bound = self._key(price)
+        triggered: List[int] = []
+        while self.keys and self.keys[-1] >= bound:
+            triggered.extend(self.orders.pop(self.keys.pop()))
+        return triggered
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+class PaperTradingEngine:
+    """
+    In-memory matching simulator for precision signals
+    Entries rest as limit orders at entry_price; once filled, a stop and one
+    take-profit per ladder step (quantity by weight) form an OCO bracket: the
+    stop cancels every take-profit, and each take-profit shrinks the stop to
+    what is still open. Orders trigger from sorted price levels per symbol, so
+    a tick only touches the orders it crosses. Everything is driven by tick
+    timestamps and sequential ids, so replaying the same ticks gives the same fills.
+    Finished positions leave the live maps for a bounded `history` of recent trades
+    """
+
+    def __init__(self, stop_slippage_bps: float = 2.0, fee_bps: float = 4.0,
+                 on_close: Optional[Callable[[PaperPosition], None]] = None, history: int = 1000):
+        self.stop_slippage_bps = stop_slippage_bps
+        self.fee_bps = fee_bps
+        self.on_close = on_close
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        self.orders: Dict[int, PaperOrder] = {}
+        self.positions: Dict[int, PaperPosition] = {}
+        # Most recent finished positions; totals below cover every one ever closed
+        self.finished: Deque[PaperPosition] = deque(maxlen=self.history)
+        self.totals = {"closed_trades": 0, "wins": 0, "realized_pnl": 0.0}
+        self.levels: Dict[str, Tuple[TriggerLevels, TriggerLevels]] = {}
+        self.next_order_id = 1
+        self.next_position_id = 1
+        self.last_price: Dict[str, float] = {}
+        self.last_ts = 0.0
+        # (expires_ts, position_id) of entries still waiting for a fill
+        self._expiries: List[Tuple[float, int]] = []
+        self._matching = False
+        # Orders placed while a tick is being matched become active on the next tick
+        self._deferred: List[int] = []
+        self.stats = {"ticks": 0, "orders": 0, "fills": 0, "cancelled": 0,
+                      "entries_submitted": 0, "entries_filled": 0, "entries_expired": 0}
+        # kind -> [sum of fill slippage in bps, fills]; running totals so a long session stays bounded
+        self.slippage_bps: Dict[str, List[float]] = {"entry": [0.0, 0], "stop": [0.0, 0], "take_profit": [0.0, 0]}
+
+    # -- orders ---------------------------------------------------------------
+
+    def _place(self, position: PaperPosition, side: str, kind: str, price: float, quantity: float,
+               defer: bool = False) -> int:
+        order = PaperOrder(order_id=self.next_order_id, position_id=position.position_id,
+                           symbol=position.symbol, side=side, kind=kind, price=price, quantity=quantity)
+        self.next_order_id += 1
+        self.orders[order.order_id] = order
+        self.stats["orders"] += 1
+        if defer:
+            self._deferred.append(order.order_id)
+        else:
+            self._rest(order)
+        return order.order_id
+
+    def _rest(self, order: PaperOrder):
+        falling, rising = self.levels.setdefault(order.symbol, (TriggerLevels(True), TriggerLevels(False)))
+        (falling if order.falling else rising).add(order.price, order.order_id)
+
+    def _cancel(self, order_id: Optional[int]):
+        order = self.orders.get(order_id)
+        if order is not None and order.status == "open":
+            order.status = "cancelled"
+            self.stats["cancelled"] += 1
+            sides = self.levels.get(order.symbol)
+            if sides is not None:
+                # Deferred orders are not resting yet and are skipped when the next tick rests them
+                sides[0 if order.falling else 1].discard(order.price, order.order_id)
+
+    def _retire(self, position: PaperPosition):
+        """Move a finished position and its orders out of the live maps"""
+        self.positions.pop(position.position_id, None)
+        for order_id in [position.entry_order, position.stop_order] + position.tp_orders:
+            self.orders.pop(order_id, None)
+        self.finished.append(position)
+        if position.status == "closed":
+            self.totals["closed_trades"] += 1
+            self.totals["wins"] += position.realized_pnl > 0
+            self.totals["realized_pnl"] += position.realized_pnl
+
+    def submit_signal(self, signal: Dict, notional: float, symbol: str = "BTCUSDT",
+                      timestamp: Optional[float] = None) -> Optional[PaperPosition]:
+        """Rest a limit entry for a BUY/SELL signal; HOLD and level-less signals are ignored"""
+        if signal.get("action") not in ("BUY", "SELL") or not signal.get("entry_price") or notional <= 0:
+            return None
+        submitted = timestamp if timestamp is not None else _signal_ts(signal.get("timestamp"))
+        position = PaperPosition(
+            position_id=self.next_position_id,
+            symbol=symbol,
+            action=signal["action"],
+            timeframe=signal.get("timeframe", ""),
+            entry_price=float(signal["entry_price"]),
+            stop_loss=float(signal["stop_loss"]),
+            take_profit=[{"level": float(tp["level"]), "weight": float(tp["weight"])} for tp in signal.get("take_profit") or []],
+            quantity=notional / float(signal["entry_price"]),
+            submitted_ts=submitted,
+            expires_ts=_signal_ts(signal["expiration"]) if signal.get("expiration") else None
+        )
+        self.next_position_id += 1
+        self.positions[position.position_id] = position
+        position.entry_order = self._place(position, position.action, "entry", position.entry_price,
+                                           position.quantity, defer=self._matching)
+        self.stats["entries_submitted"] += 1
+        if position.expires_ts is not None:
+            heapq.heappush(self._expiries, (position.expires_ts, position.position_id))
+        return position
+
+    def cancel_position(self, position_id: int, reason: str = "cancelled"):
+        position = self.positions.get(position_id)
+        if position is None or position.status in ("closed", "expired"):
+            return
+        for order_id in [position.entry_order, position.stop_order] + position.tp_orders:
+            self._cancel(order_id)
+        if position.status == "pending":
+            position.status = reason
+            self._retire(position)
+        elif position.remaining > 0:
+            # Flatten what is left at the last price
+            self._exit(position, "cancel", self.last_price.get(position.symbol, position.entry_price),
+                       position.remaining, self.last_ts)
+
+    # -- matching -------------------------------------------------------------
+
+    def on_tick(self, symbol: str, price: float, timestamp: float) -> int:
+        """Match one trade/mark price; returns the number of fills"""
+        self.stats["ticks"] += 1
+        self.last_price[symbol] = price
+        self.last_ts = timestamp
+        for order_id in self._deferred:
+            order = self.orders.get(order_id)
+            if order is not None and order.status == "open":
+                self._rest(order)
+        self._deferred = []
+
+        sides = self.levels.get(symbol)
+        if sides is None:
+            return 0
+        self._matching = True
+        fills = 0
+        try:
+            # At most one side can cross for a single price; falling first keeps the order fixed
+            for side in sides:
+                for order_id in side.pop_triggered(price):
+                    # A fill earlier in this tick may have closed (and retired) the order's position
+                    order = self.orders.get(order_id)
+                    if order is None or order.status != "open":
+                        continue
+                    self._fill(order, price, timestamp)
+                    fills += 1
+        finally:
+            self._matching = False
+        self._expire(timestamp)
+        return fills
+
+    def _fill(self, order: PaperOrder, price: float, timestamp: float):
+        if order.kind == "stop":
+            # Stops become market orders: the crossing price plus a slippage allowance
+            slip = price * self.stop_slippage_bps / 10000
+            fill_price = price + slip if order.side == "BUY" else price - slip
+        else:
+            # Limits fill at their level, or better when the tick gapped through it
+            fill_price = min(order.price, price) if order.side == "BUY" else max(order.price, price)
+
+        order.status = "filled"
+        order.fill_price = fill_price
+        order.fill_ts = timestamp
+        self.stats["fills"] += 1
+        signed = 1 if order.side == "BUY" else -1
+        slippage = self.slippage_bps[order.kind]
+        slippage[0] += signed * (fill_price - order.price) / order.price * 10000
+        slippage[1] += 1
+
+        position = self.positions[order.position_id]
+        if order.kind == "entry":
+            self._open(position, order, timestamp)
+        else:
+            self._exit(position, order.kind, fill_price, order.quantity, timestamp)
+
+    def _open(self, position: PaperPosition, order: PaperOrder, timestamp: float):
+        position.status = "open"
+        position.fill_price = order.fill_price
+        position.filled_quantity = position.remaining = order.quantity
+        self.stats["entries_filled"] += 1
+
+        exit_side = "SELL" if position.action == "BUY" else "BUY"
+        position.stop_order = self._place(position, exit_side, "stop", position.stop_loss,
+                                          position.remaining, defer=True)
+        total_weight = sum(tp["weight"] for tp in position.take_profit) or 1.0
+        allocated = 0.0
+        for i, tp in enumerate(position.take_profit):
+            last = i == len(position.take_profit) - 1
+            # The last step takes the rounding remainder so the ladder sums to the position
+            quantity = position.remaining - allocated if last else position.remaining * tp["weight"] / total_weight
+            allocated += quantity
+            position.tp_orders.append(self._place(position, exit_side, "take_profit", tp["level"], quantity, defer=True))
+
+    def _exit(self, position: PaperPosition, kind: str, price: float, quantity: float, timestamp: float):
+        quantity = min(quantity, position.remaining)
+        direction = 1 if position.action == "BUY" else -1
+        fees = (position.fill_price + price) * quantity * self.fee_bps / 10000
+        position.realized_pnl += direction * (price - position.fill_price) * quantity - fees
+        position.remaining -= quantity
+        position.exits.append((kind, price, quantity))
+
+        if kind == "take_profit" and position.remaining > 1e-12:
+            # Partial exit: the stop now only protects what is left
+            self.orders[position.stop_order].quantity = position.remaining
+            return
+
+        # Stop, last take-profit or manual cancel: the bracket is done
+        for order_id in [position.stop_order] + position.tp_orders:
+            self._cancel(order_id)
+        position.remaining = 0.0
+        position.status = "closed"
+        position.closed_ts = timestamp
+        self._retire(position)
+        if self.on_close is not None:
+            try:
+                self.on_close(position)
+            except Exception as e:
+                logger.error("Error in paper trade close callback: %s", e)
+
+    def _expire(self, timestamp: float):
+        """Cancel unfilled entries whose signal has expired"""
+        while self._expiries and self._expiries[0][0] <= timestamp:
+            _, position_id = heapq.heappop(self._expiries)
+            position = self.positions.get(position_id)
+            if position is not None and position.status == "pending":
+                self._cancel(position.entry_order)
+                position.status = "expired"
+                self.stats["entries_expired"] += 1
+                self._retire(position)
+
+    # -- driving --------------------------------------------------------------
+
+    def replay(self, ticks: Iterable[Tuple[str, float, float]],
+               signals: Iterable[Tuple[float, Dict, float]] = (), symbol: str = "BTCUSDT") -> Dict:
+        """
+        Run recorded ticks (symbol, price, timestamp) and timestamped signals
+        (timestamp, signal, notional) from a clean state; signals are submitted
+        before the first tick at or after their timestamp
+        """
+        self.reset()
+        pending = deque(sorted(signals, key=lambda item: item[0]))
+        for tick_symbol, price, timestamp in ticks:
+            while pending and pending[0][0] <= timestamp:
+                submitted_ts, signal, notional = pending.popleft()
+                self.submit_signal(signal, notional, symbol, submitted_ts)
+            self.on_tick(tick_symbol, price, timestamp)
+        return self.get_stats()
+
+    def get_stats(self) -> Dict:
+        closed = self.totals["closed_trades"]
+        submitted = self.stats["entries_submitted"]
+
+        def average(total: float, count: int) -> Optional[float]:
+            return round(total / count, 2) if count else None
+
+        return {
+            **self.stats,
+            "fill_rate": round(self.stats["entries_filled"] / submitted, 3) if submitted else 0.0,
+            "open_positions": sum(1 for p in self.positions.values() if p.status == "open"),
+            "pending_entries": sum(1 for p in self.positions.values() if p.status == "pending"),
+            "closed_trades": closed,
+            "win_rate": round(self.totals["wins"] / closed * 100, 1) if closed else 0.0,
+            "realized_pnl": round(self.totals["realized_pnl"], 2),
+            # Positive = worse than the order's level
+            "avg_slippage_bps": {kind: average(*totals) for kind, totals in self.slippage_bps.items()}
+        }
+
+def _signal_ts(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value or 0.0)
+
+class TradeStream:
+    """Feeds Binance aggregate trades for one symbol into a PaperTradingEngine"""
+
+    def __init__(self, engine: PaperTradingEngine, symbol: str = "BTCUSDT"):
+        self.engine = engine
+        self.symbol = symbol
+        self.stream_url = f"{BINANCE_WS}/{symbol.lower()}@aggTrade"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.stream_url) as stream:
+                    async for raw in stream:
+                        trade = json.loads(raw)
+                        self.engine.on_tick(self.symbol, float(trade["p"]), trade["T"] / 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Paper trading stream error for %s: %s", self.symbol, e)
+                await asyncio.sleep(5)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Shared simulator fed by the live trade stream
+paper_trader = PaperTradingEngine()
+
+# One trade stream per (engine, symbol), however many publishers start it
+_streams: Dict[Tuple[int, str], TradeStream] = {}
+
+def start_paper_trading(symbol: str = "BTCUSDT", engine: PaperTradingEngine = paper_trader) -> TradeStream:
+    stream = _streams.get((id(engine), symbol))
+    if stream is None:
+        stream = _streams[(id(engine), symbol)] = TradeStream(engine, symbol)
+    stream.start()
+    return stream
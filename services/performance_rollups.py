@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "performance_rollups"
+STAGING_COLLECTION = "performance_rollups_rebuild"
+
+# Dimensions the dashboards break performance down by
+SIGNAL_DIMENSIONS = ["timeframe", "action", "prediction_method"]
+TRAINING_DIMENSIONS = ["timeframe", "outcome"]
+
+RESULT_COUNTERS = {
+    "Win": "wins",
+    "Loss": "losses",
+    "Pending": "pending",
+    "Expired": "expired"
+}
+
+class PerformanceRollups:
+    """
+    Materialized performance statistics
+    Keeps small counter documents up to date with $inc as signals and outcomes
+    are written, so the stats endpoints never scan trading_signals.
+    A writer holds `lock` across its collection write and the matching record_*
+    call; rebuild() holds it for its whole run, so every write is counted once
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[ROLLUP_COLLECTION]
+        self.lock = asyncio.Lock()
+
+    def _signal_keys(self, signal: Dict) -> List[str]:
+        """Rollup document ids a signal contributes to"""
+        keys = ["signals:all"]
+        for dimension in SIGNAL_DIMENSIONS:
+            value = signal.get(dimension)
+            if value:
+                keys.append(f"signals:{dimension}:{value}")
+
+        timestamp = signal.get("timestamp")
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if isinstance(timestamp, datetime):
+            keys.append(f"signals:day:{timestamp.strftime('%Y-%m-%d')}")
+        return keys
+
+    def _training_keys(self, sample: Dict) -> List[str]:
+        """Rollup document ids a training sample contributes to"""
+        keys = ["training:all"]
+        for dimension in TRAINING_DIMENSIONS:
+            value = sample.get(dimension)
+            if value:
+                keys.append(f"training:{dimension}:{value}")
+        return keys
+
+    async def _apply(self, keys: List[str], increments: Dict) -> None:
+        """Apply the same increments to every rollup document in one round trip"""
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({"_id": key}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True)
+            for key in keys
+        ]
+        await self.collection.bulk_write(operations, ordered=False)
+
+    async def record_signal(self, signal: Dict) -> None:
+        """Count a newly stored signal (counted as pending until it resolves)"""
+        try:
+            result = signal.get("result", "Pending")
+            increments = {"total": 1, RESULT_COUNTERS.get(result, "pending"): 1}
+            await self._apply(self._signal_keys(signal), increments)
+        except Exception as e:
+            logger.error("Error updating signal rollups: %s", e)
+
+    def _outcome_increments(self, result: str, profit_loss_usd: float, previous_result: str,
+                            previous_profit_loss_usd: float = 0.0) -> Dict:
+        """Counter changes for a result change, reversing the P&L the previous result booked"""
+        increments = {
+            RESULT_COUNTERS.get(previous_result, "pending"): -1,
+            RESULT_COUNTERS.get(result, "pending"): 1,
+            "profit_loss_usd": profit_loss_usd - previous_profit_loss_usd
+        }
+        gross_profit = max(profit_loss_usd, 0.0) - max(previous_profit_loss_usd, 0.0)
+        gross_loss = max(-profit_loss_usd, 0.0) - max(-previous_profit_loss_usd, 0.0)
+        if gross_profit:
+            increments["gross_profit"] = gross_profit
+        if gross_loss:
+            increments["gross_loss"] = gross_loss
+        return increments
+
+    async def record_outcome(self, signal: Dict, result: str, profit_loss_usd: float = 0.0,
+                             previous_result: str = "Pending") -> None:
+        """Move a signal from its previous result to its final result and book its P&L"""
+        try:
+            if result == previous_result:
+                return
+            increments = self._outcome_increments(result, profit_loss_usd, previous_result)
+            await self._apply(self._signal_keys(signal), increments)
+        except Exception as e:
+            logger.error("Error updating outcome rollups: %s", e)
+
+    def journal_change(self, seq: int, signal: Dict, result: Optional[str] = None, profit_loss_usd: float = 0.0,
+                       previous_result: str = "Pending",
+                       previous_profit_loss_usd: float = 0.0) -> Optional[Tuple[int, List[str], Dict]]:
+        """The rollup change for one journal record: a new signal, or its move to `result`"""
+        if result is None:
+            increments = {"total": 1, RESULT_COUNTERS.get(signal.get("result", "Pending"), "pending"): 1}
+        elif result == previous_result and profit_loss_usd == previous_profit_loss_usd:
+            return None
+        else:
+            increments = self._outcome_increments(result, profit_loss_usd, previous_result,
+                                                  previous_profit_loss_usd)
+        return seq, self._signal_keys(signal), increments
+
+    async def record_journal(self, changes: Sequence[Tuple[int, List[str], Dict]]) -> None:
+        """
+        Fold changes from the signal journal in exactly once
+        Each rollup document remembers the last journal seq it absorbed, so a batch
+        replayed after a crash only adds the changes past that mark. Raises, so the
+        caller retries the batch
+        """
+        keys = sorted({key for _, change_keys, _ in changes for key in change_keys})
+        if not keys:
+            return
+        marks = {doc["_id"]: doc.get("journal_seq")
+                 async for doc in self.collection.find({"_id": {"$in": keys}})}
+
+        folded: Dict[str, Dict] = {}
+        last_seq: Dict[str, int] = {}
+        for seq, change_keys, increments in changes:
+            for key in change_keys:
+                if seq <= (marks.get(key) or 0):
+                    continue
+                target = folded.setdefault(key, {})
+                for field, value in increments.items():
+                    target[field] = target.get(field, 0) + value
+                last_seq[key] = seq
+
+        now = datetime.utcnow()
+        # Conditional on the mark read above, so a document is advanced at most once per seq
+        operations = [
+            UpdateOne({"_id": key, "journal_seq": marks.get(key)},
+                      {"$inc": increments, "$set": {"journal_seq": last_seq[key], "updated_at": now}}, upsert=True)
+            for key, increments in folded.items()
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def record_training_sample(self, sample: Dict) -> None:
+        """Count a new ai_training_data document"""
+        try:
+            await self._apply(self._training_keys(sample), {"total": 1})
+        except Exception as e:
+            logger.error("Error updating training rollups: %s", e)
+
+    async def get_performance_stats(self, days: int = 30) -> Dict:
+        """Read performance stats for /api/database/performance/stats"""
+        try:
+            # Summary and breakdown documents: a fixed handful whatever the history size
+            summary_query = {"$or": [{"_id": "signals:all"}] + [
+                {"_id": {"$regex": f"^signals:{dimension}:"}} for dimension in SIGNAL_DIMENSIONS
+            ]}
+            docs = {}
+            async for doc in self.collection.find(summary_query):
+                docs[doc["_id"]] = doc
+
+            overall = self._summarize(docs.get("signals:all", {}))
+            breakdown = {dimension: {} for dimension in SIGNAL_DIMENSIONS}
+            for key, doc in docs.items():
+                _, dimension, *value = key.split(":", 2)
+                if dimension in breakdown and value:
+                    breakdown[dimension][value[0]] = self._summarize(doc)
+
+            # Day ids sort by date (YYYY-MM-DD), so the newest `days` are an _id index range
+            # (";" is the character after ":", closing the "signals:day:" prefix)
+            daily = []
+            cursor = self.collection.find({"_id": {"$gt": "signals:day:", "$lt": "signals:day;"}})
+            async for doc in cursor.sort("_id", -1).limit(days):
+                daily.append({"date": doc["_id"].split(":", 2)[2], **self._summarize(doc)})
+
+            return {
+                "overall": overall,
+                "by_timeframe": breakdown["timeframe"],
+                "by_action": breakdown["action"],
+                "by_prediction_method": breakdown["prediction_method"],
+                "daily": daily,
+                "timestamp": datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            logger.error("Error reading performance rollups: %s", e)
+            return {"overall": self._summarize({}), "by_timeframe": {}, "by_action": {},
+                    "by_prediction_method": {}, "daily": [], "timestamp": datetime.now().isoformat()}
+
+    async def get_training_stats(self) -> Dict:
+        """Read training data stats for /api/database/ai/training-stats"""
+        try:
+            stats = {"total_samples": 0, "by_timeframe": {}, "by_outcome": {}}
+            async for doc in self.collection.find({"_id": {"$regex": "^training:"}}):
+                _, dimension, *value = doc["_id"].split(":", 2)
+                if dimension == "all":
+                    stats["total_samples"] = doc.get("total", 0)
+                elif value:
+                    stats[f"by_{dimension}"][value[0]] = doc.get("total", 0)
+
+            stats["timestamp"] = datetime.now().isoformat()
+            return stats
+
+        except Exception as e:
+            logger.error("Error reading training rollups: %s", e)
+            return {"total_samples": 0, "by_timeframe": {}, "by_outcome": {},
+                    "timestamp": datetime.now().isoformat()}
+
+    def _summarize(self, doc: Dict) -> Dict:
+        """Derive win rate and P&L figures from raw counters"""
+        wins = doc.get("wins", 0)
+        losses = doc.get("losses", 0)
+        decided = wins + losses
+        gross_loss = doc.get("gross_loss", 0.0)
+
+        return {
+            "total_signals": doc.get("total", 0),
+            "wins": wins,
+            "losses": losses,
+            "pending": doc.get("pending", 0),
+            "expired": doc.get("expired", 0),
+            "win_rate": round(wins / decided * 100, 1) if decided else 0,
+            "total_profit_loss": round(doc.get("profit_loss_usd", 0.0), 2),
+            "profit_factor": round(doc.get("gross_profit", 0.0) / gross_loss, 2) if gross_loss else 0
+        }
+
+    async def rebuild(self) -> int:
+        """Recompute every rollup from scratch (one-off backfill or repair)"""
+        # Writers wait until the swap is done, so none lands between the aggregation and the rename
+        async with self.lock:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> int:
+        try:
+            rollups: Dict[str, Dict] = {}
+
+            def add(key: str, counters: Dict):
+                target = rollups.setdefault(key, {})
+                for field, value in counters.items():
+                    target[field] = target.get(field, 0) + value
+
+            pipeline = [{
+                "$group": {
+                    "_id": {
+                        "timeframe": "$timeframe",
+                        "action": "$action",
+                        "prediction_method": "$prediction_method",
+                        "result": "$result",
+                        "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                    },
+                    "count": {"$sum": 1},
+                    "profit_loss_usd": {"$sum": {"$ifNull": ["$profit_loss_usd", 0]}},
+                    "gross_profit": {"$sum": {"$max": [{"$ifNull": ["$profit_loss_usd", 0]}, 0]}},
+                    "gross_loss": {"$sum": {"$max": [{"$multiply": [{"$ifNull": ["$profit_loss_usd", 0]}, -1]}, 0]}}
+                }
+            }]
+            async for group in self.db.trading_signals.aggregate(pipeline):
+                key = group["_id"]
+                counters = {
+                    "total": group["count"],
+                    RESULT_COUNTERS.get(key.get("result") or "Pending", "pending"): group["count"],
+                    "profit_loss_usd": group["profit_loss_usd"],
+                    "gross_profit": group["gross_profit"],
+                    "gross_loss": group["gross_loss"]
+                }
+                add("signals:all", counters)
+                for dimension in SIGNAL_DIMENSIONS:
+                    if key.get(dimension):
+                        add(f"signals:{dimension}:{key[dimension]}", counters)
+                if key.get("day"):
+                    add(f"signals:day:{key['day']}", counters)
+
+            pipeline = [{"$group": {"_id": {"timeframe": "$timeframe", "outcome": "$outcome"}, "count": {"$sum": 1}}}]
+            async for group in self.db.ai_training_data.aggregate(pipeline):
+                for key in self._training_keys(group["_id"]):
+                    add(key, {"total": group["count"]})
+
+            # Build the new rollups beside the live ones and swap them in with a rename,
+            # so readers never see an empty collection
+            now = datetime.utcnow()
+            if not rollups:
+                await self.collection.delete_many({})
+                return 0
+            staging = self.db[STAGING_COLLECTION]
+            await staging.drop()
+            await staging.insert_many(
+                [{"_id": key, **counters, "updated_at": now} for key, counters in rollups.items()]
+            )
+            await staging.rename(ROLLUP_COLLECTION, dropTarget=True)
+
+            logger.info(f"📊 Rebuilt {len(rollups)} performance rollups")
+            return len(rollups)
+
+        except Exception as e:
+            logger.error("Error rebuilding performance rollups: %s", e)
+            return 0
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import logging
+
+from services.rate_limiter import Priority, binance_get
+from services.resampler import TIMEFRAME_MS
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+# Seeding retries start after this many seconds and double up to the cap
+SEED_RETRY_DELAY = 5.0
+SEED_RETRY_MAX_DELAY = 300.0
+
+# VaR/CVaR as a share of equity above which the portfolio is rated at each level
+RISK_LEVELS = [(0.01, "low"), (0.025, "medium"), (0.05, "high")]
+
+def _risk_level(share: float) -> str:
+    for limit, level in RISK_LEVELS:
+        if share <= limit:
+            return level
+    return "critical"
+
+@dataclass
+class Position:
+    """Open position or live signal counted towards portfolio exposure"""
+    position_id: str
+    symbol: str
+    action: str  # BUY or SELL
+    quantity: float  # base asset units
+    entry_price: float
+    timeframe: str = "15m"
+
+    @property
+    def direction(self) -> float:
+        return 1.0 if self.action == "BUY" else -1.0
+
+class PortfolioRiskEngine:
+    """
+    Portfolio exposure and historical-simulation VaR/CVaR across symbols
+    Keeps a rolling (window x symbols) matrix of bar returns and the P&L every
+    historical scenario would produce on today's exposures. Price ticks and
+    position changes patch that scenario vector one column at a time, and a
+    new bar replaces one row, so reads never re-run the full simulation.
+    Bars close on the wall clock, whether or not ticks arrive
+    """
+
+    def __init__(self, window: int = 500, bar_seconds: int = 3600, equity: float = 50000.0,
+                 capacity: int = 16):
+        self.window = window
+        self.bar_seconds = bar_seconds
+        self.equity = equity
+        self.capacity = capacity
+        self.symbols: Dict[str, int] = {}
+        self.rows = 0  # filled rows, up to window
+        self.next_row = 0
+        # Arrays are allocated on first use so importing this module does not load numpy
+        self.returns: Optional[np.ndarray] = None
+        self.positions: Dict[str, Position] = {}
+        self.current_bar: Optional[int] = None
+        self.first_bar: Optional[int] = None  # bar of the first live tick; older bars come from seeding
+        self._cached: Optional[Dict] = None
+        self._seeding: Optional[asyncio.Task] = None
+
+    def _allocate(self):
+        if self.returns is not None:
+            return
+        self.returns = np.zeros((self.window, self.capacity))
+        # Running column sums and cross-products of the return matrix, for the covariance
+        self.sum = np.zeros(self.capacity)
+        self.cross = np.zeros((self.capacity, self.capacity))
+        self.prices = np.zeros(self.capacity)
+        self.bar_close = np.zeros(self.capacity)
+        self.quantity = np.zeros(self.capacity)  # net signed base quantity per symbol
+        self.exposure = np.zeros(self.capacity)  # net signed USD exposure per symbol
+        self.scenario_pnl = np.zeros(self.window)
+
+    def _column(self, symbol: str) -> int:
+        self._allocate()
+        column = self.symbols.get(symbol)
+        if column is not None:
+            return column
+        column = len(self.symbols)
+        if column == self.returns.shape[1]:
+            grow = self.returns.shape[1]
+            self.returns = np.hstack([self.returns, np.zeros((self.window, grow))])
+            self.sum = np.concatenate([self.sum, np.zeros(grow)])
+            self.cross = np.pad(self.cross, ((0, grow), (0, grow)))
+            for name in ("prices", "bar_close", "quantity", "exposure"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(grow)]))
+        self.symbols[symbol] = column
+        return column
+
+    def seed_history(self, closes: Dict[str, np.ndarray], last_bar: Optional[int] = None):
+        """
+        Load recent bar closes per symbol (oldest first, same bars for every symbol, the last
+        one closing bar `last_bar`). Only bars older than the live ones are filled in, and
+        prices already marked live are kept
+        """
+        self._allocate()
+        length = min(len(series) for series in closes.values())
+        columns = [self._column(symbol) for symbol in closes]
+        live = self._chronological()
+        # Seeded bars the live rows already cover (the live history starts at first_bar)
+        overlap = 0
+        if last_bar is not None and self.first_bar is not None:
+            overlap = max(last_bar - self.first_bar + 1, 0)
+        adjacent = last_bar is None or self.first_bar is None or last_bar == self.first_bar - 1
+        history = np.zeros((max(length - 1 - overlap, 0), self.returns.shape[1]))
+        for symbol, column in zip(closes, columns):
+            series = np.asarray(closes[symbol], dtype=np.float64)[-length:]
+            history[:, column] = np.diff(np.log(series))[:len(history)]
+            if self.prices[column] == 0:
+                self.prices[column] = self.bar_close[column] = series[-1]
+            elif not len(live) and adjacent:
+                # The forming bar opened at the last seeded close, not at the first tick
+                self.bar_close[column] = series[-1]
+
+        combined = np.vstack([history, live])[-self.window:]
+        self.rows = len(combined)
+        self.next_row = self.rows % self.window
+        self.returns[:] = 0.0
+        self.returns[:self.rows] = combined
+        self._rebuild()
+
+    def _chronological(self) -> np.ndarray:
+        """Filled return rows, oldest first"""
+        if self.rows < self.window:
+            return self.returns[:self.rows].copy()
+        return np.roll(self.returns, -self.next_row, axis=0)
+
+    def _rebuild(self):
+        """Recompute running sums and scenario P&L from scratch (seeding and symbol changes only)"""
+        filled = self.returns[:self.rows] if self.rows < self.window else self.returns
+        self.sum = filled.sum(axis=0)
+        self.cross = filled.T @ filled
+        self.exposure = self.quantity * self.prices
+        self.scenario_pnl = np.zeros(self.window)
+        self.scenario_pnl[:len(filled)] = np.expm1(filled) @ self.exposure
+        self._cached = None
+
+    def _roll_bar(self):
+        """Close the current bar for every symbol: write one return row, replacing the oldest"""
+        active = self.bar_close > 0
+        row = np.zeros(self.returns.shape[1])
+        row[active] = np.log(self.prices[active] / self.bar_close[active])
+        old = self.returns[self.next_row]
+
+        self.sum += row - old
+        self.cross += np.outer(row, row) - np.outer(old, old)
+        self.returns[self.next_row] = row
+        self.scenario_pnl[self.next_row] = np.expm1(row) @ self.exposure
+
+        self.next_row = (self.next_row + 1) % self.window
+        self.rows = min(self.rows + 1, self.window)
+        self.bar_close[active] = self.prices[active]
+        self._cached = None
+
+    def _set_exposure(self, column: int):
+        """Patch every scenario's P&L for one symbol's new USD exposure: O(window)"""
+        new = self.quantity[column] * self.prices[column]
+        change = new - self.exposure[column]
+        if change:
+            self.scenario_pnl += np.expm1(self.returns[:, column]) * change
+            self.exposure[column] = new
+            self._cached = None
+
+    def advance(self, now: Optional[float] = None):
+        """Close every bar that ended by `now`; bars without ticks record a zero return"""
+        bar = int((now if now is not None else time.time()) // self.bar_seconds)
+        if self.current_bar is None:
+            self.current_bar = self.first_bar = bar
+            return
+        # Past a full window every row is replaced anyway
+        for _ in range(min(bar - self.current_bar, self.window)):
+            self._roll_bar()
+        self.current_bar = max(bar, self.current_bar)
+
+    def on_price(self, symbol: str, price: float, timestamp: Optional[float] = None):
+        """Mark a symbol to market, first closing any bars that ended since the last tick"""
+        column = self._column(symbol)
+        self.advance(timestamp)
+
+        if self.bar_close[column] == 0:
+            self.bar_close[column] = price
+        self.prices[column] = price
+        self._set_exposure(column)
+
+    def add_position(self, position: Position):
+        self.remove_position(position.position_id)
+        column = self._column(position.symbol)
+        if self.prices[column] == 0:
+            self.prices[column] = self.bar_close[column] = position.entry_price
+        self.positions[position.position_id] = position
+        self.quantity[column] += position.direction * position.quantity
+        self._set_exposure(column)
+
+    def remove_position(self, position_id: str):
+        position = self.positions.pop(position_id, None)
+        if position is None:
+            return
+        column = self.symbols[position.symbol]
+        self.quantity[column] -= position.direction * position.quantity
+        self._set_exposure(column)
+
+    async def seed_from_exchange(self, symbols: Sequence[str] = ("BTCUSDT",)) -> int:
+        """Seed the return history with the last `window` closed bars of each symbol; returns bars loaded"""
+        interval = next(tf for tf, ms in TIMEFRAME_MS.items() if ms == self.bar_seconds * 1000)
+        closes = {}
+        last_bar = None
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                for symbol in symbols:
+                    params = {"symbol": symbol, "interval": interval, "limit": min(self.window + 2, 1000)}
+                    response = await binance_get(client, "/api/v3/klines", params, priority=Priority.BACKFILL)
+                    response.raise_for_status()
+                    # The last kline is the bar still forming; it is rolled live
+                    klines = response.json()[:-1]
+                    closes[symbol] = np.array([float(k[4]) for k in klines])
+                    last_bar = int(klines[-1][0]) // (self.bar_seconds * 1000)
+            self.seed_history(closes, last_bar)
+            logger.info(f"📊 Portfolio risk seeded with {self.rows} {interval} bars for {len(closes)} symbols")
+            return self.rows
+        except Exception as e:
+            logger.error("Error seeding portfolio risk history: %s", e)
+            return 0
+
+    async def _seed_until_loaded(self, symbols: Sequence[str]):
+        delay = SEED_RETRY_DELAY
+        while not await self.seed_from_exchange(symbols):
+            logger.warning("Portfolio risk seeding failed, retrying in %.0fs", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SEED_RETRY_MAX_DELAY)
+
+    def start_seeding(self, symbols: Sequence[str] = ("BTCUSDT",)):
+        """Seed in the background once per process, retrying with backoff (the engines also call it)"""
+        if self._seeding is None:
+            self._seeding = asyncio.get_running_loop().create_task(self._seed_until_loaded(symbols))
+
+    def track_signal(self, signal: Dict, notional_usd: float, source: str,
+                     symbol: str = "BTCUSDT") -> Optional[Position]:
+        """
+        Count an engine's latest signal per symbol and timeframe towards exposure; HOLD clears it.
+        `source` names the engine, so two engines' plans for one timeframe stay separate positions
+        """
+        position_id = f"{source}:{symbol}:{signal['timeframe']}"
+        if signal.get("action") not in ("BUY", "SELL") or not signal.get("entry_price"):
+            self.remove_position(position_id)
+            return None
+        position = Position(
+            position_id=position_id,
+            symbol=symbol,
+            action=signal["action"],
+            quantity=notional_usd / signal["entry_price"],
+            entry_price=signal["entry_price"],
+            timeframe=signal["timeframe"]
+        )
+        self.add_position(position)
+        return position
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of bar returns from the running sums"""
+        self._allocate()
+        n = len(self.symbols)
+        if self.rows < 2:
+            return np.zeros((n, n))
+        mean = self.sum[:n] / self.rows
+        return (self.cross[:n, :n] - self.rows * np.outer(mean, mean)) / (self.rows - 1)
+
+    def _compute(self) -> Dict:
+        n = len(self.symbols)
+        exposure = self.exposure[:n]
+        losses = -self.scenario_pnl[:self.rows] if self.rows < self.window else -self.scenario_pnl
+
+        figures = {}
+        for confidence in (0.95, 0.99):
+            if len(losses) == 0:
+                var = cvar = 0.0
+            else:
+                k = min(int(np.floor(len(losses) * (1 - confidence))), len(losses) - 1)
+                tail = -np.partition(-losses, k)[:k + 1]
+                var = max(float(tail.min()), 0.0)
+                cvar = max(float(tail.mean()), 0.0)
+            figures[f"var_{int(confidence * 100)}"] = round(var, 2)
+            figures[f"cvar_{int(confidence * 100)}"] = round(cvar, 2)
+
+        covariance = self.covariance()
+        volatility = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        # Correlation-adjusted exposure: the single-asset position with the same volatility budget
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = np.where(np.outer(volatility, volatility) > 0,
+                                   covariance / np.outer(volatility, volatility), 0.0)
+        np.fill_diagonal(correlation, 1.0)
+        adjusted = float(np.sqrt(max(exposure @ correlation @ exposure, 0.0))) if n else 0.0
+        portfolio_volatility = float(np.sqrt(max(exposure @ covariance @ exposure, 0.0))) if n else 0.0
+
+        by_timeframe: Dict[str, float] = {}
+        for position in self.positions.values():
+            price = self.prices[self.symbols[position.symbol]]
+            by_timeframe[position.timeframe] = by_timeframe.get(position.timeframe, 0.0) + float(position.direction * position.quantity * price)
+
+        gross = float(np.abs(exposure).sum())
+        largest = float(np.abs(exposure).max()) if n else 0.0
+        return {
+            **figures,
+            "gross_exposure": round(gross, 2),
+            "net_exposure": round(float(exposure.sum()), 2),
+            "correlation_adjusted_exposure": round(adjusted, 2),
+            "portfolio_volatility_per_bar": round(portfolio_volatility, 2),
+            "exposure_by_symbol": {symbol: round(float(exposure[column]), 2) for symbol, column in self.symbols.items()},
+            "exposure_by_timeframe": {tf: round(value, 2) for tf, value in by_timeframe.items()},
+            "concentration": round(largest / gross, 3) if gross else 0.0,
+            "scenarios": int(self.rows),
+            "open_positions": len(self.positions)
+        }
+
+    def get_assessment(self, now: Optional[float] = None) -> Dict:
+        """Current portfolio risk; recomputed only when prices, positions or bars changed"""
+        self._allocate()
+        if self.current_bar is not None:
+            self.advance(now)
+        if self._cached is None:
+            self._cached = self._compute()
+        portfolio = self._cached
+        var_share = portfolio["cvar_99"] / self.equity if self.equity else 0.0
+        concentration = portfolio["concentration"]
+        return {
+            "portfolio": portfolio,
+            "overall_risk_level": _risk_level(var_share),
+            "risk_factors": {
+                "value_at_risk": {
+                    "level": _risk_level(portfolio["var_95"] / self.equity if self.equity else 0.0),
+                    "description": f"95% one-bar VaR ${portfolio['var_95']:,.0f}, CVaR 99% ${portfolio['cvar_99']:,.0f}"
+                },
+                "concentration": {
+                    "level": "low" if concentration < 0.5 else "medium" if concentration < 0.8 else "high",
+                    "description": f"Largest symbol is {concentration * 100:.0f}% of gross exposure"
+                }
+            }
+        }
+
+# Shared risk view across engines and timeframes
+portfolio_risk = PortfolioRiskEngine()
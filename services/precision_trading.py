@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
 import asyncio
-import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
-import httpx
 from dataclasses import dataclass
 
+from services.circuit_breaker import klines_breaker, market_snapshots, price_breaker
+from services.monte_carlo import outcome_simulator
+from services.order_book import order_books
+from services.order_flow import live_order_flow
+from services.portfolio_risk import portfolio_risk
+from services.price_sources import HedgedPriceFetcher, price_fetcher
+from services.profiling import profiler
+from services.rate_limiter import Priority, binance_get
+from services.resampler import TIMEFRAME_MS, local_candles
+from services.startup import lazy_import
+from services.strategy_config import ConfigStore, config_store
+from services.volume_profile import live_volume_levels, nearest_levels, profile_levels
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+httpx = lazy_import("httpx")
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -32,39 +48,24 @@ class PrecisionTradingEngine:
     Provides exact entry, take profit, and stop loss levels
     """
     
-    def __init__(self):
-        self.timeframe_settings = {
-            '5m': {
-                'base_position': 300,
-                'atr_multiplier': 1.0,
-                'tp_ratios': [1.2, 1.8, 2.5],
-                'sl_ratio': 1.0,
-                'expiration_minutes': 5
-            },
-            '15m': {
-                'base_position': 500,
-                'atr_multiplier': 1.2,
-                'tp_ratios': [1.5, 2.2, 3.0],
-                'sl_ratio': 1.2,
-                'expiration_minutes': 15
-            },
-            '1h': {
-                'base_position': 800,
-                'atr_multiplier': 1.5,
-                'tp_ratios': [2.0, 3.0, 4.0],
-                'sl_ratio': 1.5,
-                'expiration_minutes': 60
-            }
-        }
+    def __init__(self, config: Optional[ConfigStore] = None, prices: Optional[HedgedPriceFetcher] = None):
+        self.config = config or config_store
+        self.prices = prices or price_fetcher
     
-    async def generate_trade_recommendation(self, timeframe: str = '15m') -> Dict:
+    @property
+    def timeframe_settings(self) -> Dict:
+        """Per-timeframe settings from the current strategy config snapshot"""
+        return self.config.current.timeframe_settings
+    
+    @profiler.profile("precision.generate_trade_recommendation")
+    async def generate_trade_recommendation(self, timeframe: str = '15m', ohlcv_data: Optional[pd.DataFrame] = None) -> Dict:
         """Generate precision trade recommendation with exact levels"""
         try:
-            logger.info(f"🎯 Generating precision trade for {timeframe}")
+            logger.info("🎯 Generating precision trade for %s", timeframe)
             
-            # Get market data
-            current_price = await self._get_current_price()
-            ohlcv_data = await self._get_ohlcv_data(timeframe, 200)
+            # Get market data (last-known-good snapshot while the exchange is unreachable)
+            with profiler.span("market_data"):
+                current_price, ohlcv_data, data_age = await self._get_market_data(timeframe, ohlcv_data)
             
             if ohlcv_data.empty:
                 return self._generate_no_signal(timeframe)
@@ -72,12 +73,14 @@ class PrecisionTradingEngine:
             # Calculate technical levels
             atr = self._calculate_atr(ohlcv_data)
             pivot_points = self._calculate_pivot_points(ohlcv_data)
+            volume_levels = self._get_volume_levels(ohlcv_data)
             volatility = self._calculate_volatility_index(ohlcv_data)
             market_regime = self._get_market_regime(ohlcv_data)
             
             # Determine action and levels
             action = self._determine_action(ohlcv_data, current_price, pivot_points)
-            entry_price = self._calculate_entry_price(current_price, pivot_points, volatility, timeframe, action)
+            entry_price = self._calculate_entry_price(current_price, pivot_points, volatility, timeframe, action,
+                                                      volume_levels)
             
             # Calculate targets and stop loss
             take_profit_levels = self._calculate_take_profits(entry_price, atr, timeframe, action)
@@ -86,11 +89,28 @@ class PrecisionTradingEngine:
             # Position sizing and risk management
             position_size = self._calculate_position_size(timeframe, volatility)
             confidence = self._calculate_confidence(ohlcv_data, volatility, market_regime)
+            confidence = self._adjust_for_order_flow(confidence, action, timeframe)
             risk_reward = self._calculate_risk_reward(entry_price, take_profit_levels[0]['level'], stop_loss)
+            rr_check = self.config.current.risk_reward_check(timeframe, action, confidence, risk_reward)
             
             # Key triggers and context
             key_triggers = self._get_key_triggers(ohlcv_data, timeframe, action)
-            market_context = self._get_market_context(market_regime, volatility, pivot_points)
+            if rr_check["warning"]:
+                key_triggers.append(rr_check["warning"])
+            market_context = self._get_market_context(market_regime, volatility, pivot_points, volume_levels)
+            
+            book = order_books.get("BTCUSDT")
+            if book is not None and book.synced:
+                market_context["liquidity"] = book.liquidity_summary(action, position_size)
+            
+            flow = live_order_flow("BTCUSDT")
+            if flow is not None:
+                session_vwap = flow.session_vwap()
+                market_context["order_flow"] = {
+                    "cvd": round(flow.cvd, 4),
+                    "imbalance": round(flow.imbalance(timeframe), 3),
+                    "session_vwap": round(session_vwap, 2) if session_vwap else None
+                }
             
             signal = {
                 "timeframe": timeframe,
@@ -102,58 +122,94 @@ class PrecisionTradingEngine:
                 "confidence": round(confidence, 1),
                 "expiration": (datetime.now() + timedelta(minutes=self.timeframe_settings[timeframe]['expiration_minutes'])).isoformat(),
                 "risk_reward": round(risk_reward, 1),
+                "min_risk_reward": rr_check["min_risk_reward"],
                 "key_triggers": key_triggers,
                 "market_context": market_context,
                 "timestamp": datetime.now().isoformat()
             }
             
-            logger.info(f"🎯 Precision signal generated: {action} @ ${entry_price:.2f}")
+            if data_age is not None:
+                signal["market_context"]["data_age_seconds"] = round(data_age, 1)
+                signal["market_context"]["stale_data"] = True
+                signal["key_triggers"].append(f"Exchange unavailable - levels from data {data_age:.0f}s old")
+            
+            with profiler.span("outcome_simulation"):
+                outcome = outcome_simulator.simulate_signal(signal, ohlcv_data)
+            if outcome:
+                signal["outcome_simulation"] = outcome
+            
+            portfolio_risk.start_seeding()
+            portfolio_risk.on_price("BTCUSDT", current_price)
+            # position_size is a USD amount here
+            portfolio_risk.track_signal(signal, notional_usd=signal["position_size"], source="precision")
+            
+            logger.info("🎯 Precision signal generated: %s @ $%.2f", action, entry_price)
             return signal
             
         except Exception as e:
-            logger.error(f"Error generating precision signal: {e}")
+            logger.error("Error generating precision signal: %s", e)
             return self._generate_no_signal(timeframe)
     
     async def _get_current_price(self) -> float:
-        """Get current Bitcoin price"""
+        """Get current Bitcoin price (fastest healthy venue, hedged)"""
+        quote = await self.prices.fetch()
+        return quote.price
+    
+    async def _get_market_data(self, timeframe: str, ohlcv_data: Optional[pd.DataFrame] = None) -> Tuple[float, pd.DataFrame, Optional[float]]:
+        """Current price and candles, falling back to the last-known-good snapshot
+        Returns (price, candles, snapshot age in seconds or None when live)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT")
-                data = response.json()
-                return float(data['price'])
+            current_price = await price_breaker.call(self._get_current_price)
+            if ohlcv_data is None:
+                ohlcv_data = await self._load_candles(timeframe, 200)
+            market_snapshots.save(timeframe, current_price, ohlcv_data)
+            return current_price, ohlcv_data, None
         except Exception as e:
-            logger.error(f"Error fetching price: {e}")
-            return 105000.0
+            snapshot = market_snapshots.get(timeframe)
+            if snapshot is None:
+                raise
+            logger.warning("Serving %s from %.0fs old market snapshot: %s", timeframe, snapshot.age(), e)
+            return snapshot.price, snapshot.ohlcv, snapshot.age()
     
     async def _get_ohlcv_data(self, timeframe: str, limit: int = 200) -> pd.DataFrame:
         """Get OHLCV data for analysis"""
         try:
-            interval_map = {'5m': '5m', '15m': '15m', '1h': '1h'}
-            interval = interval_map.get(timeframe, '15m')
-            
-            async with httpx.AsyncClient() as client:
-                url = f"https://api.binance.com/api/v3/klines?symbol=BTCUSDT&interval={interval}&limit={limit}"
-                response = await client.get(url)
-                data = response.json()
-                
-                if not data:
-                    return pd.DataFrame()
-                
-                df = pd.DataFrame(data, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_asset_volume', 'number_of_trades',
-                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-                ])
-                
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    df[col] = pd.to_numeric(df[col])
-                
-                return df[['open', 'high', 'low', 'close', 'volume']]
-                
+            return await self._load_candles(timeframe, limit)
         except Exception as e:
-            logger.error(f"Error fetching OHLCV data: {e}")
+            logger.error("Error fetching OHLCV data: %s", e)
             return pd.DataFrame()
     
+    async def _load_candles(self, timeframe: str, limit: int) -> pd.DataFrame:
+        """Candles from the local resampler when it holds enough, else from the exchange"""
+        local = local_candles(timeframe, limit)
+        if local is not None:
+            return local[['open', 'high', 'low', 'close', 'volume']]
+        return await klines_breaker.call(self._fetch_ohlcv_data, timeframe, limit)
+    
+    async def _fetch_ohlcv_data(self, timeframe: str, limit: int = 200) -> pd.DataFrame:
+        """Fetch OHLCV candles from the exchange (raises on failure)"""
+        interval = timeframe if timeframe in TIMEFRAME_MS else '15m'
+        
+        async with httpx.AsyncClient() as client:
+            params = {"symbol": "BTCUSDT", "interval": interval, "limit": limit}
+            response = await binance_get(client, "/api/v3/klines", params, priority=Priority.LIVE)
+            response.raise_for_status()
+            data = response.json()
+            
+            if not data:
+                return pd.DataFrame()
+            
+            df = pd.DataFrame(data, columns=[
+                'timestamp', 'open', 'high', 'low', 'close', 'volume',
+                'close_time', 'quote_asset_volume', 'number_of_trades',
+                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+            ])
+            
+            for col in ['open', 'high', 'low', 'close', 'volume']:
+                df[col] = pd.to_numeric(df[col])
+            
+            return df[['open', 'high', 'low', 'close', 'volume']]
+    
     def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
         """Calculate Average True Range"""
         if len(df) < period:
@@ -196,6 +252,17 @@ class PrecisionTradingEngine:
             's2': s2
         }
     
+    def _get_volume_levels(self, df: pd.DataFrame) -> Dict:
+        """Volume-profile levels from the live 1m profile, else from the candles at hand"""
+        try:
+            live = live_volume_levels("BTCUSDT")
+            if live:
+                return live
+            return profile_levels(df['high'].to_numpy(), df['low'].to_numpy(), df['volume'].to_numpy())
+        except Exception as e:
+            logger.error("Error calculating volume profile: %s", e)
+            return {}
+    
     def _calculate_volatility_index(self, df: pd.DataFrame) -> float:
         """Calculate volatility index (0-1)"""
         if len(df) < 20:
@@ -250,10 +317,14 @@ class PrecisionTradingEngine:
         else:
             return "HOLD"
     
-    def _calculate_entry_price(self, current_price: float, pivots: Dict, volatility: float, timeframe: str, action: str) -> float:
+    def _calculate_entry_price(self, current_price: float, pivots: Dict, volatility: float, timeframe: str, action: str,
+                               volume_levels: Optional[Dict] = None) -> float:
         """Calculate precise entry price"""
         settings = self.timeframe_settings[timeframe]
-        spread_adjustment = current_price * 0.0001  # 1 basis point
+        spread_adjustment = self._get_spread_adjustment(current_price)
+        # Nearest high-volume node either side; pullback entries rest on it when it is close
+        nodes = nearest_levels(volume_levels or {}, current_price)
+        pullback_band = current_price * 0.005
         
         if action == "BUY":
             if timeframe == "5m":
@@ -263,7 +334,10 @@ class PrecisionTradingEngine:
                 else:
                     return current_price - (spread_adjustment * 0.5)
             elif timeframe == "15m":
-                # Swing entry - wait for pullback
+                # Swing entry - wait for pullback, to the volume node below when one is near
+                support = nodes["support"]
+                if support is not None and current_price - support <= pullback_band:
+                    return support + spread_adjustment
                 return current_price - (spread_adjustment * 2)
             else:  # 1h
                 # Position entry - current market
@@ -277,7 +351,10 @@ class PrecisionTradingEngine:
                 else:
                     return current_price + (spread_adjustment * 0.5)
             elif timeframe == "15m":
-                # Swing entry
+                # Swing entry, at the volume node above when one is near
+                resistance = nodes["resistance"]
+                if resistance is not None and resistance - current_price <= pullback_band:
+                    return resistance - spread_adjustment
                 return current_price + (spread_adjustment * 2)
             else:  # 1h
                 # Position entry
@@ -285,6 +362,15 @@ class PrecisionTradingEngine:
         
         return current_price
     
+    def _get_spread_adjustment(self, current_price: float) -> float:
+        """1 basis point of price, widened to the live bid/ask spread when the book is wider"""
+        # BTCUSDT usually quotes a one-tick ($0.01) spread, far too small to offset entries by
+        adjustment = current_price * 0.0001
+        book = order_books.get("BTCUSDT")
+        if book is not None and book.synced:
+            adjustment = max(adjustment, book.spread() or 0.0)
+        return adjustment
+    
     def _calculate_take_profits(self, entry_price: float, atr: float, timeframe: str, action: str) -> List[Dict]:
         """Calculate take profit levels"""
         settings = self.timeframe_settings[timeframe]
@@ -355,6 +441,21 @@ class PrecisionTradingEngine:
         
         return min(max(base_confidence, 0), 100)
     
+    def _adjust_for_order_flow(self, confidence: float, action: str, timeframe: str) -> float:
+        """Raise confidence when aggressive flow agrees with the action, lower it when it opposes"""
+        flow = live_order_flow("BTCUSDT")
+        if flow is None or action == "HOLD":
+            return confidence
+        
+        imbalance = flow.imbalance(timeframe)
+        direction = 1 if action == "BUY" else -1
+        if imbalance * direction > 0.1:
+            confidence += 5
+        elif imbalance * direction < -0.1:
+            confidence -= 5
+        
+        return min(max(confidence, 0), 100)
+    
     def _calculate_risk_reward(self, entry: float, tp1: float, sl: float) -> float:
         """Calculate risk/reward ratio"""
         if entry == 0 or sl == 0:
@@ -395,7 +496,8 @@ class PrecisionTradingEngine:
         
         return triggers
     
-    def _get_market_context(self, regime: str, volatility: float, pivots: Dict) -> Dict:
+    def _get_market_context(self, regime: str, volatility: float, pivots: Dict,
+                            volume_levels: Optional[Dict] = None) -> Dict:
         """Get market context information"""
         volatility_desc = "Low" if volatility < 0.3 else "High" if volatility > 0.7 else "Medium"
         
@@ -406,19 +508,20 @@ class PrecisionTradingEngine:
             "neutral": "Mixed signals - cautious approach"
         }
         
-        return {
+        key_levels = [pivots['r2'], pivots['r1'], pivots['p'], pivots['s1'], pivots['s2']]
+        context = {
             "regime": regime,
             "regime_description": regime_descriptions.get(regime, "Unknown"),
             "volatility_index": round(volatility, 2),
-            "volatility_level": volatility_desc,
-            "key_levels": [
-                round(pivots['r2'], 2),
-                round(pivots['r1'], 2),
-                round(pivots['p'], 2),
-                round(pivots['s1'], 2),
-                round(pivots['s2'], 2)
-            ]
+            "volatility_level": volatility_desc
         }
+        if volume_levels:
+            key_levels += [volume_levels['poc']] + volume_levels['hvn']
+            context["volume_profile"] = {key: volume_levels[key] for key in
+                                         ("poc", "value_area_high", "value_area_low", "hvn", "lvn")}
+        # Highest first, as before; volume nodes that coincide with a pivot are listed once
+        context["key_levels"] = sorted({round(float(level), 2) for level in key_levels}, reverse=True)
+        return context
     
     def _generate_no_signal(self, timeframe: str) -> Dict:
         """Generate default no-signal response"""
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from services.rate_limiter import Priority, WeightRateLimiter, exchange_limiter
+from services.startup import lazy_import
+
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+class PriceUnavailableError(Exception):
+    """No configured source returned a valid price in time"""
+
+@dataclass
+class PriceSource:
+    """One venue's ticker endpoint and how to read the price out of its JSON"""
+    name: str
+    url: str
+    parse: Callable[[Dict], float]
+    # Request weight charged against the shared exchange limiter (0 = not limited)
+    weight: int = 0
+
+@dataclass
+class PriceQuote:
+    price: float
+    source: str
+    latency_ms: float
+    timestamp: datetime = field(default_factory=datetime.now)
+
+def _parse_kraken(data: Dict) -> float:
+    return float(next(iter(data["result"].values()))["c"][0])
+
+# Public BTC/USD(T) tickers; point url at a local stand-in server to test failover
+DEFAULT_SOURCES = [
+    PriceSource("binance", "https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT",
+                lambda data: float(data["price"]), weight=2),
+    PriceSource("coinbase", "https://api.coinbase.com/v2/prices/BTC-USD/spot",
+                lambda data: float(data["data"]["amount"])),
+    PriceSource("kraken", "https://api.kraken.com/0/public/Ticker?pair=XBTUSDT", _parse_kraken),
+    PriceSource("bitstamp", "https://www.bitstamp.net/api/v2/ticker/btcusdt/",
+                lambda data: float(data["last"])),
+]
+
+class SourceStats:
+    """Latency / error EWMAs plus a recent latency window for the hedge delay"""
+
+    def __init__(self, alpha: float = 0.2, window: int = 100, initial_latency_ms: float = 250.0):
+        self.alpha = alpha
+        self.latency_ewma = initial_latency_ms
+        self.error_ewma = 0.0
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def record_success(self, latency_ms: float):
+        self.requests += 1
+        self.latencies.append(latency_ms)
+        self.latency_ewma += self.alpha * (latency_ms - self.latency_ewma)
+        self.error_ewma *= (1 - self.alpha)
+
+    def record_failure(self, latency_ms: float):
+        self.requests += 1
+        self.errors += 1
+        self.latency_ewma += self.alpha * (max(latency_ms, self.latency_ewma) - self.latency_ewma)
+        self.error_ewma += self.alpha * (1 - self.error_ewma)
+
+    def record_cancelled(self, elapsed_ms: float):
+        """A hedged request lost the race; it took at least elapsed_ms"""
+        self.latency_ewma += self.alpha * (max(elapsed_ms, self.latency_ewma) - self.latency_ewma)
+
+    def p95(self) -> float:
+        if len(self.latencies) < 5:
+            return self.latency_ewma * 2
+        ordered = sorted(self.latencies)
+        return ordered[min(int(math.ceil(0.95 * len(ordered))) - 1, len(ordered) - 1)]
+
+    def score(self) -> float:
+        """Lower is better: expected latency inflated by recent error rate"""
+        return self.latency_ewma * (1 + 10 * self.error_ewma)
+
+class HedgedPriceFetcher:
+    """
+    Multi-venue price fetch with hedged requests
+    Asks the fastest healthy source first; if it has not answered by its p95
+    latency, the next-best source is asked too, and the first valid price wins
+    """
+
+    def __init__(self, sources: Optional[List[PriceSource]] = None, timeout: float = 3.0,
+                 min_hedge_delay_ms: float = 50.0, max_hedge_delay_ms: float = 1000.0,
+                 max_deviation: float = 0.2, reference_ttl: float = 60.0, consensus_tolerance: float = 0.005,
+                 limiter: WeightRateLimiter = exchange_limiter):
+        self.sources = sources or DEFAULT_SOURCES
+        self.timeout = timeout
+        self.min_hedge_delay = min_hedge_delay_ms / 1000
+        self.max_hedge_delay = max_hedge_delay_ms / 1000
+        self.max_deviation = max_deviation
+        self.reference_ttl = reference_ttl
+        self.consensus_tolerance = consensus_tolerance
+        self.limiter = limiter
+        self.stats: Dict[str, SourceStats] = {source.name: SourceStats() for source in self.sources}
+        self.last_quote: Optional[PriceQuote] = None
+        # Recently rejected prices by source: (price, monotonic time)
+        self.outliers: Dict[str, Tuple[float, float]] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    def ranked_sources(self) -> List[PriceSource]:
+        """Sources ordered by score; persistently failing ones go last"""
+        return sorted(self.sources, key=lambda source: self.stats[source.name].score())
+
+    def _valid(self, source: str, price: float) -> bool:
+        """
+        Sanity check against the last accepted quote while it is recent.
+        A price far from it still passes when another source recently reported
+        the same price, so a real move during an outage is not rejected forever
+        """
+        if not math.isfinite(price) or price <= 0:
+            return False
+        reference = self.last_quote
+        if reference is None or (datetime.now() - reference.timestamp).total_seconds() > self.reference_ttl:
+            return True
+        if abs(price - reference.price) / reference.price <= self.max_deviation:
+            return True
+
+        now = time.monotonic()
+        for other, (other_price, seen) in self.outliers.items():
+            if (other != source and now - seen <= self.reference_ttl
+                    and abs(price - other_price) / other_price <= self.consensus_tolerance):
+                self.outliers.clear()
+                return True
+        self.outliers[source] = (price, now)
+        return False
+
+    async def _fetch_one(self, source: PriceSource) -> PriceQuote:
+        stats = self.stats[source.name]
+        if source.weight:
+            await self.limiter.acquire(source.weight, Priority.LIVE)
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(source.url)
+            if source.weight:
+                self.limiter.update_from_headers(response.headers, response.status_code)
+            response.raise_for_status()
+            price = source.parse(response.json())
+            if not self._valid(source.name, price):
+                raise ValueError(f"implausible price {price}")
+        except asyncio.CancelledError:
+            stats.record_cancelled((time.perf_counter() - started) * 1000)
+            raise
+        except Exception:
+            stats.record_failure((time.perf_counter() - started) * 1000)
+            raise
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        stats.record_success(latency_ms)
+        return PriceQuote(price=price, source=source.name, latency_ms=latency_ms)
+
+    async def fetch(self) -> PriceQuote:
+        """First valid price across sources; raises PriceUnavailableError if all fail"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pending_sources = self.ranked_sources()
+        in_flight = set()
+        errors = []
+
+        try:
+            while pending_sources or in_flight:
+                if pending_sources:
+                    source = pending_sources.pop(0)
+                    in_flight.add(asyncio.create_task(self._fetch_one(source), name=source.name))
+                    hedge_delay = min(max(self.stats[source.name].p95() / 1000, self.min_hedge_delay),
+                                      self.max_hedge_delay)
+                else:
+                    hedge_delay = None
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                wait = remaining if hedge_delay is None else min(hedge_delay, remaining)
+
+                # Keep waiting on the requests in flight until one succeeds or the hedge delay passes
+                wait_until = loop.time() + wait
+                while in_flight:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, timeout=max(wait_until - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            self.last_quote = task.result()
+                            return self.last_quote
+                        errors.append(f"{task.get_name()}: {task.exception()}")
+                    if not done:
+                        break
+                    if pending_sources:
+                        # A failure frees us to hedge immediately
+                        break
+
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        raise PriceUnavailableError("; ".join(errors) or "timed out waiting for price sources")
+
+    def get_stats(self) -> Dict:
+        return {
+            name: {
+                "latency_ewma_ms": round(stats.latency_ewma, 1),
+                "p95_ms": round(stats.p95(), 1),
+                "error_rate": round(stats.error_ewma, 3),
+                "requests": stats.requests,
+                "errors": stats.errors
+            }
+            for name, stats in self.stats.items()
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Shared by both engines so source statistics accumulate in one place
+price_fetcher = HedgedPriceFetcher()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from services.strategy_config import StrategyConfig, config_store
+
+logger = logging.getLogger(__name__)
+
+# Spans of the call currently being traced: list of (path, seconds), or None
+_trace: contextvars.ContextVar[Optional[List]] = contextvars.ContextVar("profiling_trace", default=None)
+_span_path: contextvars.ContextVar[tuple] = contextvars.ContextVar("profiling_span_path", default=())
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """
+    Samples one thread's Python stack from a timer thread
+    Counts collapsed stacks ("root;...;leaf"), the format flamegraph.pl,
+    speedscope and inferno read; cost to the sampled thread is near zero
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    async def stop_async(self) -> Counter:
+        """stop() for the event loop: the join waits out a sample in progress, so it runs in a worker"""
+        self._stop.set()
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        return self.stacks
+
+class Profiler:
+    """
+    Opt-in runtime profiling for the signal paths, switched through the
+    `profiling` strategy config row without a restart
+    - sample_rate: fraction of calls profiled by the stack sampler
+    - slow_call_ms: calls slower than this dump their span trace
+    - memory_tracking: tracemalloc on, with snapshot/diff helpers
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_call_ms = 0.0
+        self.output_dir = "profiles"
+        self._sampler_busy = False
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.stats = {"calls": 0, "sampled": 0, "slow": 0}
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  slow_call_ms: Optional[float] = None, memory_tracking: Optional[bool] = None,
+                  output_dir: Optional[str] = None):
+        """Change settings at runtime; omitted arguments keep their value"""
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        if slow_call_ms is not None:
+            self.slow_call_ms = slow_call_ms
+        if output_dir is not None:
+            self.output_dir = output_dir
+        if memory_tracking is not None:
+            if memory_tracking and not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                logger.info("🧠 tracemalloc started")
+            elif not memory_tracking and tracemalloc.is_tracing():
+                tracemalloc.stop()
+                self._last_snapshot = None
+                logger.info("🧠 tracemalloc stopped")
+
+    def apply_config(self, snapshot: StrategyConfig):
+        """Config store listener"""
+        self.configure(**snapshot.profiling)
+
+    def _write(self, filename: str, text: str):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, filename), "a") as handle:
+                handle.write(text)
+        except Exception as e:
+            logger.error("Error writing profile output: %s", e)
+
+    def _write_later(self, filename: str, text: str):
+        """Hand file output to a worker thread so the event loop never waits on disk"""
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write, filename, text)
+        except RuntimeError:
+            self._write(filename, text)
+
+    def profile(self, name: str):
+        """Decorator for async entry points (generate_trade_recommendation, generate_execution_plan)"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await fn(*args, **kwargs)
+                return await self._profiled_call(name, fn, args, kwargs)
+            return wrapper
+        return decorator
+
+    async def _profiled_call(self, name: str, fn, args, kwargs):
+        self.stats["calls"] += 1
+
+        sampler = None
+        # One sampler at a time: the loop thread's stack is shared by concurrent calls
+        if not self._sampler_busy and random.random() < self.sample_rate:
+            self._sampler_busy = True
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+
+        spans: Optional[List] = [] if self.slow_call_ms > 0 else None
+        trace_token = _trace.set(spans)
+        path_token = _span_path.set((name,))
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _span_path.reset(path_token)
+            _trace.reset(trace_token)
+
+            if sampler is not None:
+                stacks = await sampler.stop_async()
+                self._sampler_busy = False
+                self.stats["sampled"] += 1
+                if stacks:
+                    self._write_later(f"{name}.folded", "".join(f"{stack} {count}\n" for stack, count in stacks.items()))
+
+            if spans is not None and elapsed * 1000 >= self.slow_call_ms:
+                self.stats["slow"] += 1
+                self._record_slow_call(name, elapsed, spans)
+
+    def _record_slow_call(self, name: str, elapsed: float, spans: List):
+        record = {
+            "name": name,
+            "timestamp": datetime.now().isoformat(),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "spans": [{"path": "/".join(path), "ms": round(seconds * 1000, 3)} for path, seconds in spans]
+        }
+        # Folded form weighted by self time in microseconds, so the trace also opens as a flamegraph
+        child_time: Dict[tuple, float] = Counter()
+        for path, seconds in spans:
+            child_time[path[:-1]] += seconds
+        totals = [((name,), elapsed)] + spans
+        folded = "".join(f"{';'.join(path)} {max(int((seconds - child_time[path]) * 1e6), 0)}\n"
+                         for path, seconds in totals)
+
+        self._write_later("slow_calls.jsonl", json.dumps(record) + "\n")
+        self._write_later(f"{name}.slow.folded", folded)
+        logger.warning("🐢 Slow call %s: %.0fms", name, elapsed * 1000)
+
+    @contextmanager
+    def span(self, label: str):
+        """Time a step of the traced call; a no-op unless a slow-call trace is active"""
+        spans = _trace.get()
+        if spans is None:
+            yield
+            return
+        path = _span_path.get() + (label,)
+        token = _span_path.set(path)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans.append((path, time.perf_counter() - started))
+            _span_path.reset(token)
+
+    def take_memory_snapshot(self, label: str = "snapshot", top: int = 15) -> Dict:
+        """Dump a tracemalloc snapshot and return the top allocation sites plus growth since the last one"""
+        if not tracemalloc.is_tracing():
+            return {"error": "memory tracking is disabled"}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ])
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.output_dir, exist_ok=True)
+        snapshot.dump(os.path.join(self.output_dir, f"{label}_{stamp}.tracemalloc"))
+
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "current_mb": round(current / 1e6, 2),
+            "peak_mb": round(peak / 1e6, 2),
+            "top": [{"site": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:top]]
+        }
+
+        if self._last_snapshot is not None:
+            diff = snapshot.compare_to(self._last_snapshot, "lineno")[:top]
+            result["growth"] = [{"site": str(stat.traceback[0]), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                                 "count_diff": stat.count_diff} for stat in diff]
+            self._write(f"{label}_{stamp}.diff.txt", "".join(f"{stat}\n" for stat in diff))
+        self._last_snapshot = snapshot
+        return result
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_call_ms": self.slow_call_ms,
+            "memory_tracking": tracemalloc.is_tracing(),
+            "output_dir": self.output_dir
+        }
+
+# Shared by both engines; follows the profiling row of the strategy config
+profiler = Profiler()
+config_store.subscribe(profiler.apply_config)
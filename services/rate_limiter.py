@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Dict, Optional
+import logging
+
+from services.startup import lazy_import
+
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+BINANCE_API = "https://api.binance.com"
+
+# Binance REQUEST_WEIGHT budget per IP and minute
+BINANCE_WEIGHT_PER_MINUTE = 6000
+
+class Priority(IntEnum):
+    """Lower value is served first"""
+    LIVE = 0      # signal generation on the request path
+    NORMAL = 1    # periodic refreshes
+    BACKFILL = 2  # history loads, training exports
+
+def _klines_weight(params: Dict) -> int:
+    limit = int(params.get("limit", 500))
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+def _depth_weight(params: Dict) -> int:
+    limit = int(params.get("limit", 100))
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+def endpoint_weight(path: str, params: Optional[Dict] = None) -> int:
+    """Request weight Binance charges for a spot REST call"""
+    params = params or {}
+    if path.endswith("/klines"):
+        return _klines_weight(params)
+    if path.endswith("/depth"):
+        return _depth_weight(params)
+    if path.endswith("/ticker/price"):
+        return 2 if "symbol" in params else 4
+    if path.endswith("/ticker/24hr"):
+        return 2 if "symbol" in params else 80
+    if path.endswith("/aggTrades"):
+        return 2
+    if path.endswith("/exchangeInfo"):
+        return 20
+    return 1
+
+class WeightRateLimiter:
+    """
+    Process-wide async token bucket measured in request weight
+    Waiters are served strictly by priority lane, and a reserve of the bucket
+    is held back for LIVE requests so backfill traffic can never starve them
+    """
+
+    def __init__(self, weight_per_minute: int = BINANCE_WEIGHT_PER_MINUTE, safety_margin: float = 0.8,
+                 live_reserve: float = 0.2):
+        self.capacity = weight_per_minute * safety_margin
+        self.refill_rate = self.capacity / 60.0
+        self.live_reserve = self.capacity * live_reserve
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"requests": 0, "waited": 0, "throttled_responses": 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def _available(self, priority: int) -> float:
+        reserve = 0.0 if priority == Priority.LIVE else self.live_reserve
+        return self.tokens - reserve
+
+    def _dispatch(self):
+        """Grant queued waiters in priority order while tokens allow"""
+        self._timer = None
+        self._refill()
+        now = time.monotonic()
+
+        while self.waiters:
+            if now < self.blocked_until:
+                self._schedule(self.blocked_until - now)
+                return
+            priority, _, weight, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            shortfall = weight - self._available(priority)
+            if shortfall > 0:
+                self._schedule(shortfall / self.refill_rate)
+                return
+            heapq.heappop(self.waiters)
+            self.tokens -= weight
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
+
+    async def acquire(self, weight: int, priority: Priority = Priority.NORMAL):
+        """Wait until `weight` can be spent without exceeding the budget"""
+        self._refill()
+        self.stats["requests"] += 1
+        ahead = any(p <= priority and not f.done() for p, _, _, f in self.waiters)
+        if not ahead and time.monotonic() >= self.blocked_until and self._available(priority) >= weight:
+            self.tokens -= weight
+            return
+
+        self.stats["waited"] += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (int(priority), next(self._sequence), weight, future))
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._dispatch()
+        await future
+
+    def update_from_headers(self, headers, status_code: int = 200):
+        """Resync with the server's view of used weight and honour back-off requests"""
+        used = headers.get("x-mbx-used-weight-1m")
+        if used is not None:
+            self._refill()
+            # The server may report more than our (safety-margined) capacity; owe nothing below zero
+            self.tokens = max(0.0, min(self.tokens, self.capacity - float(used)))
+
+        if status_code in (418, 429):
+            self.stats["throttled_responses"] += 1
+            retry_after = float(headers.get("retry-after", 60))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            logger.warning("⏳ Exchange rate limit hit (%s), backing off %.0fs", status_code, retry_after)
+
+    def get_stats(self) -> Dict:
+        self._refill()
+        return {
+            **self.stats,
+            "tokens": round(self.tokens, 1),
+            "capacity": self.capacity,
+            "queued": sum(1 for *_, future in self.waiters if not future.done()),
+            "blocked_for": round(max(self.blocked_until - time.monotonic(), 0), 1)
+        }
+
+# One budget per process: every Binance call from every engine draws from it
+exchange_limiter = WeightRateLimiter()
+
+async def binance_get(client: httpx.AsyncClient, path: str, params: Optional[Dict] = None,
+                      priority: Priority = Priority.NORMAL,
+                      limiter: WeightRateLimiter = exchange_limiter) -> httpx.Response:
+    """GET a Binance REST path through the shared weight limiter"""
+    await limiter.acquire(endpoint_weight(path, params), priority)
+    response = await client.get(f"{BINANCE_API}{path}", params=params)
+    limiter.update_from_headers(response.headers, response.status_code)
+    return response
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import logging
+
+from services.rate_limiter import Priority, binance_get
+from services.startup import lazy_import
+from services.volume_profile import attach_volume_profile, seed_from_history, volume_profiles
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS = "wss://stream.binance.com:9443/ws"
+
+# Candle length in milliseconds; buckets start on multiples of this since the
+# Unix epoch, which matches Binance's UTC kline boundaries for all of these
+TIMEFRAME_MS = {
+    '1m': 60_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '1h': 3_600_000,
+    '4h': 14_400_000,
+    '1d': 86_400_000
+}
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def bucket_start(timestamp_ms: int, timeframe: str) -> int:
+    """Open time of the timeframe candle containing timestamp_ms"""
+    size = TIMEFRAME_MS[timeframe]
+    return timestamp_ms - timestamp_ms % size
+
+def resample_ohlcv(candles, timeframe: str) -> pd.DataFrame:
+    """
+    Vectorized bulk resample of base candles (oldest first) to a higher timeframe
+    `candles` needs timestamp (open time, ms), open, high, low, close and volume
+    """
+    timestamps = np.asarray(candles['timestamp'], dtype=np.int64)
+    if len(timestamps) == 0:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+    buckets = timestamps - timestamps % TIMEFRAME_MS[timeframe]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+
+    high = np.asarray(candles['high'], dtype=np.float64)
+    low = np.asarray(candles['low'], dtype=np.float64)
+    volume = np.asarray(candles['volume'], dtype=np.float64)
+
+    return pd.DataFrame({
+        'timestamp': buckets[starts],
+        'open': np.asarray(candles['open'], dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(high, starts),
+        'low': np.minimum.reduceat(low, starts),
+        'close': np.asarray(candles['close'], dtype=np.float64)[ends],
+        'volume': np.add.reduceat(volume, starts)
+    })
+
+def _merge(candle: Optional[List[float]], other: List[float]) -> List[float]:
+    """Combine two consecutive candles [timestamp, open, high, low, close, volume]"""
+    if candle is None:
+        return list(other)
+    return [candle[0], candle[1], max(candle[2], other[2]), min(candle[3], other[3]), other[4], candle[5] + other[5]]
+
+class CandleResampler:
+    """
+    Derives every higher timeframe from a single base kline stream
+    For each target it keeps closed history plus the closed base candles of the
+    open bucket; reads merge in the forming base candle, so the last row is
+    live exactly like the exchange's klines endpoint
+    """
+
+    def __init__(self, symbol: str = "BTCUSDT", base: str = '1m',
+                 targets: Optional[List[str]] = None, history: int = 500):
+        self.symbol = symbol
+        self.base = base
+        self.targets = targets or [tf for tf in TIMEFRAME_MS if TIMEFRAME_MS[tf] >= TIMEFRAME_MS[base]]
+        for tf in self.targets:
+            if TIMEFRAME_MS[tf] % TIMEFRAME_MS[base] != 0:
+                raise ValueError(f"{tf} is not a multiple of base timeframe {base}")
+        self.history = {tf: deque(maxlen=history) for tf in self.targets}
+        self.open_bucket: Dict[str, Optional[List[float]]] = {tf: None for tf in self.targets}
+        self.forming: Optional[List[float]] = None
+        self.last_closed_time = -1
+        # Monotonic receipt time of the last streamed kline; None until the stream delivers one
+        self.last_kline_at: Optional[float] = None
+        # Called with (timestamp, open, high, low, close, volume) for each closed base candle
+        self.listeners: List[Callable] = []
+
+    def seed(self, timeframe: str, candles):
+        """Replace a timeframe's closed history (bulk, e.g. from one REST klines call)"""
+        frame = candles if isinstance(candles, pd.DataFrame) else pd.DataFrame(candles)
+        rows = frame[CANDLE_COLUMNS].to_numpy(dtype=np.float64)
+        history = self.history[timeframe]
+        history.clear()
+        for row in rows:
+            history.append([int(row[0])] + row[1:].tolist())
+        self.open_bucket[timeframe] = None
+        self.forming = None
+        self.last_closed_time = -1
+
+    def seed_from_base(self, base_candles):
+        """Build every target from closed base candles using the vectorized path"""
+        frame = base_candles if isinstance(base_candles, pd.DataFrame) else pd.DataFrame(base_candles)
+        open_from = None
+        for tf in self.targets:
+            resampled = resample_ohlcv(frame, tf)
+            # The last bucket may be incomplete; it is rebuilt incrementally below
+            self.seed(tf, resampled.iloc[:-1])
+            if len(resampled):
+                last = int(resampled['timestamp'].iloc[-1])
+                open_from = last if open_from is None else min(open_from, last)
+
+        if open_from is not None:
+            tail = frame[frame['timestamp'] >= open_from][CANDLE_COLUMNS].to_numpy(dtype=np.float64)
+            for row in tail:
+                self.on_base_candle(int(row[0]), *row[1:], closed=True)
+
+    def on_base_candle(self, timestamp: int, open_: float, high: float, low: float, close: float,
+                       volume: float, closed: bool):
+        """Fold one base kline update (forming or closed) into every target"""
+        if timestamp <= self.last_closed_time:
+            return  # replayed or duplicate update for a candle already folded in
+
+        for tf in self.targets:
+            start = bucket_start(timestamp, tf)
+            history = self.history[tf]
+            if history and start <= history[-1][0]:
+                continue  # bucket already final in the seeded history
+
+            bucket = self.open_bucket[tf]
+            if bucket is not None and bucket[0] != start:
+                history.append(bucket)
+                bucket = None
+            if closed:
+                bucket = _merge(bucket, [start, open_, high, low, close, volume])
+            self.open_bucket[tf] = bucket
+
+        if closed:
+            self.forming = None
+            self.last_closed_time = timestamp
+            for listener in self.listeners:
+                try:
+                    listener(timestamp, open_, high, low, close, volume)
+                except Exception as e:
+                    logger.error("Error in closed candle listener: %s", e)
+        else:
+            self.forming = [timestamp, open_, high, low, close, volume]
+
+    def on_kline(self, event: Dict):
+        """Binance kline stream payload"""
+        self.last_kline_at = time.monotonic()
+        k = event["k"]
+        self.on_base_candle(k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]),
+                            float(k["v"]), k["x"])
+
+    def _live_candle(self, timeframe: str) -> Optional[List[float]]:
+        bucket = self.open_bucket[timeframe]
+        if self.forming is None:
+            return bucket
+        start = bucket_start(self.forming[0], timeframe)
+        history = self.history[timeframe]
+        if history and start <= history[-1][0]:
+            return bucket
+        return _merge(bucket, [start] + self.forming[1:])
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """True while the stream keeps delivering; it pushes several updates per base bar"""
+        if self.last_kline_at is None:
+            return False
+        if max_age is None:
+            max_age = TIMEFRAME_MS[self.base] / 1000
+        return time.monotonic() - self.last_kline_at <= max_age
+
+    def available(self, timeframe: str) -> int:
+        if timeframe not in self.history:
+            return 0
+        return len(self.history[timeframe]) + (1 if self._live_candle(timeframe) is not None else 0)
+
+    def get_candles(self, timeframe: str, limit: int = 200) -> pd.DataFrame:
+        """Latest `limit` candles, the last one still forming, as the engines expect"""
+        rows = list(self.history[timeframe])
+        live = self._live_candle(timeframe)
+        if live is not None:
+            rows.append(live)
+        frame = pd.DataFrame(rows[-limit:], columns=CANDLE_COLUMNS)
+        frame['timestamp'] = frame['timestamp'].astype(np.int64)
+        return frame
+
+def _parse_klines(klines: List) -> List[List[float]]:
+    return [[k[0], float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])] for k in klines]
+
+class ResamplerStream:
+    """
+    Feeds a CandleResampler from Binance's base kline stream
+    On (re)connect each timeframe's closed history is loaded once and the open
+    buckets are replayed from base candles; after that no klines are polled.
+    With `history_db`, an empty volume profile is first seeded from price_history
+    so the replayed base candles extend stored history instead of starting it
+    """
+
+    def __init__(self, resampler: CandleResampler, seed_limit: int = 500, history_db=None):
+        self.resampler = resampler
+        self.seed_limit = seed_limit
+        self.history_db = history_db
+        self.stream_url = f"{BINANCE_WS}/{resampler.symbol.lower()}@kline_{resampler.base}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def _klines(self, client: httpx.AsyncClient, params: Dict) -> List:
+        response = await binance_get(client, "/api/v3/klines", {"symbol": self.resampler.symbol, **params},
+                                     priority=Priority.BACKFILL)
+        response.raise_for_status()
+        return response.json()
+
+    async def _seed(self):
+        resampler = self.resampler
+        profile = volume_profiles.get(resampler.symbol)
+        if self.history_db is not None and profile is not None and profile.count == 0:
+            await seed_from_history(profile, self.history_db, resampler.symbol, resampler.base)
+
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            for tf in resampler.targets:
+                # Drop the forming candle; the open bucket is rebuilt from base candles
+                klines = await self._klines(client, {"interval": tf, "limit": self.seed_limit})
+                resampler.seed(tf, pd.DataFrame(_parse_klines(klines[:-1]), columns=CANDLE_COLUMNS))
+
+            now_ms = int(time.time() * 1000)
+            start_time = min(bucket_start(now_ms, tf) for tf in resampler.targets)
+            while True:
+                klines = await self._klines(client, {"interval": resampler.base, "startTime": start_time,
+                                                     "limit": 1000})
+                for k, row in zip(klines, _parse_klines(klines)):
+                    resampler.on_base_candle(*row, closed=k[6] < now_ms)
+                if len(klines) < 1000:
+                    break
+                start_time = klines[-1][0] + TIMEFRAME_MS[resampler.base]
+
+    async def _run(self):
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.stream_url) as stream:
+                    # Seed after subscribing so no base candle falls between history and stream;
+                    # updates buffered meanwhile are deduplicated by the resampler
+                    await self._seed()
+                    logger.info(f"✅ Resampler for {self.resampler.symbol} seeded: {', '.join(self.resampler.targets)}")
+                    async for raw in stream:
+                        self.resampler.on_kline(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Kline stream error for %s: %s", self.resampler.symbol, e)
+                await asyncio.sleep(5)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Live resamplers by symbol
+resamplers: Dict[str, CandleResampler] = {}
+
+def start_resampler(symbol: str = "BTCUSDT", base: str = '1m', db=None) -> ResamplerStream:
+    """Create, register and start the resampler for a symbol; `db` seeds its volume profile"""
+    resampler = resamplers.setdefault(symbol, CandleResampler(symbol, base))
+    attach_volume_profile(resampler)
+    # correlation imports TIMEFRAME_MS from here, so import it at call time
+    from services.correlation import attach_correlations
+    attach_correlations(resampler)
+    stream = ResamplerStream(resampler, history_db=db)
+    stream.start()
+    return stream
+
+def local_candles(timeframe: str, limit: int, symbol: str = "BTCUSDT") -> Optional[pd.DataFrame]:
+    """
+    Candles from the live resampler when it can serve the request, else None
+    A resampler whose stream has gone quiet for about a base bar is not used, so
+    callers fall back to REST (and its circuit breaker) instead of frozen candles
+    """
+    resampler = resamplers.get(symbol)
+    if resampler is None or not resampler.is_fresh() or resampler.available(timeframe) < limit:
+        return None
+    return resampler.get_candles(timeframe, limit)
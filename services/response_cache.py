@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+import logging
+
+from services.signal_changes import SignalChangeDetector
+
+logger = logging.getLogger(__name__)
+
+Producer = Callable[[], Awaitable[Dict]]
+# (previous payload, new payload) -> True when the new one is materially the same
+SameContent = Callable[[Dict, Dict], bool]
+
+# Top-level fields stamped with the time of computation; left out of the ETag
+VOLATILE_FIELDS = ("timestamp", "generated_at")
+
+@dataclass
+class CachedResponse:
+    """
+    Serialized response body ready to write to the socket
+    `created` moves forward whenever a recompute confirms the body; `produced`
+    stays at the time the body itself was computed
+    """
+    body: bytes
+    etag: str
+    created: float
+    produced: float
+
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+    def body_age(self) -> float:
+        return time.monotonic() - self.produced
+
+@dataclass
+class CacheRoute:
+    producer: Producer
+    ttl: float
+    stale_ttl: float
+    same: Optional[SameContent] = None
+    entry: Optional[CachedResponse] = None
+    payload: Optional[Dict] = None
+    refreshing: Optional[asyncio.Task] = None
+    refreshes: int = 0
+    errors: int = 0
+
+class ResponseCache:
+    """
+    Stale-while-revalidate cache for polled GET endpoints
+    Each route's producer runs at most once at a time; readers get the last
+    serialized body immediately while a background refresh replaces it
+    """
+
+    def __init__(self, refresh_ahead: float = 0.8):
+        # Refresh once an entry is this fraction of its ttl old, before it expires
+        self.refresh_ahead = refresh_ahead
+        self.routes: Dict[str, CacheRoute] = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+    def register(self, path: str, producer: Producer, ttl: float = 10.0, stale_ttl: float = 60.0,
+                 same: Optional[SameContent] = None):
+        """
+        Cache GET responses for `path`; stale entries are served for up to stale_ttl past ttl.
+        `same` decides when a recomputed payload keeps the previous body and ETag
+        """
+        self.routes[path] = CacheRoute(producer=producer, ttl=ttl, stale_ttl=stale_ttl, same=same)
+
+    def _serialize(self, payload: Dict) -> CachedResponse:
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        # Hash without the computation timestamp, so an identical recompute keeps its ETag
+        material = {key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}
+        digest = hashlib.blake2b(json.dumps(material, separators=(",", ":"), default=str).encode(), digest_size=12)
+        now = time.monotonic()
+        return CachedResponse(body=body, etag='"' + digest.hexdigest() + '"', created=now, produced=now)
+
+    async def _produce(self, path: str) -> CachedResponse:
+        route = self.routes[path]
+        try:
+            payload = await route.producer()
+            if route.entry is not None and route.same is not None and route.same(route.payload, payload):
+                unchanged = True
+            else:
+                entry = self._serialize(payload)
+                unchanged = route.entry is not None and route.entry.etag == entry.etag
+            # Keep the old entry (body and ETag) when the content is unchanged, but never
+            # past the stale bound: `same` tolerates drift, which must not accumulate forever
+            if unchanged and route.entry.body_age() <= route.ttl + route.stale_ttl:
+                route.entry.created = time.monotonic()
+            else:
+                if unchanged:
+                    entry = self._serialize(payload)
+                route.entry, route.payload = entry, payload
+            route.refreshes += 1
+            return route.entry
+        except Exception as e:
+            route.errors += 1
+            if route.entry is None or route.entry.age() > route.ttl + route.stale_ttl:
+                raise
+            logger.error("Error refreshing cached response for %s, serving the last copy: %s", path, e)
+            return route.entry
+
+    def _refresh(self, path: str) -> asyncio.Task:
+        """Start a refresh unless one is already in flight (single flight per route)"""
+        route = self.routes[path]
+        if route.refreshing is None or route.refreshing.done():
+            route.refreshing = asyncio.create_task(self._produce(path))
+            route.refreshing.add_done_callback(lambda task: self._log_failure(path, task))
+        return route.refreshing
+
+    def _log_failure(self, path: str, task: asyncio.Task):
+        # Background refreshes are never awaited; retrieve their exception here
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Error refreshing cached response for %s: %s", path, task.exception())
+
+    async def payload(self, path: str) -> Optional[Dict]:
+        """Current payload behind a cached path, refreshed by the same rules as get()"""
+        if await self.get(path) is None:
+            return None
+        return self.routes[path].payload
+
+    async def get(self, path: str) -> Optional[CachedResponse]:
+        """Cached response for path, or None if the path is not cached"""
+        route = self.routes.get(path)
+        if route is None:
+            return None
+
+        entry = route.entry
+        if entry is None or entry.age() > route.ttl + route.stale_ttl:
+            # Cold or too stale to serve: callers share one producer run
+            return await asyncio.shield(self._refresh(path))
+
+        if entry.age() >= route.ttl * self.refresh_ahead:
+            self._refresh(path)
+        return entry
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            for path, route in self.routes.items():
+                if route.entry is not None and route.entry.age() >= route.ttl * self.refresh_ahead:
+                    self._refresh(path)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = 1.0):
+        """Proactively refresh warm entries so readers never hit an expired one"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop(interval))
+
+    async def warm(self):
+        """Populate every route (call at startup)"""
+        await asyncio.gather(*(self._refresh(path) for path in self.routes), return_exceptions=True)
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    def get_stats(self) -> Dict:
+        return {
+            path: {
+                "ttl": route.ttl,
+                "age": round(route.entry.age(), 2) if route.entry else None,
+                "refreshes": route.refreshes,
+                "errors": route.errors
+            }
+            for path, route in self.routes.items()
+        }
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware answering cached GET paths straight from ResponseCache
+    Sends ETag / Cache-Control and answers If-None-Match with 304
+
+        cache = ResponseCache()
+        register_signal_routes(cache, precision_engine)
+        register_analytics_route(cache)
+        app.add_middleware(ResponseCacheMiddleware, cache=cache)
+    """
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or scope["path"] not in self.cache.routes:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            entry = await self.cache.get(scope["path"])
+        except Exception:
+            # No cached copy and the producer failed: let the real endpoint answer
+            await self.app(scope, receive, send)
+            return
+
+        route = self.cache.routes[scope["path"]]
+        remaining = max(int(route.ttl - entry.age()), 0)
+        headers = [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", f"public, max-age={remaining}, stale-while-revalidate={int(route.stale_ttl)}".encode()),
+            (b"age", str(int(entry.age())).encode())
+        ]
+
+        request_headers = dict(scope.get("headers") or [])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode()
+        if entry.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(entry.body)).encode())
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else entry.body})
+
+def register_precision_routes(cache: ResponseCache, engine, timeframes=('5m', '15m', '1h'), ttl: float = 15.0):
+    """Cache /api/trading/precision-signal/{tf} for every timeframe using a PrecisionTradingEngine"""
+    # Signals carry their own timestamp/expiration; the ETag only changes when the
+    # signal changes materially, by the same rules as the push stream
+    detector = SignalChangeDetector()
+    for timeframe in timeframes:
+        async def producer(tf=timeframe):
+            return await engine.generate_trade_recommendation(tf)
+        cache.register(f"/api/trading/precision-signal/{timeframe}", producer, ttl=ttl,
+                       same=lambda previous, signal: not detector.changes(previous, signal))
+
+def _summary(signal: Dict) -> Dict:
+    return {key: signal.get(key) for key in ("action", "confidence", "entry_price", "stop_loss", "take_profit",
+                                             "risk_reward", "expiration")}
+
+def register_signal_routes(cache: ResponseCache, engine, timeframes=('5m', '15m', '1h'), ttl: float = 15.0):
+    """
+    Cache the precision routes plus /api/signals/multi-timeframe and /api/signals/quick-action
+    The aggregate routes read the cached per-timeframe signals instead of recomputing them,
+    and keep their ETag for as long as every underlying signal keeps its own
+    """
+    register_precision_routes(cache, engine, timeframes, ttl)
+    paths = {timeframe: f"/api/trading/precision-signal/{timeframe}" for timeframe in timeframes}
+
+    async def signals() -> Dict[str, Dict]:
+        payloads = await asyncio.gather(*(cache.payload(path) for path in paths.values()), return_exceptions=True)
+        return {timeframe: payload for timeframe, payload in zip(paths, payloads)
+                if isinstance(payload, dict)}
+
+    async def multi_timeframe():
+        by_timeframe = await signals()
+        votes = [signal.get("action") for signal in by_timeframe.values()]
+        buys, sells = votes.count("BUY"), votes.count("SELL")
+        consensus = "BUY" if buys > max(sells, len(votes) / 2) else "SELL" if sells > max(buys, len(votes) / 2) else "HOLD"
+        return {
+            "consensus": consensus,
+            "sentiment": {"BUY": "BULLISH", "SELL": "BEARISH"}.get(consensus, "NEUTRAL"),
+            "agreement": round(max(buys, sells, votes.count("HOLD")) / len(votes), 2) if votes else 0.0,
+            "signals": {timeframe: _summary(signal) for timeframe, signal in by_timeframe.items()},
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def quick_action():
+        by_timeframe = await signals()
+        actionable = [(signal.get("confidence") or 0, timeframe, signal) for timeframe, signal in by_timeframe.items()
+                      if signal.get("action") in ("BUY", "SELL")]
+        if not actionable:
+            return {"action": "HOLD", "timeframe": None, "reason": "No timeframe has an actionable signal",
+                    "timestamp": datetime.now().isoformat()}
+        _, timeframe, signal = max(actionable, key=lambda item: item[:2])
+        return {**_summary(signal), "timeframe": timeframe,
+                "key_triggers": signal.get("key_triggers", [])[:3], "timestamp": datetime.now().isoformat()}
+
+    cache.register("/api/signals/multi-timeframe", multi_timeframe, ttl=ttl)
+    cache.register("/api/signals/quick-action", quick_action, ttl=ttl)
+
+def register_analytics_route(cache: ResponseCache, symbol: str = "BTCUSDT", ttl: float = 30.0):
+    """Cache /api/bitcoin/elite-analytics from the live stream-fed services and the cached signals"""
+    from services.correlation import correlations
+    from services.order_flow import live_order_flow
+    from services.portfolio_risk import portfolio_risk
+    from services.volume_profile import live_volume_levels
+
+    async def producer():
+        analytics = {"symbol": symbol}
+        if "/api/signals/multi-timeframe" in cache.routes:
+            analytics["signals"] = await cache.payload("/api/signals/multi-timeframe")
+        flow = live_order_flow(symbol)
+        analytics["order_flow"] = flow.snapshot() if flow is not None else None
+        analytics["volume_levels"] = live_volume_levels(symbol)
+        analytics["correlations"] = correlations.get_summary() if correlations.symbols else None
+        analytics["portfolio_risk"] = portfolio_risk.get_assessment()
+        analytics["timestamp"] = datetime.now().isoformat()
+        return analytics
+
+    cache.register("/api/bitcoin/elite-analytics", producer, ttl=ttl)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Sequence, Set
+import logging
+
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+try:
+    import fcntl
+except ImportError:  # Windows: no publisher election, every worker fetches for itself
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CANDLE_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+INDICATORS = ("atr", "vwap", "sma_20", "sma_50", "volatility")
+DEFAULT_TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h", "1d")
+
+_MAGIC = 0x4D4B5444  # "MKTD"
+# int64 header slots
+_H_MAGIC, _H_VERSION, _H_ACTIVE, _H_WRITING, _H_PID, _H_HEARTBEAT_NS, _H_TIMEFRAMES, _H_CAPACITY = range(8)
+_HEADER_SLOTS = 8
+
+def compute_indicators(candles: np.ndarray) -> np.ndarray:
+    """The shared indicators for one timeframe's (rows x 6) candle block, in INDICATORS order"""
+    values = np.full(len(INDICATORS), np.nan)
+    if len(candles) < 2:
+        return values
+    high, low, close, volume = candles[:, 2], candles[:, 3], candles[:, 4], candles[:, 5]
+    previous = close[:-1]
+    true_range = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    if len(true_range) >= 14:
+        values[0] = true_range[-14:].mean()
+    if volume.sum() > 0:
+        values[1] = ((high + low + close) / 3 * volume).sum() / volume.sum()
+    if len(close) >= 20:
+        values[2] = close[-20:].mean()
+    if len(close) >= 50:
+        values[3] = close[-50:].mean()
+    values[4] = np.std(np.diff(close) / previous, ddof=1) if len(close) > 2 else np.nan
+    return values
+
+def _open_segment(name: str, size: int = 0, create: bool = False) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    # The segment outlives any one worker: stop the resource tracker from unlinking it at exit
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+@dataclass
+class SharedView:
+    """
+    One published version, read in place from shared memory
+    The arrays stay untouched until the publisher starts writing the version
+    after next (it alternates between two buffers); check valid() after using them
+    """
+    version: int
+    price: float
+    published_at: float
+    candles: Dict[str, np.ndarray]  # timeframe -> (rows x 6) view
+    indicators: Dict[str, Dict[str, float]]
+    _header: np.ndarray
+
+    def valid(self) -> bool:
+        return int(self._header[_H_WRITING]) <= self.version + 1
+
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """DataFrame copies of the candle blocks, for callers that keep them across awaits"""
+        return {tf: pd.DataFrame(np.array(block), columns=CANDLE_FIELDS) for tf, block in self.candles.items()}
+
+class SharedMarketData:
+    """
+    Market data shared by every worker process on the host
+    One worker holds an flock on a lock file and is the publisher: after each
+    exchange fetch it writes prices, candle arrays and indicators into the
+    inactive half of a double-buffered shared memory segment, then flips the
+    active index and bumps the version. Other workers map the same segment and
+    read the active half without copying. If the publisher stops heartbeating
+    (or dies, which releases its lock) readers get None, fetch for themselves,
+    and the next one to take the lock becomes the publisher
+    """
+
+    def __init__(self, name: str = "btc_market_data", timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+                 capacity: int = 500, stale_after: float = 30.0, enabled: Optional[bool] = None):
+        self.name = name
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self.stale_after = stale_after
+        self.enabled = enabled if enabled is not None else os.getenv("SHARED_MARKET_DATA", "0") == "1"
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self.is_publisher = False
+        # Timeframes this worker has written at least once; the refresh loop keeps only these fresh
+        self.published: Set[str] = set()
+        self.stats = {"reads": 0, "stale": 0, "torn": 0, "publishes": 0, "takeovers": 0}
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._lock_file = None
+
+    # -- layout -----------------------------------------------------------------
+
+    @property
+    def _slot_size(self) -> int:
+        """float64s per timeframe: row count, candles, indicators"""
+        return 1 + self.capacity * len(CANDLE_FIELDS) + len(INDICATORS)
+
+    @property
+    def _buffer_size(self) -> int:
+        """float64s per buffer: price, publish time, then one slot per timeframe"""
+        return 2 + len(self.timeframes) * self._slot_size
+
+    @property
+    def _size(self) -> int:
+        return 8 * (_HEADER_SLOTS + 2 * self._buffer_size)
+
+    def _map(self, segment: shared_memory.SharedMemory):
+        self._segment = segment
+        self.header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=segment.buf)
+        self.buffers = None
+        if segment.size >= self._size:
+            self.buffers = np.ndarray((2, self._buffer_size), dtype=np.float64, buffer=segment.buf,
+                                      offset=8 * _HEADER_SLOTS)
+
+    def _matches(self) -> bool:
+        return (self.buffers is not None and int(self.header[_H_MAGIC]) == _MAGIC
+                and int(self.header[_H_TIMEFRAMES]) == len(self.timeframes)
+                and int(self.header[_H_CAPACITY]) == self.capacity)
+
+    def _attach(self) -> bool:
+        if self._segment is not None:
+            return True
+        try:
+            self._map(_open_segment(self.name))
+        except FileNotFoundError:
+            return False
+        if not self._matches():
+            self._release()
+            return False
+        return True
+
+    def _release(self):
+        # Drop our views first; the mapping cannot close while numpy still references it
+        self.header = self.buffers = None
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    # -- publishing -------------------------------------------------------------
+
+    def try_become_publisher(self) -> bool:
+        """Take the publisher lock if no live worker holds it"""
+        if self.is_publisher:
+            return True
+        if not self.enabled or fcntl is None:
+            return False
+        try:
+            self._lock_file = self._lock_file or open(self.lock_path, "a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+
+        if not self._attach():
+            try:
+                self._map(_open_segment(self.name, self._size, create=True))
+            except FileExistsError:
+                # Left behind with another layout: replace it
+                stale = _open_segment(self.name)
+                stale.close()
+                # unlink() unregisters from the tracker, so register it back first
+                resource_tracker.register(stale._name, "shared_memory")
+                stale.unlink()
+                self._map(_open_segment(self.name, self._size, create=True))
+            self.header[:] = 0
+            self.header[_H_TIMEFRAMES] = len(self.timeframes)
+            self.header[_H_CAPACITY] = self.capacity
+            self.header[_H_MAGIC] = _MAGIC
+
+        self.header[_H_PID] = os.getpid()
+        self.is_publisher = True
+        self.stats["takeovers"] += 1
+        logger.info(f"📡 Worker {os.getpid()} is the market data publisher")
+        return True
+
+    def publish(self, price: float, frames: Dict[str, pd.DataFrame]) -> bool:
+        """
+        Write one snapshot if this worker is (or can become) the publisher
+        Timeframes missing from `frames` keep their last published candles
+        """
+        if not self.try_become_publisher():
+            return False
+        try:
+            version = int(self.header[_H_VERSION]) + 1
+            target = version % 2
+            self.header[_H_WRITING] = version
+            buffer = self.buffers[target]
+            previous = self.buffers[int(self.header[_H_ACTIVE])] if version > 1 else None
+            buffer[0] = price
+            buffer[1] = time.time()
+            for i, tf in enumerate(self.timeframes):
+                slot = buffer[2 + i * self._slot_size:2 + (i + 1) * self._slot_size]
+                frame = frames.get(tf)
+                if frame is None or len(frame) == 0:
+                    if previous is None:
+                        slot[0] = 0
+                    else:
+                        slot[:] = previous[2 + i * self._slot_size:2 + (i + 1) * self._slot_size]
+                    continue
+                block = frame[list(CANDLE_FIELDS)].to_numpy(dtype=np.float64)[-self.capacity:]
+                rows = len(block)
+                slot[0] = rows
+                slot[1:1 + rows * len(CANDLE_FIELDS)] = block.ravel()
+                slot[-len(INDICATORS):] = compute_indicators(block)
+                self.published.add(tf)
+            self.header[_H_ACTIVE] = target
+            self.header[_H_VERSION] = version
+            self.header[_H_HEARTBEAT_NS] = time.time_ns()
+            self.stats["publishes"] += 1
+            return True
+        except Exception as e:
+            logger.error("Error publishing shared market data: %s", e)
+            return False
+
+    # -- reading ----------------------------------------------------------------
+
+    def read(self, timeframes: Optional[Sequence[str]] = None) -> Optional[SharedView]:
+        """The latest published version, or None when sharing is off, empty or stale"""
+        if not self.enabled or self.is_publisher or not self._attach():
+            return None
+        age = (time.time_ns() - int(self.header[_H_HEARTBEAT_NS])) / 1e9
+        if int(self.header[_H_VERSION]) == 0 or age > self.stale_after:
+            self.stats["stale"] += 1
+            return None
+
+        for _ in range(3):
+            version = int(self.header[_H_VERSION])
+            active = int(self.header[_H_ACTIVE])
+            if int(self.header[_H_VERSION]) != version or active != version % 2:
+                continue  # caught the flip between the two header writes
+            buffer = self.buffers[active]
+            candles, indicators = {}, {}
+            for tf in timeframes or self.timeframes:
+                if tf not in self.timeframes:
+                    continue
+                i = self.timeframes.index(tf)
+                slot = buffer[2 + i * self._slot_size:2 + (i + 1) * self._slot_size]
+                rows = int(slot[0])
+                if rows == 0:
+                    continue
+                candles[tf] = slot[1:1 + rows * len(CANDLE_FIELDS)].reshape(rows, len(CANDLE_FIELDS))
+                indicators[tf] = {name: float(value) for name, value in zip(INDICATORS, slot[-len(INDICATORS):])
+                                  if not np.isnan(value)}
+            view = SharedView(version=version, price=float(buffer[0]), published_at=float(buffer[1]),
+                              candles=candles, indicators=indicators, _header=self.header)
+            if view.valid():
+                self.stats["reads"] += 1
+                return view
+        self.stats["torn"] += 1
+        return None
+
+    def get_status(self) -> Dict:
+        status = {"enabled": self.enabled, "publisher": self.is_publisher, **self.stats}
+        if self._segment is not None:
+            status.update({
+                "version": int(self.header[_H_VERSION]),
+                "publisher_pid": int(self.header[_H_PID]),
+                "heartbeat_age_seconds": round((time.time_ns() - int(self.header[_H_HEARTBEAT_NS])) / 1e9, 1)
+            })
+        return status
+
+    def close(self):
+        """Give up the publisher role (another worker takes over) and unmap"""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_publisher = False
+        self._release()
+
+# Shared across uvicorn workers when SHARED_MARKET_DATA=1; maps its segment on first use
+shared_market_data = SharedMarketData()
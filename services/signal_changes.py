@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SignalChangeDetector:
+    """
+    Decides whether a recomputed signal differs materially from the last one
+    published for the same (symbol, timeframe). Levels move within a tolerance
+    of max(tick_size, price_tolerance_pct of the level) without counting as a
+    change, and confidence only counts when it crosses a bucket boundary
+    """
+
+    def __init__(self, price_tolerance_pct: float = 0.0005, tick_size: float = 0.01,
+                 confidence_bucket: float = 10.0, heartbeat_interval: float = 30.0):
+        self.price_tolerance_pct = price_tolerance_pct
+        self.tick_size = tick_size
+        self.confidence_bucket = confidence_bucket
+        self.heartbeat_interval = heartbeat_interval
+        self.published: Dict[Tuple[str, str], Dict] = {}
+        self.last_heartbeat: Dict[Tuple[str, str], float] = {}
+        self.stats = Counter()
+
+    def _moved(self, old: Optional[float], new: Optional[float]) -> bool:
+        if old is None or new is None:
+            return old != new
+        return abs(new - old) > max(self.tick_size, abs(old) * self.price_tolerance_pct)
+
+    def _bucket(self, confidence: Optional[float]) -> Optional[int]:
+        return None if confidence is None else int(confidence // self.confidence_bucket)
+
+    def changes(self, previous: Optional[Dict], signal: Dict) -> List[str]:
+        """Reasons the signal must be published; empty when it is materially the same"""
+        if previous is None:
+            return ["first"]
+
+        reasons = []
+        if previous.get("action") != signal.get("action"):
+            reasons.append("action")
+        if self._moved(previous.get("entry_price"), signal.get("entry_price")):
+            reasons.append("entry_price")
+        if self._moved(previous.get("stop_loss"), signal.get("stop_loss")):
+            reasons.append("stop_loss")
+
+        old_targets = [tp["level"] for tp in previous.get("take_profit") or []]
+        new_targets = [tp["level"] for tp in signal.get("take_profit") or []]
+        if len(old_targets) != len(new_targets) or any(self._moved(a, b) for a, b in zip(old_targets, new_targets)):
+            reasons.append("take_profit")
+
+        if self._bucket(previous.get("confidence")) != self._bucket(signal.get("confidence")):
+            reasons.append("confidence")
+
+        was_stale = (previous.get("market_context") or {}).get("stale_data", False)
+        if was_stale != (signal.get("market_context") or {}).get("stale_data", False):
+            reasons.append("data_freshness")
+
+        expiration = previous.get("expiration")
+        if expiration and datetime.fromisoformat(expiration) <= datetime.now():
+            reasons.append("expired")
+
+        return reasons
+
+    def evaluate(self, signal: Dict, symbol: str = "BTCUSDT") -> Tuple[str, Optional[Dict]]:
+        """
+        ("publish", signal) when it changed, ("heartbeat", payload) when a heartbeat
+        is due for an unchanged signal, else ("skip", None)
+        """
+        key = (symbol, signal.get("timeframe"))
+        reasons = self.changes(self.published.get(key), signal)
+        now = time.monotonic()
+
+        if reasons:
+            self.published[key] = signal
+            self.last_heartbeat[key] = now
+            self.stats["published"] += 1
+            self.stats.update(f"reason:{reason}" for reason in reasons)
+            return "publish", signal
+
+        self.stats["unchanged"] += 1
+        if now - self.last_heartbeat.get(key, 0.0) < self.heartbeat_interval:
+            return "skip", None
+
+        self.last_heartbeat[key] = now
+        self.stats["heartbeats"] += 1
+        previous = self.published[key]
+        return "heartbeat", {
+            "symbol": symbol,
+            "timeframe": signal.get("timeframe"),
+            "action": previous.get("action"),
+            "published_at": previous.get("timestamp"),
+            "checked_at": signal.get("timestamp") or datetime.now().isoformat()
+        }
+
+    def get_stats(self) -> Dict:
+        published = self.stats["published"]
+        unchanged = self.stats["unchanged"]
+        return {
+            **self.stats,
+            "tracked": len(self.published),
+            "suppression_ratio": round(unchanged / (published + unchanged), 3) if published + unchanged else 0.0
+        }
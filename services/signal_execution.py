@@ -1,12 +1,29 @@
+from __future__ import annotations
+
 import asyncio
-import httpx
-import numpy as np
-import pandas as pd
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+from services.circuit_breaker import klines_breaker, market_snapshots, price_breaker
+from services.monte_carlo import outcome_simulator
+from services.order_flow import live_order_flow
+from services.portfolio_risk import portfolio_risk
+from services.price_sources import HedgedPriceFetcher, price_fetcher
+from services.profiling import profiler
+from services.rate_limiter import Priority, binance_get
+from services.resampler import local_candles
+from services.shared_market_data import shared_market_data
+from services.startup import lazy_import
+from services.strategy_config import ConfigStore, config_store
+from services.volume_profile import live_volume_levels, nearest_levels
+
+httpx = lazy_import("httpx")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -23,21 +40,48 @@ class TradingSignal:
     key_triggers: List[str]
 
 class SignalExecutionEngine:
-    def __init__(self):
-        self.client = httpx.AsyncClient()
+    # Publisher-only loop that keeps the shared snapshot fresh between plans: one per
+    # process whichever engine instance started it, and stopped by that instance's close()
+    _refresh_task: Optional[asyncio.Task] = None
+    _refresh_owner: Optional["SignalExecutionEngine"] = None
+
+    def __init__(self, config: Optional[ConfigStore] = None, prices: Optional[HedgedPriceFetcher] = None):
+        self.config = config or config_store
+        self.prices = prices or price_fetcher
+        # Created on first request so constructing the engine stays cheap
+        self._client: Optional[httpx.AsyncClient] = None
         self.current_price = None
         self.price_data = {}
+        # Indicators computed by the shared market data publisher, per timeframe
+        self.indicators: Dict[str, Dict[str, float]] = {}
+        # Monotonic time of the last fully successful refresh; None until the first one
+        self.last_update: Optional[float] = None
+        # Monotonic time each timeframe's candles were last refreshed
+        self.updated_at: Dict[str, float] = {}
+        self.data_is_live = False
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        return self._client
         
+    @profiler.profile("execution.generate_execution_plan")
     async def generate_execution_plan(self, timeframe: str) -> Dict:
         """Generate precise execution plan for given timeframe"""
         try:
             # Get market context
-            await self._update_market_data()
+            with profiler.span("market_data"):
+                await self._update_market_data(self._plan_timeframes(timeframe))
+            data_age = self._get_data_age(self._plan_timeframes(timeframe))
+            if not self.current_price or data_age is None or data_age > market_snapshots.max_age:
+                return self._get_fallback_signal(timeframe)
             market_regime = await self._get_market_regime()
             volatility = await self._get_volatility_index()
             
             # Calculate precise levels
-            entry, take_profit, stop_loss = await self._calculate_levels(timeframe, market_regime, volatility)
+            with profiler.span("levels"):
+                entry, take_profit, stop_loss = await self._calculate_levels(timeframe, market_regime, volatility)
             
             # Determine action
             action = await self._determine_action(timeframe)
@@ -68,111 +112,198 @@ class SignalExecutionEngine:
                 }
             }
             
+            # Minimum R:R comes from the strategy config, like the levels themselves
+            rr_check = self.config.current.risk_reward_check(timeframe, action, confidence, signal["risk_reward"])
+            signal["min_risk_reward"] = rr_check["min_risk_reward"]
+            if rr_check["warning"]:
+                signal["key_triggers"].append(rr_check["warning"])
+            
+            flow = live_order_flow("BTCUSDT")
+            session_vwap = flow.session_vwap() if flow is not None else None
+            if session_vwap:
+                # Context only: the 1h entry anchors to the timeframe's candle VWAP
+                signal["market_context"]["session_vwap"] = round(session_vwap, 2)
+            
+            if not self.data_is_live:
+                # Exchange unreachable or circuit open: levels come from the last good data
+                signal["market_context"]["data_age_seconds"] = round(data_age, 1)
+                signal["market_context"]["stale_data"] = True
+                signal["key_triggers"].append(f"Exchange unavailable - levels from data {data_age:.0f}s old")
+            
+            with profiler.span("outcome_simulation"):
+                outcome = outcome_simulator.simulate_signal(signal, self.price_data.get(timeframe))
+            if outcome:
+                signal["outcome_simulation"] = outcome
+            
+            portfolio_risk.start_seeding()
+            portfolio_risk.on_price("BTCUSDT", self.current_price)
+            # position_size is a percentage of account equity here
+            portfolio_risk.track_signal(signal, notional_usd=signal["position_size"] / 100 * portfolio_risk.equity,
+                                        source="execution")
+            
             return signal
             
         except Exception as e:
-            logger.error(f"Error generating execution plan: {e}")
+            logger.error("Error generating execution plan: %s", e)
             return self._get_fallback_signal(timeframe)
 
-    async def _update_market_data(self):
-        """Update current market data"""
+    def _plan_timeframes(self, timeframe: str) -> List[str]:
+        """Candle timeframes a plan reads: its own, plus 1h for regime and volatility"""
+        return [timeframe] if timeframe == '1h' else [timeframe, '1h']
+
+    async def _update_market_data(self, timeframes: Iterable[str] = ('1h',)):
+        """Update current market data (keeps the last good data when the exchange is down)"""
+        self.data_is_live = False
+        if self._read_shared_market_data(timeframes):
+            return
         try:
-            url = "https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT"
-            response = await self.client.get(url)
-            data = response.json()
-            self.current_price = float(data['price'])
-            
-            # Get OHLCV data for different timeframes
-            for tf in ['5m', '15m', '1h']:
-                ohlcv_url = f"https://api.binance.com/api/v3/klines?symbol=BTCUSDT&interval={tf}&limit=100"
-                ohlcv_response = await self.client.get(ohlcv_url)
-                ohlcv_data = ohlcv_response.json()
-                
-                # Convert to DataFrame
-                df = pd.DataFrame(ohlcv_data, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_asset_volume', 'number_of_trades',
-                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-                ])
-                
-                # Convert to numeric
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    df[col] = pd.to_numeric(df[col])
-                
-                self.price_data[tf] = df
-                
+            await self._fetch_market_data(timeframes)
         except Exception as e:
-            logger.error(f"Error updating market data: {e}")
-            # Fallback price
-            self.current_price = 105000  # Fallback price
+            logger.error("Error updating market data: %s", e)
+
+    async def _fetch_market_data(self, timeframes: Iterable[str], priority: Priority = Priority.LIVE):
+        """Fetch price and candles from the exchange and publish them (raises on failure)"""
+        quote = await price_breaker.call(self.prices.fetch)
+        
+        # Only the timeframes asked for, resampled locally when possible;
+        # every REST fallback costs exchange weight
+        price_data = {}
+        for tf in timeframes:
+            local = local_candles(tf, 100)
+            price_data[tf] = local if local is not None else await klines_breaker.call(self._fetch_klines, tf,
+                                                                                       priority=priority)
+        
+        # Merge: timeframes this plan did not ask for keep their own (older) data and timestamps
+        now = time.monotonic()
+        self.current_price = quote.price
+        self.price_data.update(price_data)
+        for tf in price_data:
+            self.indicators.pop(tf, None)
+            self.updated_at[tf] = now
+        self.last_update = now
+        self.data_is_live = True
+        # No-op unless this worker is (or can become) the designated publisher
+        if shared_market_data.publish(quote.price, price_data):
+            self._start_publisher_refresh()
+
+    def _start_publisher_refresh(self):
+        engine = SignalExecutionEngine
+        if engine._refresh_task is None or engine._refresh_task.done():
+            engine._refresh_task = asyncio.create_task(self._refresh_shared_market_data())
+            engine._refresh_owner = self
+
+    async def _refresh_shared_market_data(self):
+        """
+        Republish the shared timeframes while this worker holds the publisher lock
+        Without it an idle publisher lets the snapshot go stale while still holding
+        the lock, and every other worker falls back to fetching for itself. Only
+        timeframes some plan has published are refetched, not every shared slot
+        """
+        interval = shared_market_data.stale_after / 3
+        while shared_market_data.is_publisher:
+            await asyncio.sleep(interval)
+            try:
+                timeframes = [tf for tf in shared_market_data.timeframes if tf in shared_market_data.published]
+                await self._fetch_market_data(timeframes, priority=Priority.NORMAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error refreshing shared market data: %s", e)
+
+    def _read_shared_market_data(self, timeframes: Iterable[str]) -> bool:
+        """Take prices and candles another worker already fetched; False when this worker must fetch"""
+        view = shared_market_data.read(timeframes)
+        if view is None or any(tf not in view.candles for tf in timeframes):
+            return False
+        # The engine keeps candles across awaits, so it copies the small blocks before validating
+        price_data = view.frames()
+        if not view.valid():
+            return False
+        published = time.monotonic() - max(time.time() - view.published_at, 0.0)
+        self.current_price = view.price
+        self.price_data.update(price_data)
+        for tf in price_data:
+            self.indicators.pop(tf, None)
+            self.updated_at[tf] = published
+        self.indicators.update(view.indicators)
+        self.last_update = published
+        self.data_is_live = True
+        return True
+
+    async def _fetch_klines(self, timeframe: str, limit: int = 100, priority: Priority = Priority.LIVE) -> pd.DataFrame:
+        """Fetch one timeframe of candles (raises on failure)"""
+        params = {"symbol": "BTCUSDT", "interval": timeframe, "limit": limit}
+        ohlcv_response = await binance_get(self.client, "/api/v3/klines", params, priority=priority)
+        ohlcv_response.raise_for_status()
+        ohlcv_data = ohlcv_response.json()
+        
+        # Convert to DataFrame
+        df = pd.DataFrame(ohlcv_data, columns=[
+            'timestamp', 'open', 'high', 'low', 'close', 'volume',
+            'close_time', 'quote_asset_volume', 'number_of_trades',
+            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+        ])
+        
+        # Convert to numeric
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = pd.to_numeric(df[col])
+        
+        return df
+
+    def _get_data_age(self, timeframes: Iterable[str]) -> Optional[float]:
+        """Seconds since the oldest of the price and these timeframes' candles was refreshed; None if any is missing"""
+        timestamps = [self.updated_at.get(tf) for tf in timeframes] + [self.last_update]
+        if any(timestamp is None for timestamp in timestamps):
+            return None
+        return time.monotonic() - min(timestamps)
 
     async def _calculate_levels(self, timeframe: str, regime: str, volatility: float) -> Tuple[float, List[float], float]:
         """Calculate precise entry, take profit, and stop loss levels"""
         try:
             if not self.current_price:
-                await self._update_market_data()
+                await self._update_market_data(self._plan_timeframes(timeframe))
                 
             current_price = self.current_price
             atr = await self._get_atr(timeframe)
             pivot = await self._get_pivot_point(timeframe)
             
-            if timeframe == "5m":
-                # Scalping strategy
-                if regime == "bullish":
-                    entry = current_price * 0.9998  # Slightly below current price
-                    tp1 = entry + (atr * 0.8)
-                    tp2 = entry + (atr * 1.2)
-                    tp3 = entry + (atr * 1.8)
-                    stop_loss = entry - (atr * 0.6)
-                else:
-                    entry = current_price * 1.0002  # Slightly above current price
-                    tp1 = entry - (atr * 0.8)
-                    tp2 = entry - (atr * 1.2)
-                    tp3 = entry - (atr * 1.8)
-                    stop_loss = entry + (atr * 0.6)
-                    
-            elif timeframe == "15m":
-                # Swing strategy
-                if regime == "bullish":
-                    entry = current_price * 0.999
-                    tp1 = entry + (atr * 1.5)
-                    tp2 = entry + (atr * 2.2)
-                    tp3 = entry + (atr * 3.0)
-                    stop_loss = entry - (atr * 1.0)
-                else:
-                    entry = current_price * 1.001
-                    tp1 = entry - (atr * 1.5)
-                    tp2 = entry - (atr * 2.2)
-                    tp3 = entry - (atr * 3.0)
-                    stop_loss = entry + (atr * 1.0)
-                    
-            elif timeframe == "1h":
-                # Position strategy
-                vwap = await self._calculate_vwap(timeframe)
-                if regime == "bullish":
-                    entry = min(current_price * 0.998, vwap)
-                    tp1 = entry + (atr * 2.0)
-                    tp2 = entry + (atr * 3.0)
-                    tp3 = entry + (atr * 4.0)
-                    stop_loss = entry - (atr * 1.5)
-                else:
-                    entry = max(current_price * 1.002, vwap)
-                    tp1 = entry - (atr * 2.0)
-                    tp2 = entry - (atr * 3.0)
-                    tp3 = entry - (atr * 4.0)
-                    stop_loss = entry + (atr * 1.5)
+            # Entry offset and ATR multipliers come from the strategy config (1h also anchors to VWAP)
+            levels = self.config.current.execution_levels[timeframe]
+            offset = levels['entry_offset']
+            tp1_mult, tp2_mult, tp3_mult = levels['tp_multipliers']
+            sl_mult = levels['sl_multiplier']
+            
+            if regime == "bullish":
+                entry = current_price * (1 - offset)
+                if levels.get('use_vwap'):
+                    entry = min(entry, await self._calculate_vwap(timeframe))
+                tp1 = entry + (atr * tp1_mult)
+                tp2 = entry + (atr * tp2_mult)
+                tp3 = entry + (atr * tp3_mult)
+                stop_loss = entry - (atr * sl_mult)
+            else:
+                entry = current_price * (1 + offset)
+                if levels.get('use_vwap'):
+                    entry = max(entry, await self._calculate_vwap(timeframe))
+                tp1 = entry - (atr * tp1_mult)
+                tp2 = entry - (atr * tp2_mult)
+                tp3 = entry - (atr * tp3_mult)
+                stop_loss = entry + (atr * sl_mult)
             
             return entry, [tp1, tp2, tp3], stop_loss
             
         except Exception as e:
-            logger.error(f"Error calculating levels: {e}")
+            logger.error("Error calculating levels: %s", e)
             # Fallback levels
-            current_price = self.current_price or 105000
+            current_price = self.current_price
             return current_price, [current_price * 1.01, current_price * 1.02, current_price * 1.03], current_price * 0.99
 
     async def _get_atr(self, timeframe: str) -> float:
         """Calculate Average True Range"""
         try:
+            shared = self.indicators.get(timeframe, {}).get("atr")
+            if shared is not None:
+                return shared
             if timeframe not in self.price_data:
                 return 500  # Fallback ATR
                 
@@ -191,14 +322,14 @@ class SignalExecutionEngine:
             return float(atr) if not pd.isna(atr) else 500
             
         except Exception as e:
-            logger.error(f"Error calculating ATR: {e}")
+            logger.error("Error calculating ATR: %s", e)
             return 500
 
     async def _get_pivot_point(self, timeframe: str) -> Dict[str, float]:
         """Calculate pivot points"""
         try:
             if timeframe not in self.price_data:
-                current_price = self.current_price or 105000
+                current_price = self.current_price
                 return {
                     "p": current_price,
                     "r1": current_price * 1.005,
@@ -219,8 +350,8 @@ class SignalExecutionEngine:
             return {"p": pivot, "r1": r1, "s1": s1}
             
         except Exception as e:
-            logger.error(f"Error calculating pivot points: {e}")
-            current_price = self.current_price or 105000
+            logger.error("Error calculating pivot points: %s", e)
+            current_price = self.current_price
             return {
                 "p": current_price,
                 "r1": current_price * 1.005,
@@ -231,7 +362,7 @@ class SignalExecutionEngine:
         """Calculate Volume Weighted Average Price"""
         try:
             if timeframe not in self.price_data:
-                return self.current_price or 105000
+                return self.current_price
                 
             df = self.price_data[timeframe]
             typical_price = (df['high'].astype(float) + df['low'].astype(float) + df['close'].astype(float)) / 3
@@ -241,8 +372,8 @@ class SignalExecutionEngine:
             return float(vwap)
             
         except Exception as e:
-            logger.error(f"Error calculating VWAP: {e}")
-            return self.current_price or 105000
+            logger.error("Error calculating VWAP: %s", e)
+            return self.current_price
 
     async def _get_market_regime(self) -> str:
         """Determine current market regime"""
@@ -269,7 +400,7 @@ class SignalExecutionEngine:
                 return "neutral"
                 
         except Exception as e:
-            logger.error(f"Error determining market regime: {e}")
+            logger.error("Error determining market regime: %s", e)
             return "neutral"
 
     async def _get_volatility_index(self) -> float:
@@ -285,7 +416,7 @@ class SignalExecutionEngine:
             return float(volatility) if not pd.isna(volatility) else 0.02
             
         except Exception as e:
-            logger.error(f"Error calculating volatility: {e}")
+            logger.error("Error calculating volatility: %s", e)
             return 0.02
 
     async def _determine_action(self, timeframe: str) -> str:
@@ -302,7 +433,7 @@ class SignalExecutionEngine:
                 return "HOLD"
                 
         except Exception as e:
-            logger.error(f"Error determining action: {e}")
+            logger.error("Error determining action: %s", e)
             return "HOLD"
 
     async def _calculate_confidence(self, timeframe: str) -> float:
@@ -324,15 +455,25 @@ class SignalExecutionEngine:
                 base_confidence -= 15
                 
             # Timeframe adjustment
-            if timeframe == "1h":
+            if timeframe in ("1h", "4h", "1d"):
                 base_confidence += 5
             elif timeframe == "5m":
                 base_confidence -= 5
                 
+            # Order-flow confirmation
+            flow = live_order_flow("BTCUSDT")
+            if flow is not None and regime in ["bullish", "bearish"]:
+                direction = 1 if regime == "bullish" else -1
+                imbalance = flow.imbalance(timeframe) * direction
+                if imbalance > 0.1:
+                    base_confidence += 5
+                elif imbalance < -0.1:
+                    base_confidence -= 5
+                
             return min(max(base_confidence, 30), 95)  # Cap between 30-95%
             
         except Exception as e:
-            logger.error(f"Error calculating confidence: {e}")
+            logger.error("Error calculating confidence: %s", e)
             return 60
 
     async def _calculate_position_size(self, timeframe: str, volatility: float) -> float:
@@ -351,7 +492,7 @@ class SignalExecutionEngine:
             # Adjust for timeframe
             if timeframe == "5m":
                 timeframe_multiplier = 0.5  # Smaller positions for scalping
-            elif timeframe == "1h":
+            elif timeframe in ("1h", "4h", "1d"):
                 timeframe_multiplier = 1.5  # Larger positions for swing
             else:
                 timeframe_multiplier = 1.0
@@ -360,7 +501,7 @@ class SignalExecutionEngine:
             return min(position_size, 5.0)  # Max 5% position
             
         except Exception as e:
-            logger.error(f"Error calculating position size: {e}")
+            logger.error("Error calculating position size: %s", e)
             return 2.0
 
     def _get_expiration_time(self, timeframe: str) -> timedelta:
@@ -371,6 +512,10 @@ class SignalExecutionEngine:
             return timedelta(minutes=45)
         elif timeframe == "1h":
             return timedelta(hours=3)
+        elif timeframe == "4h":
+            return timedelta(hours=12)
+        elif timeframe == "1d":
+            return timedelta(days=3)
         else:
             return timedelta(hours=1)
 
@@ -386,7 +531,7 @@ class SignalExecutionEngine:
             return round(reward / risk, 2)
             
         except Exception as e:
-            logger.error(f"Error calculating risk-reward: {e}")
+            logger.error("Error calculating risk-reward: %s", e)
             return 1.0
 
     async def _get_key_triggers(self, timeframe: str) -> List[str]:
@@ -394,10 +539,11 @@ class SignalExecutionEngine:
         try:
             triggers = []
             
-            # Price-based triggers
+            # Price-based triggers: nearest volume nodes, else fixed 2% bands
             if self.current_price:
-                resistance = self.current_price * 1.02
-                support = self.current_price * 0.98
+                nodes = nearest_levels(live_volume_levels("BTCUSDT") or {}, self.current_price)
+                resistance = nodes["resistance"] or self.current_price * 1.02
+                support = nodes["support"] or self.current_price * 0.98
                 triggers.extend([
                     f"Watch resistance at ${resistance:,.2f}",
                     f"Watch support at ${support:,.2f}"
@@ -413,16 +559,40 @@ class SignalExecutionEngine:
                 triggers.append("Re-evaluate at next 1h candle")
             elif timeframe == "1h":
                 triggers.append("Review position at 4h close")
+            elif timeframe == "4h":
+                triggers.append("Review position at daily close")
+            elif timeframe == "1d":
+                triggers.append("Review position at weekly open")
                 
             return triggers
             
         except Exception as e:
-            logger.error(f"Error getting key triggers: {e}")
+            logger.error("Error getting key triggers: %s", e)
             return ["Monitor price action", "Watch volume"]
 
     def _get_fallback_signal(self, timeframe: str) -> Dict:
         """Fallback signal when main calculation fails"""
-        current_price = self.current_price or 105000
+        current_price = self.current_price
+        
+        if not current_price:
+            # No price has ever been fetched: report no levels rather than invented ones
+            return {
+                "timeframe": timeframe,
+                "action": "HOLD",
+                "entry_price": 0,
+                "take_profit": [],
+                "stop_loss": 0,
+                "position_size": 0,
+                "confidence": 0,
+                "expiration": datetime.now().isoformat(),
+                "risk_reward": 0,
+                "key_triggers": ["Market data unavailable", "Use manual analysis"],
+                "market_context": {
+                    "regime": "unknown",
+                    "volatility": 0,
+                    "current_price": None
+                }
+            }
         
         return {
             "timeframe": timeframe,
@@ -447,5 +617,17 @@ class SignalExecutionEngine:
         }
 
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose() 
\ No newline at end of file
+        """Stop the refresh loop this engine started, then close the HTTP client it would reopen"""
+        engine = SignalExecutionEngine
+        task = engine._refresh_task
+        if engine._refresh_owner is self and task is not None:
+            engine._refresh_task = engine._refresh_owner = None
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None 
\ No newline at end of file
@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+
+import asyncio
+import bisect
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = os.getenv("SIGNAL_JOURNAL_DIR", "signal_journal")
+
+# payload length, crc32, seq, timestamp (microseconds), kind; the crc covers the
+# payload followed by the seq/timestamp/kind fields
+RECORD_HEADER = struct.Struct("<IIQqB")
+_CRC_FIELDS = struct.Struct("<QqB")
+
+KIND_SIGNAL = 1
+KIND_OUTCOME = 2
+
+ACTION_NAMES = {"BUY": "Buy", "SELL": "Sell", "HOLD": "Wait"}
+# Timeframes the trading_signals validator accepts
+STORED_TIMEFRAMES = ("15m", "1h", "4h", "1d")
+
+class JournalRecord(NamedTuple):
+    seq: int
+    timestamp_us: int
+    kind: int
+    data: Dict
+
+@dataclass
+class Segment:
+    """One journal file; sealed segments carry a .idx sidecar with the sparse index"""
+    path: str
+    first_seq: int
+    last_seq: int = 0
+    first_ts: int = 0
+    last_ts: int = 0
+    size: int = 0
+    records: int = 0
+    # Sparse index: every Nth record's timestamp, seq and file offset
+    index_ts: List[int] = field(default_factory=list)
+    index_seq: List[int] = field(default_factory=list)
+    index_offset: List[int] = field(default_factory=list)
+    # Latest signal seq per "symbol:timeframe" in this segment, for compaction
+    latest: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def index_path(self) -> str:
+        return self.path[:-len(".log")] + ".idx"
+
+    def note(self, seq: int, ts: int, offset: int, index_interval: int, key: Optional[str] = None):
+        if self.records == 0:
+            self.first_ts = ts
+            self.first_seq = seq
+        if self.records % index_interval == 0:
+            self.index_ts.append(ts)
+            self.index_seq.append(seq)
+            self.index_offset.append(offset)
+        if key is not None:
+            self.latest[key] = seq
+        self.last_seq = seq
+        self.last_ts = ts
+        self.records += 1
+
+    def offset_for(self, since_seq: Optional[int], since_ts: Optional[int]) -> int:
+        """File offset of the last indexed record at or before the requested position"""
+        position = 0
+        if since_seq is not None:
+            position = max(position, bisect.bisect_right(self.index_seq, since_seq) - 1)
+        if since_ts is not None:
+            position = max(position, bisect.bisect_left(self.index_ts, since_ts) - 1)
+        return self.index_offset[position] if self.index_offset and position >= 0 else 0
+
+    def to_index(self) -> Dict:
+        return {
+            "first_seq": self.first_seq, "last_seq": self.last_seq,
+            "first_ts": self.first_ts, "last_ts": self.last_ts,
+            "size": self.size, "records": self.records,
+            "index": [self.index_ts, self.index_seq, self.index_offset],
+            "latest": self.latest
+        }
+
+    @classmethod
+    def from_index(cls, path: str, data: Dict) -> "Segment":
+        index_ts, index_seq, index_offset = data["index"]
+        return cls(path=path, first_seq=data["first_seq"], last_seq=data["last_seq"],
+                   first_ts=data["first_ts"], last_ts=data["last_ts"], size=data["size"],
+                   records=data["records"], index_ts=index_ts, index_seq=index_seq,
+                   index_offset=index_offset, latest=data["latest"])
+
+def _signal_key(data: Dict) -> str:
+    return f"{data.get('symbol', 'BTCUSDT')}:{data.get('timeframe')}"
+
+def _read_records(path: str, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int, int, bytes]]:
+    """(offset, seq, ts, kind, payload) for every intact record; stops at a torn or corrupt one"""
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while end is None or offset < end:
+            header = handle.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, crc, seq, ts, kind = RECORD_HEADER.unpack(header)
+            payload = handle.read(length)
+            if len(payload) < length or zlib.crc32(header[8:], zlib.crc32(payload)) != crc:
+                return
+            yield offset, seq, ts, kind, payload
+            offset += RECORD_HEADER.size + length
+
+def _fdatasync(fd: int):
+    # fdatasync skips the metadata flush where the platform has it
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+class SignalJournal:
+    """
+    Append-only, length-prefixed binary journal of signals and outcome events
+    append() only packs the record into a memory buffer; a flusher thread writes
+    and fsyncs whatever accumulated since its last pass in one go (group commit),
+    so the signal path never waits on the disk or on MongoDB. Segments rotate at
+    `segment_bytes` and keep a sparse timestamp/seq index for seeking
+    """
+
+    def __init__(self, directory: str = DEFAULT_JOURNAL_DIR, segment_bytes: int = 64 * 1024 * 1024,
+                 commit_interval: float = 0.005, index_interval: int = 256, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.commit_interval = commit_interval
+        self.index_interval = index_interval
+        self.fsync = fsync
+        self.segments: List[Segment] = []
+        self.next_seq = 1
+        self.last_ts = 0
+        self.durable_seq = 0
+        self.forwarded_seq = 0
+        self.stats = {"appended": 0, "commits": 0, "bytes": 0, "rotations": 0, "truncated_bytes": 0}
+        self._buffer = bytearray()
+        self._pending: List[Tuple[int, int, int, Optional[str]]] = []  # (seq, ts, length, key)
+        self._lock = threading.Lock()
+        self._durable = threading.Condition(threading.Lock())
+        self._wake = threading.Event()
+        self._opened = False
+        self._closing = False
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -- opening and recovery -------------------------------------------------
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"journal-{first_seq:020d}.log")
+
+    def _scan(self, path: str, first_seq: int) -> Segment:
+        segment = Segment(path=path, first_seq=first_seq)
+        for offset, seq, ts, kind, payload in _read_records(path):
+            key = _signal_key(json.loads(payload)) if kind == KIND_SIGNAL else None
+            segment.note(seq, ts, offset, self.index_interval, key)
+            segment.size = offset + RECORD_HEADER.size + len(payload)
+        return segment
+
+    def _write_index(self, segment: Segment):
+        temporary = segment.index_path + ".tmp"
+        with open(temporary, "w") as handle:
+            json.dump(segment.to_index(), handle, separators=(",", ":"))
+        os.replace(temporary, segment.index_path)
+
+    def _delete_files(self, segment: Segment):
+        os.remove(segment.path)
+        if os.path.exists(segment.index_path):
+            os.remove(segment.index_path)
+
+    def _load_segment(self, path: str, sealed: bool) -> Segment:
+        first_seq = int(os.path.basename(path)[len("journal-"):-len(".log")])
+        if sealed and os.path.exists(path[:-len(".log")] + ".idx"):
+            try:
+                with open(path[:-len(".log")] + ".idx") as handle:
+                    segment = Segment.from_index(path, json.load(handle))
+                if segment.size == os.path.getsize(path):
+                    return segment
+            except Exception as e:
+                logger.warning("Rebuilding journal index for %s: %s", path, e)
+
+        segment = self._scan(path, first_seq)
+        actual = os.path.getsize(path)
+        if actual > segment.size:
+            # Torn write from a crash mid-commit: nothing after it was ever acknowledged
+            os.truncate(path, segment.size)
+            self.stats["truncated_bytes"] += actual - segment.size
+            logger.warning("⚠️ Truncated %s torn bytes from %s", actual - segment.size, path)
+        if sealed:
+            self._write_index(segment)
+        return segment
+
+    def open(self):
+        """Recover segments from disk; called implicitly by the first append or replay"""
+        with self._lock:
+            if self._opened:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            paths = sorted(glob.glob(os.path.join(self.directory, "journal-*.log")))
+            segments = [self._load_segment(path, sealed=i < len(paths) - 1) for i, path in enumerate(paths)]
+            # A sealed segment left empty (a crash right after rotating, or a torn first record) holds nothing
+            for segment in segments[:-1]:
+                if not segment.records:
+                    self._delete_files(segment)
+            self.segments = [segment for segment in segments if segment.records or segment is segments[-1]]
+
+            last = next((segment for segment in reversed(self.segments) if segment.records), None)
+            if last is not None:
+                self.next_seq = last.last_seq + 1
+                self.last_ts = last.last_ts
+            self.durable_seq = self.next_seq - 1
+            if not self.segments:
+                self.segments.append(Segment(path=self._segment_path(self.next_seq), first_seq=self.next_seq))
+
+            self._file = open(self.segments[-1].path, "ab", buffering=0)
+            self._closing = False
+            self._thread = threading.Thread(target=self._run, name="signal-journal", daemon=True)
+            self._thread.start()
+            self._opened = True
+            logger.info(f"📒 Signal journal open at seq {self.next_seq} ({len(self.segments)} segments)")
+
+    # -- appending ------------------------------------------------------------
+
+    def append(self, kind: int, data: Dict, key: Optional[str] = None) -> int:
+        """Buffer one record and return its sequence number; durability follows within commit_interval"""
+        if not self._opened:
+            self.open()
+        payload = json.dumps(data, separators=(",", ":"), default=str).encode()
+        payload_crc = zlib.crc32(payload)
+        with self._lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            # Timestamps never go backwards, so the index stays sorted across clock steps
+            ts = max(time.time_ns() // 1000, self.last_ts)
+            self.last_ts = ts
+            crc = zlib.crc32(_CRC_FIELDS.pack(seq, ts, kind), payload_crc)
+            self._buffer += RECORD_HEADER.pack(len(payload), crc, seq, ts, kind)
+            self._buffer += payload
+            self._pending.append((seq, ts, RECORD_HEADER.size + len(payload), key))
+        self._wake.set()
+        return seq
+
+    def append_signal(self, signal: Dict, symbol: str = "BTCUSDT") -> int:
+        data = {"symbol": symbol, **signal}
+        return self.append(KIND_SIGNAL, data, _signal_key(data))
+
+    def append_outcome(self, signal_seq: int, result: str, profit_loss_usd: float = 0.0) -> int:
+        return self.append(KIND_OUTCOME, {"signal_seq": signal_seq, "result": result,
+                                          "profit_loss_usd": profit_loss_usd})
+
+    def _commit(self) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            buffer, pending = self._buffer, self._pending
+            self._buffer, self._pending = bytearray(), []
+
+        segment = self.segments[-1]
+        offset = segment.size
+        self._file.write(buffer)
+        if self.fsync:
+            _fdatasync(self._file.fileno())
+        for seq, ts, length, key in pending:
+            segment.note(seq, ts, offset, self.index_interval, key)
+            offset += length
+        segment.size = offset
+
+        self.stats["commits"] += 1
+        self.stats["appended"] += len(pending)
+        self.stats["bytes"] += len(buffer)
+        with self._durable:
+            self.durable_seq = pending[-1][0]
+            self._durable.notify_all()
+
+        if segment.size >= self.segment_bytes:
+            self._rotate()
+        return True
+
+    def _rotate(self):
+        sealed = self.segments[-1]
+        self._file.close()
+        self._write_index(sealed)
+        # Appends buffered during the commit carry later seqs; the next one written is durable_seq + 1
+        first_seq = self.durable_seq + 1
+        segment = Segment(path=self._segment_path(first_seq), first_seq=first_seq)
+        self._file = open(segment.path, "ab", buffering=0)
+        with self._lock:
+            self.segments.append(segment)
+        self.stats["rotations"] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let concurrent appends pile up so one fsync covers all of them
+            time.sleep(self.commit_interval)
+            self._wake.clear()
+            try:
+                self._commit()
+            except Exception as e:
+                logger.error("Error committing signal journal: %s", e)
+                time.sleep(1.0)
+                self._wake.set()
+            if self._closing and not self._pending:
+                return
+
+    def sync(self, seq: Optional[int] = None, timeout: Optional[float] = 5.0) -> bool:
+        """Block until `seq` (default: everything appended so far) is on disk"""
+        if not self._opened:
+            return True
+        target = self.next_seq - 1 if seq is None else seq
+        with self._durable:
+            return self._durable.wait_for(lambda: self.durable_seq >= target, timeout)
+
+    async def commit(self, seq: Optional[int] = None, timeout: Optional[float] = 5.0) -> bool:
+        """Await durability from async code without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.sync, seq, timeout)
+
+    def close(self):
+        if not self._opened:
+            return
+        self._closing = True
+        self._wake.set()
+        self._thread.join(5.0)
+        self._file.close()
+        self._opened = False
+
+    # -- reading --------------------------------------------------------------
+
+    def replay(self, since_seq: Optional[int] = None, since_ts: Optional[int] = None,
+               kinds: Optional[Sequence[int]] = None, until_seq: Optional[int] = None) -> Iterator[JournalRecord]:
+        """
+        Durable records from `since_seq` / `since_ts` (microseconds) onwards, in order
+        Whole segments before the start are skipped and the sparse index seeks within the first one
+        """
+        if not self._opened:
+            self.open()
+        until_seq = self.durable_seq if until_seq is None else min(until_seq, self.durable_seq)
+        for segment in list(self.segments):
+            if not segment.records or segment.first_seq > until_seq:
+                continue
+            if since_seq is not None and segment.last_seq < since_seq:
+                continue
+            if since_ts is not None and segment.last_ts < since_ts:
+                continue
+            offset = segment.offset_for(since_seq, since_ts)
+            for _, seq, ts, kind, payload in _read_records(segment.path, offset, segment.size):
+                if seq > until_seq:
+                    return
+                if since_seq is not None and seq < since_seq:
+                    continue
+                if since_ts is not None and ts < since_ts:
+                    continue
+                if kinds is None or kind in kinds:
+                    yield JournalRecord(seq, ts, kind, json.loads(payload))
+
+    def seek(self, timestamp: datetime) -> Optional[int]:
+        """Sequence number of the first record at or after `timestamp`"""
+        since_ts = int(timestamp.timestamp() * 1_000_000)
+        record = next(self.replay(since_ts=since_ts), None)
+        return record.seq if record else None
+
+    def rebuild_state(self, since_ts: Optional[int] = None, detector=None) -> Dict:
+        """
+        Latest signal per symbol/timeframe and the outcomes recorded for them
+        Optionally primes a SignalChangeDetector so a restart does not republish everything
+        """
+        latest: Dict[str, Dict] = {}
+        outcomes: Dict[int, Dict] = {}
+        for record in self.replay(since_ts=since_ts):
+            if record.kind == KIND_SIGNAL:
+                latest[_signal_key(record.data)] = {**record.data, "journal_seq": record.seq}
+            elif record.kind == KIND_OUTCOME:
+                outcomes[record.data["signal_seq"]] = record.data
+
+        if detector is not None:
+            for signal in latest.values():
+                detector.published[(signal["symbol"], signal.get("timeframe"))] = signal
+        return {"latest": latest, "outcomes": outcomes, "last_seq": self.durable_seq}
+
+    # -- compaction -----------------------------------------------------------
+
+    def compact(self, retention_seconds: float = 7 * 86400, keep_latest: bool = True) -> Dict:
+        """
+        Drop sealed segments that are fully forwarded and older than the retention
+        With keep_latest, a segment still holding the newest signal for some
+        symbol/timeframe is rewritten down to just those records instead
+        """
+        if not self._opened:
+            self.open()
+        cutoff = (time.time() - retention_seconds) * 1_000_000
+        live = {}
+        for segment in self.segments:
+            live.update(segment.latest)
+        live_seqs = set(live.values())
+
+        removed = rewritten = 0
+        for segment in list(self.segments[:-1]):
+            if segment.last_seq > self.forwarded_seq or segment.last_ts >= cutoff:
+                continue
+            keep = live_seqs & set(segment.latest.values()) if keep_latest else set()
+            try:
+                if keep:
+                    if len(keep) < segment.records:
+                        self._rewrite(segment, keep)
+                        rewritten += 1
+                    continue
+                self._delete_files(segment)
+                with self._lock:
+                    self.segments.remove(segment)
+                removed += 1
+            except Exception as e:
+                logger.error("Error compacting journal segment %s: %s", segment.path, e)
+        return {"removed_segments": removed, "rewritten_segments": rewritten, "segments": len(self.segments)}
+
+    def _rewrite(self, segment: Segment, keep: set):
+        """Replace a sealed segment with only the records in `keep`, sequence numbers unchanged"""
+        compacted = Segment(path=segment.path, first_seq=segment.first_seq)
+        temporary = segment.path + ".compact"
+        with open(temporary, "wb") as handle:
+            for _, seq, ts, kind, payload in _read_records(segment.path):
+                if seq not in keep:
+                    continue
+                key = _signal_key(json.loads(payload)) if kind == KIND_SIGNAL else None
+                compacted.note(seq, ts, handle.tell(), self.index_interval, key)
+                crc = zlib.crc32(_CRC_FIELDS.pack(seq, ts, kind), zlib.crc32(payload))
+                handle.write(RECORD_HEADER.pack(len(payload), crc, seq, ts, kind) + payload)
+            compacted.size = handle.tell()
+            handle.flush()
+            os.fsync(handle.fileno())
+        compacted.first_seq = segment.first_seq
+        os.replace(temporary, segment.path)
+        self._write_index(compacted)
+        with self._lock:
+            self.segments[self.segments.index(segment)] = compacted
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "next_seq": self.next_seq,
+            "durable_seq": self.durable_seq,
+            "forwarded_seq": self.forwarded_seq,
+            "buffered": len(self._pending),
+            "segments": len(self.segments)
+        }
+
+class MongoForwarder:
+    """
+    Copies journal records into trading_signals after the fact, keeping the
+    performance rollups in step. Writes are idempotent upserts keyed on the
+    journal sequence number, outcomes remember the seq they were applied at,
+    and each rollup document remembers the last seq it absorbed, so after a
+    MongoDB outage or a crash the forwarder simply resumes from the checkpoint
+    and replays what is missing without counting anything twice
+    """
+
+    def __init__(self, journal: SignalJournal, db, checkpoint_path: Optional[str] = None,
+                 batch_size: int = 500, rollups=None):
+        from services.performance_rollups import PerformanceRollups
+
+        self.journal = journal
+        self.collection = db.trading_signals
+        # Share the writers' instance so its lock also covers the forwarder
+        self.rollups = rollups or PerformanceRollups(db)
+        self.checkpoint_path = checkpoint_path or os.path.join(journal.directory, "forwarded.json")
+        self.batch_size = batch_size
+        self.stats = {"forwarded": 0, "skipped": 0, "skipped_outcomes": 0, "errors": 0,
+                      "skipped_by_reason": {}}
+        journal.forwarded_seq = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as handle:
+                return int(json.load(handle)["forwarded_seq"])
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.error("Error reading journal checkpoint: %s", e)
+            return 0
+
+    def _save_checkpoint(self, seq: int):
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"forwarded_seq": seq, "updated_at": datetime.now().isoformat()}, handle)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _read_batch(self, since_seq: int) -> List[JournalRecord]:
+        batch = []
+        for record in self.journal.replay(since_seq=since_seq):
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                break
+        return batch
+
+    def _skip_reason(self, signal: Dict) -> Optional[str]:
+        """Why the trading_signals validator would reject a journaled signal, if it would"""
+        if signal.get("timeframe") not in STORED_TIMEFRAMES:
+            return f"timeframe {signal.get('timeframe')}"
+        if not signal.get("entry_price"):
+            return "no entry price"
+        return None
+
+    def _skip(self, reason: str):
+        counts = self.stats["skipped_by_reason"]
+        if reason not in counts:
+            logger.info("Journal signals with %s stay in the journal only (trading_signals cannot hold them)", reason)
+        counts[reason] = counts.get(reason, 0) + 1
+        self.stats["skipped"] += 1
+
+    def _document(self, record: JournalRecord) -> Optional[Dict]:
+        """trading_signals document for a journaled signal, or None if the schema cannot hold it"""
+        signal = record.data
+        if self._skip_reason(signal) is not None:
+            return None
+        take_profit = signal.get("take_profit") or []
+        document = {
+            "trade_id": f"journal-{record.seq}",
+            "journal_seq": record.seq,
+            "symbol": signal.get("symbol", "BTCUSDT"),
+            "timestamp": datetime.fromisoformat(signal["timestamp"]) if signal.get("timestamp")
+            else datetime.fromtimestamp(record.timestamp_us / 1_000_000),
+            "action": ACTION_NAMES.get(signal.get("action"), "Wait"),
+            "timeframe": signal["timeframe"],
+            "entry_price": float(signal["entry_price"]),
+            "confidence": float(signal.get("confidence", 0.0)),
+            "result": "Pending"
+        }
+        if signal.get("stop_loss"):
+            document["stop_loss"] = float(signal["stop_loss"])
+        if take_profit:
+            document["take_profit"] = float(take_profit[0]["level"])
+        return document
+
+    async def _stored_signals(self, batch: List[JournalRecord]) -> Dict[int, Dict]:
+        """trading_signals documents of the earlier signals this batch's outcomes resolve"""
+        own = {record.seq for record in batch if record.kind == KIND_SIGNAL}
+        trade_ids = sorted({f"journal-{record.data['signal_seq']}" for record in batch
+                            if record.kind == KIND_OUTCOME and record.data["signal_seq"] not in own})
+        if not trade_ids:
+            return {}
+        cursor = self.collection.find({"trade_id": {"$in": trade_ids}})
+        return {document["journal_seq"]: document async for document in cursor}
+
+    async def forward_once(self) -> int:
+        """Forward one batch past the checkpoint; returns the number of records consumed"""
+        from pymongo import UpdateOne
+
+        start = self.journal.forwarded_seq + 1
+        batch = await asyncio.get_running_loop().run_in_executor(None, self._read_batch, start)
+        if not batch:
+            return 0
+
+        async with self.rollups.lock:
+            stored = await self._stored_signals(batch)
+            operations = []
+            changes = []
+            for record in batch:
+                if record.kind == KIND_SIGNAL:
+                    document = self._document(record)
+                    if document is None:
+                        self._skip(self._skip_reason(record.data))
+                        continue
+                    operations.append(UpdateOne({"trade_id": document["trade_id"]},
+                                                {"$setOnInsert": document}, upsert=True))
+                    changes.append(self.rollups.journal_change(record.seq, document))
+                    stored[record.seq] = document
+                elif record.kind == KIND_OUTCOME:
+                    data = record.data
+                    document = stored.get(data["signal_seq"])
+                    if document is None:
+                        # Its signal was never stored (see _skip_reason), so there is no row to resolve
+                        self.stats["skipped_outcomes"] += 1
+                        continue
+                    # A replayed outcome finds its own seq on the row and reuses the result it replaced
+                    if (document.get("result_seq") or 0) >= record.seq:
+                        previous = document.get("previous_result", "Pending")
+                        previous_pnl = document.get("previous_profit_loss_usd", 0.0)
+                    else:
+                        previous = document.get("result", "Pending")
+                        previous_pnl = document.get("profit_loss_usd", 0.0)
+                    update = {"result": data["result"], "profit_loss_usd": float(data.get("profit_loss_usd", 0.0)),
+                              "previous_result": previous, "previous_profit_loss_usd": previous_pnl,
+                              "result_seq": record.seq}
+                    operations.append(UpdateOne(
+                        {"trade_id": document["trade_id"],
+                         "$or": [{"result_seq": None}, {"result_seq": {"$lt": record.seq}}]},
+                        {"$set": update}))
+                    stored[data["signal_seq"]] = {**document, **update}
+                    changes.append(self.rollups.journal_change(
+                        record.seq, document, data["result"], update["profit_loss_usd"], previous, previous_pnl))
+            if operations:
+                # Ordered, so an outcome lands after the signal it updates when both are in one batch
+                await self.collection.bulk_write(operations, ordered=True)
+            await self.rollups.record_journal([change for change in changes if change is not None])
+
+        last = batch[-1].seq
+        await asyncio.get_running_loop().run_in_executor(None, self._save_checkpoint, last)
+        self.journal.forwarded_seq = last
+        self.stats["forwarded"] += len(operations)
+        return len(batch)
+
+    async def run(self, interval: float = 1.0):
+        """Forward continuously; MongoDB errors are logged and retried from the checkpoint"""
+        while True:
+            try:
+                while await self.forward_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error("Error forwarding journal to MongoDB: %s", e)
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "forwarded_seq": self.journal.forwarded_seq,
+                "lag": self.journal.durable_seq - self.journal.forwarded_seq}
+
+# Shared journal; opens its directory on first use
+signal_journal = SignalJournal()
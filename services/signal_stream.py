@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+from urllib.parse import parse_qs
+import logging
+
+from services.order_flow import live_order_flow
+from services.paper_trading import PaperTradingEngine, start_paper_trading
+from services.price_sources import HedgedPriceFetcher, price_fetcher
+from services.signal_changes import SignalChangeDetector
+from services.signal_journal import SignalJournal
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ["signals", "prices", "stats", "risk", "analytics"]
+
+# Dashboard state topics: every key is one shared GET payload, pushed with
+# publish_state so clients render it instead of refetching the endpoint
+STATE_TOPICS = {
+    "stats": ["health", "multi_timeframe_status", "ai_training_data", "trade_history"],
+    "analytics": ["comprehensive", "onchain", "halving", "whales", "cycle", "dominance"],
+    "risk": ["liquidation_heatmap"]
+}
+
+class StreamMessage:
+    """A published message, encoded once for every transport"""
+
+    def __init__(self, topic: str, data: Dict):
+        self.topic = topic
+        self.text = json.dumps({"topic": topic, "data": data}, separators=(",", ":"), default=str)
+        self.sse = f"event: {topic}\ndata: {self.text}\n\n".encode()
+
+class Subscriber:
+    """One connected client with a bounded outgoing queue"""
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics: Set[str] = set(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, message: StreamMessage) -> bool:
+        """Queue without waiting; False means the client has fallen too far behind"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self):
+        """Discard the backlog and wake the writer with the end-of-stream sentinel"""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class SignalBroadcaster:
+    """
+    Topic-based fan-out of signals, price ticks and stats to dashboards
+    Each update is computed and encoded once, then handed to every subscriber;
+    clients that cannot keep up are disconnected instead of buffered
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscriber] = set()
+        # Latest message per topic; topics carrying several timeframes keep one per timeframe
+        self.retained: Dict[str, Dict[Optional[str], StreamMessage]] = {}
+        self.states: Dict[str, Dict] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        """Register a client; it immediately receives the latest message of each topic (and timeframe)"""
+        subscriber = Subscriber(topics, self.max_queue)
+        for topic in subscriber.topics:
+            for message in self.retained.get(topic, {}).values():
+                subscriber.offer(message)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def update_topics(self, subscriber: Subscriber, subscribe: Iterable[str] = (), unsubscribe: Iterable[str] = ()):
+        """Change a connected client's topics; newly added topics get their retained messages"""
+        added = set(subscribe) - subscriber.topics
+        subscriber.topics.difference_update(unsubscribe)
+        subscriber.topics.update(added)
+        for topic in added:
+            for message in self.retained.get(topic, {}).values():
+                subscriber.offer(message)
+
+    def publish(self, topic: str, data: Dict, retain: bool = True) -> int:
+        """Send data to every subscriber of topic; returns the number of recipients"""
+        message = StreamMessage(topic, data)
+        if retain:
+            # Unchanged timeframes are not republished, so each one's last message must survive
+            self.retained.setdefault(topic, {})[data.get("timeframe")] = message
+
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            if topic not in subscriber.topics:
+                continue
+            if subscriber.offer(message):
+                delivered += 1
+            else:
+                subscriber.drop()
+                self.subscribers.discard(subscriber)
+                self.dropped += 1
+                logger.warning("Dropped slow stream subscriber (%s backlog full)", topic)
+
+        self.published += 1
+        return delivered
+
+    def publish_state(self, topic: str, state: Dict) -> int:
+        """Publish only the top-level keys of state that changed since the last call"""
+        previous = self.states.get(topic)
+        self.states[topic] = state
+
+        if previous is None:
+            changes, removed = state, []
+        else:
+            changes = {key: value for key, value in state.items() if previous.get(key) != value}
+            removed = [key for key in previous if key not in state]
+            if not changes and not removed:
+                return 0
+
+        delivered = self.publish(topic, {"type": "diff", "changes": changes, "removed": removed}, retain=False)
+        # Late joiners get the full state rather than a diff they cannot apply
+        self.retained[topic] = {None: StreamMessage(topic, {"type": "snapshot", "changes": state, "removed": []})}
+        return delivered
+
+    def get_stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped,
+            "timestamp": datetime.now().isoformat()
+        }
+
+class StreamEndpoint:
+    """
+    ASGI app serving the broadcaster over Server-Sent Events and WebSocket
+
+        app.mount("/api/stream", StreamEndpoint(broadcaster))
+
+    SSE:       GET /api/stream?topics=signals,stats
+               (signal_heartbeats is opt-in: it is not in the default topic set)
+    WebSocket: connect with the same query, then send {"subscribe": [...]} / {"unsubscribe": [...]}
+               to change topics on the open connection
+    """
+
+    def __init__(self, broadcaster: SignalBroadcaster, heartbeat: float = 15.0):
+        self.broadcaster = broadcaster
+        self.heartbeat = heartbeat
+
+    def _topics(self, scope) -> Set[str]:
+        query = parse_qs(scope.get("query_string", b"").decode())
+        requested = {t for value in query.get("topics", []) for t in value.split(",") if t}
+        return requested or set(TOPICS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._serve_sse(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._serve_websocket(scope, receive, send)
+
+    async def _next(self, subscriber: Subscriber, closed: asyncio.Task) -> Optional[StreamMessage]:
+        """Next queued message, a heartbeat marker (False) after a quiet period, or None once closed"""
+        getter = asyncio.ensure_future(subscriber.queue.get())
+        await asyncio.wait({getter, closed}, timeout=self.heartbeat, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            return getter.result()
+        getter.cancel()
+        return None if closed.done() else False
+
+    async def _serve_sse(self, scope, receive, send):
+        subscriber = self.broadcaster.subscribe(self._topics(scope))
+
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        disconnected = asyncio.create_task(wait_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no")
+            ]})
+            while not disconnected.done():
+                message = await self._next(subscriber, disconnected)
+                if message is None:
+                    break
+                body = b": keepalive\n\n" if message is False else message.sse
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except Exception as e:
+            logger.info(f"SSE client disconnected: {e}")
+        finally:
+            disconnected.cancel()
+            self.broadcaster.unsubscribe(subscriber)
+
+    async def _serve_websocket(self, scope, receive, send):
+        if (await receive())["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+        subscriber = self.broadcaster.subscribe(self._topics(scope))
+
+        async def read_commands():
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.disconnect":
+                    return
+                try:
+                    command = json.loads(event.get("text") or "{}")
+                    self.broadcaster.update_topics(subscriber, command.get("subscribe", []),
+                                                   command.get("unsubscribe", []))
+                except (ValueError, AttributeError, TypeError):
+                    pass
+
+        reader = asyncio.create_task(read_commands())
+        try:
+            while not reader.done():
+                message = await self._next(subscriber, reader)
+                if message is None:
+                    if not reader.done():
+                        await send({"type": "websocket.close", "code": 1013})
+                    break
+                text = '{"topic":"heartbeat"}' if message is False else message.text
+                await send({"type": "websocket.send", "text": text})
+        except Exception as e:
+            logger.info(f"WebSocket client disconnected: {e}")
+        finally:
+            reader.cancel()
+            self.broadcaster.unsubscribe(subscriber)
+
+# Process-wide broadcaster that engines publish into
+broadcaster = SignalBroadcaster()
+
+async def run_signal_publisher(engine, broadcaster: SignalBroadcaster = broadcaster,
+                               timeframes=('5m', '15m', '1h'), interval: float = 15.0,
+                               detector: Optional[SignalChangeDetector] = None,
+                               persist: Optional[Callable[[Dict], Awaitable]] = None,
+                               journal: Optional[SignalJournal] = None,
+                               paper_trader: Optional[PaperTradingEngine] = None):
+    """
+    Compute precision signals once per interval and push them to every subscriber
+    Only materially changed signals are persisted and published on "signals";
+    unchanged ones produce an occasional heartbeat on "signal_heartbeats".
+    With a journal, changed signals are appended locally and a MongoForwarder
+    can take over from `persist`, so publishing never waits on the database.
+    With a paper trader, each changed signal is submitted sized by its
+    position_size and replaces that timeframe's entry if it has not filled yet
+    """
+    detector = detector or SignalChangeDetector()
+    paper_entries: Dict[str, int] = {}  # timeframe -> position id of the latest paper entry
+    if paper_trader is not None:
+        start_paper_trading(engine=paper_trader)
+    while True:
+        for timeframe in timeframes:
+            try:
+                signal = await engine.generate_trade_recommendation(timeframe)
+                outcome, payload = detector.evaluate(signal)
+                if outcome == "publish":
+                    if journal is not None:
+                        signal["journal_seq"] = journal.append_signal(signal)
+                    if persist is not None:
+                        await persist(signal)
+                    if paper_trader is not None:
+                        previous = paper_trader.positions.get(paper_entries.get(timeframe))
+                        if previous is not None and previous.status == "pending":
+                            paper_trader.cancel_position(previous.position_id, "superseded")
+                        position = paper_trader.submit_signal(signal, signal.get("position_size") or 0.0)
+                        if position is not None:
+                            paper_entries[timeframe] = position.position_id
+                    broadcaster.publish("signals", signal)
+                elif outcome == "heartbeat":
+                    broadcaster.publish("signal_heartbeats", payload, retain=False)
+            except Exception as e:
+                logger.error("Error publishing %s signal: %s", timeframe, e)
+        await asyncio.sleep(interval)
+
+async def run_price_publisher(broadcaster: SignalBroadcaster = broadcaster, symbol: str = "BTCUSDT",
+                              interval: float = 1.0, rest_interval: float = 10.0,
+                              fetcher: HedgedPriceFetcher = price_fetcher):
+    """
+    Push the spot price on "prices" at most once per interval, and only when it moved
+    The price is the last trade of the live order-flow stream; while that stream
+    is silent, the hedged multi-venue REST quote is used every rest_interval seconds
+    """
+    last_price, last_fetch = None, float("-inf")
+    while True:
+        try:
+            price = None
+            flow = live_order_flow(symbol)
+            if flow is not None and flow.is_live(int(time.time() * 1000)):
+                price, source = flow.last_price, "trades"
+            elif time.monotonic() - last_fetch >= rest_interval:
+                last_fetch = time.monotonic()
+                quote = await fetcher.fetch()
+                price, source = quote.price, quote.source
+            if price is not None and price != last_price:
+                last_price = price
+                broadcaster.publish("prices", {"symbol": symbol, "price": price, "source": source,
+                                               "timestamp": datetime.now().isoformat()})
+        except Exception as e:
+            logger.error("Error publishing %s price: %s", symbol, e)
+        await asyncio.sleep(interval)
+
+async def run_state_publisher(topic: str, producers: Dict[str, Callable[[], Awaitable[Dict]]],
+                              broadcaster: SignalBroadcaster = broadcaster, interval: float = 20.0):
+    """
+    Compute a dashboard state topic once per interval and push what changed
+    `producers` maps each state key (see STATE_TOPICS) to the coroutine behind
+    its GET endpoint. A key whose producer fails keeps its last value, so one
+    broken upstream does not blank the panel
+
+        asyncio.create_task(run_state_publisher("stats", {"health": health_check, ...}))
+    """
+    state: Dict[str, Dict] = {}
+    while True:
+        results = await asyncio.gather(*(producer() for producer in producers.values()), return_exceptions=True)
+        for key, result in zip(producers, results):
+            if isinstance(result, Exception):
+                logger.error("Error computing %s.%s for the stream: %s", topic, key, result)
+            else:
+                state[key] = result
+        if state:
+            broadcaster.publish_state(topic, dict(state))
+        await asyncio.sleep(interval)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from services.log_pipeline import log_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Modules behind the signal endpoints; preloaded by start_preload()
+ENGINE_MODULES = ("services.precision_trading", "services.signal_execution")
+
+class LazyModule:
+    """
+    Stand-in for a heavy module (numpy, pandas, httpx) that imports it on first attribute access
+    Afterwards the module's namespace is copied onto the proxy, so later lookups
+    are plain attribute reads with no extra indirection
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__dict__["_lazy_name"])
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__dict__['_lazy_name']}'>"
+
+def lazy_import(name: str):
+    """The module itself if it is already loaded, else a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def import_time_report(modules: Sequence[str] = ENGINE_MODULES, top: int = 15) -> Dict:
+    """
+    Cold import cost of `modules`, measured in a fresh interpreter with -X importtime
+    Returns the total plus the modules with the most import time of their own
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "import failed"}
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({"module": name, "depth": len(indent) // 2,
+                            "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+
+    # Depth-0 entries are imported directly by the -c code or by interpreter start-up
+    requested = [entry for entry in entries if entry["depth"] == 0 and entry["module"] in modules]
+    slowest = sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top]
+    return {
+        "modules": list(modules),
+        "total_ms": round(sum(entry["cumulative_ms"] for entry in requested), 1),
+        "slowest_self_ms": [{"module": entry["module"], "self_ms": round(entry["self_ms"], 1)}
+                            for entry in slowest],
+        "heavy_loaded": {name: any(entry["module"] == name for entry in entries)
+                         for name in ("numpy", "pandas", "httpx")}
+    }
+
+class Readiness:
+    """
+    Background preload of the engines and their heavy dependencies
+    Workers can bind and answer health checks at once; the readiness probe
+    reports ready only after the first signal would not pay any import cost
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.loaded: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def _preload(self, modules: Sequence[str], dependencies: Sequence[str]):
+        try:
+            for name in list(dependencies) + list(modules):
+                importlib.import_module(name)
+                self.loaded.append(name)
+
+            from services.precision_trading import PrecisionTradingEngine
+            from services.signal_execution import SignalExecutionEngine
+            PrecisionTradingEngine()
+            SignalExecutionEngine()
+
+            self.ready = True
+            logger.info(f"✅ Engines preloaded in {time.monotonic() - self.started_at:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            logger.error("Error preloading engines: %s", e)
+        finally:
+            self.finished_at = time.monotonic()
+
+    def start(self, modules: Sequence[str] = ENGINE_MODULES,
+              dependencies: Sequence[str] = ("numpy", "pandas", "httpx")):
+        """Begin preloading on a daemon thread; safe to call more than once"""
+        if self._thread is not None:
+            return
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._preload, args=(modules, dependencies),
+                                        name="engine-preload", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def get_status(self) -> Dict:
+        end = self.finished_at or time.monotonic()
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "loaded": list(self.loaded),
+            "elapsed_seconds": round(end - self.started_at, 2) if self.started_at else None
+        }
+
+# Shared readiness state for the /health/ready probe
+readiness = Readiness()
+
+def start_preload():
+    """Call once at worker start-up, before accepting traffic"""
+    log_pipeline.install()
+    readiness.start()
+    return readiness
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(import_time_report(), indent=2))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+import asyncio
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Built-in defaults; system_config rows with the same config_key override them
+DEFAULT_CONFIG = {
+    "timeframe_settings": {
+        '5m': {
+            'base_position': 300,
+            'atr_multiplier': 1.0,
+            'tp_ratios': [1.2, 1.8, 2.5],
+            'sl_ratio': 1.0,
+            'expiration_minutes': 5
+        },
+        '15m': {
+            'base_position': 500,
+            'atr_multiplier': 1.2,
+            'tp_ratios': [1.5, 2.2, 3.0],
+            'sl_ratio': 1.2,
+            'expiration_minutes': 15
+        },
+        '1h': {
+            'base_position': 800,
+            'atr_multiplier': 1.5,
+            'tp_ratios': [2.0, 3.0, 4.0],
+            'sl_ratio': 1.5,
+            'expiration_minutes': 60
+        },
+        '4h': {
+            'base_position': 1000,
+            'atr_multiplier': 2.0,
+            'tp_ratios': [2.5, 3.5, 5.0],
+            'sl_ratio': 2.0,
+            'expiration_minutes': 240
+        },
+        '1d': {
+            'base_position': 1200,
+            'atr_multiplier': 2.5,
+            'tp_ratios': [3.0, 4.5, 6.0],
+            'sl_ratio': 2.5,
+            'expiration_minutes': 1440
+        }
+    },
+    "execution_levels": {
+        '5m': {'entry_offset': 0.0002, 'tp_multipliers': [0.8, 1.2, 1.8], 'sl_multiplier': 0.6, 'use_vwap': False},
+        '15m': {'entry_offset': 0.001, 'tp_multipliers': [1.5, 2.2, 3.0], 'sl_multiplier': 1.0, 'use_vwap': False},
+        '1h': {'entry_offset': 0.002, 'tp_multipliers': [2.0, 3.0, 4.0], 'sl_multiplier': 1.5, 'use_vwap': True},
+        '4h': {'entry_offset': 0.003, 'tp_multipliers': [2.5, 3.5, 5.0], 'sl_multiplier': 2.0, 'use_vwap': True},
+        '1d': {'entry_offset': 0.005, 'tp_multipliers': [3.0, 4.5, 6.0], 'sl_multiplier': 2.5, 'use_vwap': True}
+    },
+    "risk_reward_ratios": {
+        "15m": {"high_confidence": 1.5, "medium_confidence": 1.2, "low_confidence": 1.0},
+        "1h": {"high_confidence": 2.5, "medium_confidence": 2.0, "low_confidence": 1.5},
+        "4h": {"high_confidence": 4.0, "medium_confidence": 3.0, "low_confidence": 2.5},
+        "1d": {"high_confidence": 5.0, "medium_confidence": 4.0, "low_confidence": 3.0}
+    },
+    "hybrid_weights": {"rule_based": 0.60, "ai_based": 0.40},
+    "ai_model_weights": {"random_forest": 0.35, "gradient_boost": 0.35, "neural_network": 0.30},
+    # Runtime diagnostics (see services/profiling.py); all off by default
+    "profiling": {"enabled": False, "sample_rate": 0.0, "slow_call_ms": 0, "memory_tracking": False,
+                  "output_dir": "profiles"}
+}
+
+CONFIG_KEYS = list(DEFAULT_CONFIG)
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    """Immutable configuration snapshot; replaced wholesale on every change"""
+    version: int
+    timeframe_settings: Dict
+    execution_levels: Dict
+    risk_reward_ratios: Dict
+    hybrid_weights: Dict
+    ai_model_weights: Dict
+    profiling: Dict
+    loaded_at: datetime = field(default_factory=datetime.now)
+
+    def min_risk_reward(self, timeframe: str, confidence: float) -> float:
+        """Minimum acceptable risk/reward for a timeframe and confidence (0-100)"""
+        ratios = self.risk_reward_ratios.get(timeframe)
+        if not ratios:
+            return 0.0
+        if confidence >= 80:
+            return ratios.get("high_confidence", 0.0)
+        if confidence >= 60:
+            return ratios.get("medium_confidence", 0.0)
+        return ratios.get("low_confidence", 0.0)
+
+    def risk_reward_check(self, timeframe: str, action: str, confidence: float, risk_reward: float) -> Dict:
+        """Configured minimum for a signal and, for a trade below it, the trigger to show"""
+        minimum = self.min_risk_reward(timeframe, confidence)
+        check = {"min_risk_reward": minimum, "warning": None}
+        if action in ("BUY", "SELL") and minimum and risk_reward < minimum:
+            check["warning"] = f"Risk/reward {risk_reward:.1f} below the {minimum:.1f} minimum for {timeframe}"
+        return check
+
+def _merge(default: Dict, override: Dict) -> Dict:
+    """Overlay a system_config value on its default, one nesting level deep"""
+    merged = copy.deepcopy(default)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+def _validate(values: Dict):
+    """Reject configurations that would break level calculations"""
+    for timeframe, settings in values["timeframe_settings"].items():
+        if len(settings["tp_ratios"]) != 3 or settings["sl_ratio"] <= 0 or settings["expiration_minutes"] <= 0:
+            raise ValueError(f"invalid timeframe_settings for {timeframe}")
+    for timeframe, levels in values["execution_levels"].items():
+        if len(levels["tp_multipliers"]) != 3 or levels["sl_multiplier"] <= 0:
+            raise ValueError(f"invalid execution_levels for {timeframe}")
+
+class ConfigStore:
+    """
+    Process-wide cached strategy configuration
+    Readers take `current` (a plain attribute read, no I/O); a background task
+    watches system_config and atomically swaps in a new versioned snapshot
+    """
+
+    def __init__(self, poll_interval: float = 30.0):
+        self.poll_interval = poll_interval
+        self.current = self._build(DEFAULT_CONFIG, version=0)
+        self.listeners: List[Callable[[StrategyConfig], None]] = []
+        self._last_updated: Optional[datetime] = None
+        self._last_overrides: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _build(self, values: Dict, version: int) -> StrategyConfig:
+        return StrategyConfig(version=version, **{key: values[key] for key in CONFIG_KEYS})
+
+    def subscribe(self, listener: Callable[[StrategyConfig], None]):
+        """Call listener with every new snapshot"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[StrategyConfig], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def apply(self, overrides: Dict) -> StrategyConfig:
+        """Validate overrides, build the next snapshot and swap it in"""
+        values = {key: _merge(DEFAULT_CONFIG[key], overrides.get(key, {})) for key in CONFIG_KEYS}
+        _validate(values)
+
+        snapshot = self._build(values, version=self.current.version + 1)
+        self.current = snapshot
+
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error("Error notifying config listener: %s", e)
+
+        logger.info(f"⚙️ Strategy config updated to version {snapshot.version}")
+        return snapshot
+
+    async def refresh(self, db) -> bool:
+        """Reload from system_config if any row changed; returns True when swapped"""
+        try:
+            overrides = {}
+            latest = None
+            async for doc in db.system_config.find({"config_key": {"$in": CONFIG_KEYS}}):
+                overrides[doc["config_key"]] = doc["config_value"]
+                updated_at = doc.get("updated_at")
+                if updated_at and (latest is None or updated_at > latest):
+                    latest = updated_at
+
+            # Rows written without updated_at are compared by content instead
+            if latest == self._last_updated and overrides == self._last_overrides:
+                return False
+
+            self.apply(overrides)
+            self._last_updated = latest
+            self._last_overrides = overrides
+            return True
+
+        except Exception as e:
+            logger.error("Error refreshing strategy config: %s", e)
+            return False
+
+    async def _watch(self, db, use_change_stream: bool):
+        await self.refresh(db)
+
+        if use_change_stream:
+            try:
+                async with db.system_config.watch() as stream:
+                    async for _ in stream:
+                        await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Change streams need a replica set; standalone servers fall back to polling
+                logger.info(f"Config change stream unavailable ({e}), polling instead")
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.refresh(db)
+
+    def start(self, db, use_change_stream: bool = True):
+        """Begin watching system_config in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch(db, use_change_stream))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Shared by both engines unless one is given its own store
+config_store = ConfigStore()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+import logging
+
+from services.startup import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# One year of 1m candles
+DEFAULT_LOOKBACK = 525600
+# Symbols that get a live profile and how many base candles each keeps; the ring
+# buffers cost 24 bytes per candle (about 12.6 MB for a year of 1m candles), so
+# only the traded symbol is profiled by default
+PROFILE_LOOKBACK: Dict[str, int] = {"BTCUSDT": DEFAULT_LOOKBACK}
+# A live profile only replaces the candle-based fallback once it holds a day of 1m candles
+MIN_LIVE_CANDLES = 1440
+
+def _bin_size_for(price: float, bin_pct: float) -> float:
+    """A round bin width near bin_pct of the price (e.g. 60 or 70 for BTC at 65k and 0.1%)"""
+    return float(f"{price * bin_pct:.1g}")
+
+def _spread(lo, hi, amount, size: int):
+    """
+    Histogram of candles spreading `amount` over every bin in [lo, hi]
+    Built as a difference array with two weighted bincounts, so the cost is
+    O(candles + bins) however wide the candle ranges are
+    """
+    starts = np.bincount(lo, weights=amount, minlength=size + 1)
+    ends = np.bincount(hi + 1, weights=amount, minlength=size + 1)
+    return np.cumsum(starts - ends)[:size]
+
+def extract_levels(histogram, first_bin: int, bin_size: float, max_nodes: int = 5,
+                   value_area: float = 0.7, smoothing: int = 5) -> Dict:
+    """Point of control, value area and high/low-volume nodes of a price histogram"""
+    volume = np.clip(histogram, 0.0, None)
+    total = float(volume.sum())
+    if total <= 0:
+        return {}
+    prices = (first_bin + np.arange(len(volume)) + 0.5) * bin_size
+
+    poc = int(np.argmax(volume))
+    # Value area: the highest-volume bins that together hold `value_area` of the volume
+    order = np.argsort(volume)[::-1]
+    inside = order[:int(np.searchsorted(np.cumsum(volume[order]), total * value_area)) + 1]
+
+    kernel = np.ones(smoothing) / smoothing
+    smooth = np.convolve(volume, kernel, mode="same")
+    left, centre, right = smooth[:-2], smooth[1:-1], smooth[2:]
+    traded = smooth[volume > 0]
+    peaks = np.flatnonzero((centre > left) & (centre >= right) & (centre > traded.mean())) + 1
+    troughs = np.flatnonzero((centre < left) & (centre <= right) & (centre < traded.mean() * 0.5)) + 1
+    hvn = peaks[np.argsort(smooth[peaks])[::-1][:max_nodes]]
+    lvn = troughs[np.argsort(smooth[troughs])[:max_nodes]]
+
+    return {
+        "poc": round(float(prices[poc]), 2),
+        "value_area_high": round(float(prices[inside.max()] + bin_size / 2), 2),
+        "value_area_low": round(float(prices[inside.min()] - bin_size / 2), 2),
+        "hvn": sorted(round(float(p), 2) for p in prices[hvn]),
+        "lvn": sorted(round(float(p), 2) for p in prices[lvn]),
+        "bin_size": bin_size
+    }
+
+def profile_levels(high, low, volume, bin_pct: float = 0.001, max_nodes: int = 5) -> Dict:
+    """One-shot volume profile levels for a block of candles"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    if len(high) == 0:
+        return {}
+    bin_size = _bin_size_for(float(high[-1]), bin_pct)
+    first_bin = int(np.floor(low.min() / bin_size))
+    lo = (np.floor(low / bin_size) - first_bin).astype(np.int64)
+    hi = (np.floor(high / bin_size) - first_bin).astype(np.int64)
+    amount = np.asarray(volume, dtype=np.float64) / (hi - lo + 1)
+    histogram = _spread(lo, hi, amount, int(hi.max()) + 1)
+    return extract_levels(histogram, first_bin, bin_size, max_nodes)
+
+def nearest_levels(levels: Dict, price: float) -> Dict[str, Optional[float]]:
+    """Closest volume node (POC or HVN) below and above `price`"""
+    nodes = sorted(set(levels.get("hvn", [])) | ({levels["poc"]} if "poc" in levels else set()))
+    below = [node for node in nodes if node < price]
+    above = [node for node in nodes if node > price]
+    return {"support": below[-1] if below else None, "resistance": above[0] if above else None}
+
+class VolumeProfile:
+    """
+    Rolling volume-by-price profile over the last `lookback` candles
+    Each candle's volume is spread evenly over the price bins its range
+    covers. A ring buffer remembers every candle's (first bin, last bin,
+    volume per bin), so a new candle adds its bins and the one falling out
+    of the window subtracts its own; the histogram is never rebuilt per candle
+    """
+
+    def __init__(self, lookback: int = DEFAULT_LOOKBACK, bin_pct: float = 0.001,
+                 bin_size: Optional[float] = None, max_nodes: int = 5):
+        self.lookback = lookback
+        self.bin_pct = bin_pct
+        self.bin_size = bin_size
+        self.max_nodes = max_nodes
+        self.first_bin = 0
+        self.histogram: Optional[np.ndarray] = None
+        self.count = 0
+        self.position = 0
+        self.updates = 0
+        self.last_timestamp = -1
+        self._levels: Optional[Dict] = None
+
+    def _allocate(self, price: float):
+        if self.bin_size is None:
+            self.bin_size = _bin_size_for(price, self.bin_pct)
+        # Ring buffers store absolute bin numbers so the histogram can grow at either end
+        self.ring_lo = np.zeros(self.lookback, dtype=np.int64)
+        self.ring_hi = np.zeros(self.lookback, dtype=np.int64)
+        self.ring_amount = np.zeros(self.lookback)
+        self.first_bin = int(np.floor(price / self.bin_size))
+        self.histogram = np.zeros(1)
+
+    def _cover(self, lo_bin: int, hi_bin: int):
+        """Grow the histogram so absolute bins lo_bin..hi_bin exist"""
+        last_bin = self.first_bin + len(self.histogram) - 1
+        if lo_bin >= self.first_bin and hi_bin <= last_bin:
+            return
+        # Grow with headroom so a trending market does not reallocate every candle
+        pad = max(len(self.histogram) // 4, 16)
+        before = self.first_bin - lo_bin + pad if lo_bin < self.first_bin else 0
+        after = hi_bin - last_bin + pad if hi_bin > last_bin else 0
+        self.histogram = np.pad(self.histogram, (before, after))
+        self.first_bin -= before
+
+    def seed(self, high, low, volume, last_timestamp: int = -1):
+        """Replace the profile with a block of candles (oldest first); vectorized"""
+        self.last_timestamp = last_timestamp
+        high = np.asarray(high, dtype=np.float64)[-self.lookback:]
+        low = np.asarray(low, dtype=np.float64)[-self.lookback:]
+        volume = np.asarray(volume, dtype=np.float64)[-self.lookback:]
+        if len(high) == 0:
+            return
+        self._allocate(float(high[-1]))
+        lo = np.floor(low / self.bin_size).astype(np.int64)
+        hi = np.maximum(np.floor(high / self.bin_size).astype(np.int64), lo)
+        amount = volume / (hi - lo + 1)
+
+        n = len(high)
+        self.ring_lo[:n], self.ring_hi[:n], self.ring_amount[:n] = lo, hi, amount
+        self.count = n
+        self.position = n % self.lookback
+        self._rebuild()
+
+    def _rebuild(self):
+        """Histogram from the ring buffers in one pass; also clears accumulated rounding drift"""
+        lo = self.ring_lo[:self.count]
+        hi = self.ring_hi[:self.count]
+        self.first_bin = int(lo.min())
+        self.histogram = _spread(lo - self.first_bin, hi - self.first_bin, self.ring_amount[:self.count],
+                                 int(hi.max()) - self.first_bin + 1)
+        self._levels = None
+
+    def add(self, high: float, low: float, volume: float):
+        """Fold in one closed candle and drop the oldest once the window is full"""
+        if self.histogram is None:
+            self._allocate(high)
+        lo = int(np.floor(low / self.bin_size))
+        hi = max(int(np.floor(high / self.bin_size)), lo)
+        amount = volume / (hi - lo + 1)
+
+        if self.count == self.lookback:
+            old_lo = self.ring_lo[self.position] - self.first_bin
+            old_hi = self.ring_hi[self.position] - self.first_bin
+            self.histogram[old_lo:old_hi + 1] -= self.ring_amount[self.position]
+        else:
+            self.count += 1
+
+        self._cover(lo, hi)
+        self.histogram[lo - self.first_bin:hi - self.first_bin + 1] += amount
+        self.ring_lo[self.position], self.ring_hi[self.position] = lo, hi
+        self.ring_amount[self.position] = amount
+        self.position = (self.position + 1) % self.lookback
+
+        self.updates += 1
+        if self.updates % self.lookback == 0:
+            self._rebuild()
+        self._levels = None
+
+    def on_candle(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float):
+        """CandleResampler closed-candle listener"""
+        # A reconnecting stream replays candles the profile already holds
+        if timestamp <= self.last_timestamp:
+            return
+        self.last_timestamp = timestamp
+        self.add(high, low, volume)
+
+    def levels(self) -> Dict:
+        """POC, value area and volume nodes; cached until the next candle"""
+        if self.histogram is None or self.count == 0:
+            return {}
+        if self._levels is None:
+            levels = extract_levels(self.histogram, self.first_bin, self.bin_size, self.max_nodes)
+            # No traded volume means no levels, not a levels dict without a POC
+            if levels:
+                levels["candles"] = self.count
+            self._levels = levels
+        return self._levels
+
+# Live profiles by symbol, fed with closed base candles by the resampler
+volume_profiles: Dict[str, VolumeProfile] = {}
+
+async def seed_from_history(profile: VolumeProfile, db, symbol: str = "BTCUSDT", timeframe: str = "1m") -> int:
+    """Seed a profile with the last `lookback` candles stored in price_history"""
+    try:
+        cursor = db.price_history.find({"symbol": symbol, "timeframe": timeframe},
+                                       {"_id": 0, "timestamp": 1, "high": 1, "low": 1, "volume": 1})
+        documents = await cursor.sort("timestamp", -1).limit(profile.lookback).to_list(length=profile.lookback)
+        if not documents:
+            return 0
+        documents.reverse()
+        high = np.fromiter((d["high"] for d in documents), dtype=np.float64, count=len(documents))
+        low = np.fromiter((d["low"] for d in documents), dtype=np.float64, count=len(documents))
+        volume = np.fromiter((d["volume"] for d in documents), dtype=np.float64, count=len(documents))
+        profile.seed(high, low, volume, int(documents[-1]["timestamp"].timestamp() * 1000))
+        logger.info(f"📊 Volume profile for {symbol} seeded with {len(documents)} candles")
+        return len(documents)
+    except Exception as e:
+        logger.error("Error seeding volume profile: %s", e)
+        return 0
+
+def attach_volume_profile(resampler, lookback: Optional[int] = None) -> Optional[VolumeProfile]:
+    """
+    Register a profile for the resampler's symbol and feed it every closed base candle
+    The lookback defaults to the symbol's PROFILE_LOOKBACK entry; unlisted symbols get no profile
+    """
+    lookback = lookback or PROFILE_LOOKBACK.get(resampler.symbol)
+    if not lookback:
+        return None
+    profile = volume_profiles.get(resampler.symbol)
+    if profile is None:
+        profile = volume_profiles[resampler.symbol] = VolumeProfile(lookback)
+    if profile.on_candle not in resampler.listeners:
+        resampler.listeners.append(profile.on_candle)
+    return profile
+
+def live_volume_levels(symbol: str = "BTCUSDT", min_candles: int = MIN_LIVE_CANDLES) -> Optional[Dict]:
+    """Levels of the live profile, or None until it has seen `min_candles` candles (seeded or streamed)"""
+    profile = volume_profiles.get(symbol)
+    if profile is None or profile.count < min_candles:
+        return None
+    return profile.levels() or None
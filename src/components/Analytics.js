@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, AreaChart, Area, BarChart, Bar } from 'recharts';
 import { Brain, TrendingUp, Activity, Zap, Target, BarChart3 } from 'lucide-react';
+import { subscribeToTopics } from '../services/stream';
 
 const Analytics = () => {
   const [loading, setLoading] = useState(true);
@@ -12,10 +13,19 @@ const Analytics = () => {
 
   useEffect(() => {
     fetchAnalyticsData();
-    const interval = setInterval(fetchAnalyticsData, 20000); // Refresh every 20 seconds
-    return () => clearInterval(interval);
+    // Render the pushed stats state (polls only while the stream is down)
+    return subscribeToTopics(['stats'], renderStats, fetchAnalyticsData, 20000);
   }, []);
 
+  const renderStats = (stats) => {
+    setAnalyticsData((current) => ({
+      aiTraining: stats.ai_training_data ?? current.aiTraining,
+      multiTimeframe: stats.multi_timeframe_status ?? current.multiTimeframe,
+      tradeHistory: stats.trade_history ?? current.tradeHistory
+    }));
+    setLoading(false);
+  };
+
   const fetchAnalyticsData = async () => {
     try {
       const [aiRes, multiRes, tradesRes] = await Promise.all([
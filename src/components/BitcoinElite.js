@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { PieChart, Pie, Cell, ResponsiveContainer, AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, BarChart, Bar } from 'recharts';
 import { Bitcoin, Clock, TrendingUp, AlertTriangle, Eye, Zap, Target, Activity } from 'lucide-react';
+import { subscribeToTopics } from '../services/stream';
 
 const BitcoinElite = () => {
   const [loading, setLoading] = useState(true);
@@ -15,10 +16,15 @@ const BitcoinElite = () => {
 
   useEffect(() => {
     fetchBitcoinData();
-    const interval = setInterval(fetchBitcoinData, 30000); // Refresh every 30 seconds
-    return () => clearInterval(interval);
+    // Render the pushed analytics state (polls only while the stream is down)
+    return subscribeToTopics(['analytics'], renderAnalytics, fetchBitcoinData, 30000);
   }, []);
 
+  const renderAnalytics = (analytics) => {
+    setBitcoinData((current) => ({ ...current, ...analytics }));
+    setLoading(false);
+  };
+
   const fetchBitcoinData = async () => {
     try {
       const [compRes, onchainRes, halvingRes, whalesRes, cycleRes, dominanceRes] = await Promise.all([
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, AreaChart, Area } from 'recharts';
 import { TrendingUp, TrendingDown, Activity, Zap, Target, Brain } from 'lucide-react';
+import { subscribeToTopics } from '../services/stream';
 
 const Dashboard = () => {
   const [loading, setLoading] = useState(true);
@@ -10,13 +11,39 @@ const Dashboard = () => {
     aiTrainingData: null,
     tradeHistory: []
   });
+  const [liveSignals, setLiveSignals] = useState({});
+  const [livePrice, setLivePrice] = useState(null);
 
   useEffect(() => {
     fetchDashboardData();
-    const interval = setInterval(fetchDashboardData, 15000); // Refresh every 15 seconds
-    return () => clearInterval(interval);
+    // Render the pushed stats state (polls only while the stream is down)
+    const unsubscribeStats = subscribeToTopics(['stats'], renderStats, fetchDashboardData, 15000);
+    // Signals and ticks are push-only; the panel shows the last ones received
+    const unsubscribeLive = subscribeToTopics(['signals', 'prices'], renderLive);
+    return () => {
+      unsubscribeStats();
+      unsubscribeLive();
+    };
   }, []);
 
+  const renderLive = (data, topic) => {
+    if (topic === 'prices') {
+      setLivePrice(data);
+    } else if (data?.timeframe) {
+      setLiveSignals((current) => ({ ...current, [data.timeframe]: data }));
+    }
+  };
+
+  const renderStats = (stats) => {
+    setDashboardData((current) => ({
+      systemHealth: stats.health ?? current.systemHealth,
+      multiTimeframeStatus: stats.multi_timeframe_status ?? current.multiTimeframeStatus,
+      aiTrainingData: stats.ai_training_data ?? current.aiTrainingData,
+      tradeHistory: stats.trade_history ?? current.tradeHistory
+    }));
+    setLoading(false);
+  };
+
   const fetchDashboardData = async () => {
     try {
       const [healthRes, multiRes, aiRes, tradesRes] = await Promise.all([
@@ -82,11 +109,52 @@ const Dashboard = () => {
   return (
     <div className="space-y-6">
       {/* Header */}
-      <div>
-        <h1 className="text-3xl font-bold text-white mb-2">Trading Dashboard</h1>
-        <p className="text-slate-400">Real-time overview of your Bitcoin trading system</p>
+      <div className="flex items-end justify-between">
+        <div>
+          <h1 className="text-3xl font-bold text-white mb-2">Trading Dashboard</h1>
+          <p className="text-slate-400">Real-time overview of your Bitcoin trading system</p>
+        </div>
+        {livePrice && (
+          <div className="text-right">
+            <p className="text-slate-400 text-sm">BTC/USDT</p>
+            <p className="text-2xl font-bold text-bitcoin">${livePrice.price.toLocaleString()}</p>
+          </div>
+        )}
       </div>
 
+      {/* Live Signals */}
+      {Object.keys(liveSignals).length > 0 && (
+        <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
+          {Object.values(liveSignals).map((signal) => (
+            <div key={signal.timeframe} className="bg-slate-800 rounded-lg p-4 border border-slate-700">
+              <div className="flex items-center justify-between mb-2">
+                <span className="text-bitcoin font-semibold">{signal.timeframe}</span>
+                <span className={`px-2 py-1 rounded text-xs ${
+                  signal.action === 'BUY' ? 'bg-green-500/20 text-green-500'
+                    : signal.action === 'SELL' ? 'bg-red-500/20 text-red-500' : 'bg-slate-500/20 text-slate-400'
+                }`}>
+                  {signal.action}
+                </span>
+              </div>
+              <div className="space-y-1 text-sm">
+                <div className="flex justify-between">
+                  <span className="text-slate-400">Entry:</span>
+                  <span className="text-white">${signal.entry_price?.toLocaleString()}</span>
+                </div>
+                <div className="flex justify-between">
+                  <span className="text-slate-400">Stop:</span>
+                  <span className="text-white">${signal.stop_loss?.toLocaleString()}</span>
+                </div>
+                <div className="flex justify-between">
+                  <span className="text-slate-400">Confidence:</span>
+                  <span className="text-white">{signal.confidence?.toFixed(1)}%</span>
+                </div>
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+
       {/* Quick Stats */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6">
         <div className="bg-slate-800 rounded-lg p-6 border border-slate-700">
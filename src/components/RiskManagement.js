@@ -1,6 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, LineChart, Line } from 'recharts';
 import { Shield, AlertTriangle, TrendingDown, Calculator, Target, Zap } from 'lucide-react';
+import { subscribeToTopics } from '../services/stream';
 
 const RiskManagement = () => {
   const [loading, setLoading] = useState(true);
@@ -17,13 +18,27 @@ const RiskManagement = () => {
     atr: 150
   });
 
+  // The fallback poll outlives parameter changes, so it reads the current ones from here
+  const paramsRef = useRef(positionParams);
+
+  useEffect(() => {
+    // The liquidation heatmap is pushed on the risk topic; polls only while the stream is down
+    return subscribeToTopics(['risk'], renderRisk, () => fetchRiskData(paramsRef.current), 20000);
+  }, []);
+
   useEffect(() => {
-    fetchRiskData();
-    const interval = setInterval(fetchRiskData, 20000); // Refresh every 20 seconds
-    return () => clearInterval(interval);
+    // Assessment, sizing and stop loss depend on this client's position parameters
+    paramsRef.current = positionParams;
+    fetchRiskData(positionParams);
   }, [positionParams]);
 
-  const fetchRiskData = async () => {
+  const renderRisk = (risk) => {
+    if (risk.liquidation_heatmap) {
+      setRiskData((current) => ({ ...current, liquidationHeatmap: risk.liquidation_heatmap }));
+    }
+  };
+
+  const fetchRiskData = async (params) => {
     try {
       const [liquidationRes, assessmentRes] = await Promise.all([
         fetch('http://localhost:8000/api/risk/liquidation-heatmap'),
@@ -31,8 +46,8 @@ const RiskManagement = () => {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({
-            position_direction: positionParams.direction,
-            timeframe: positionParams.timeframe
+            position_direction: params.direction,
+            timeframe: params.timeframe
           })
         })
       ]);
@@ -47,8 +62,8 @@ const RiskManagement = () => {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
-          timeframe: positionParams.timeframe,
-          account_size: positionParams.accountSize
+          timeframe: params.timeframe,
+          account_size: params.accountSize
         })
       });
       const positionData = await positionRes.json();
@@ -58,9 +73,9 @@ const RiskManagement = () => {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
-          position_direction: positionParams.direction,
-          timeframe: positionParams.timeframe,
-          atr: positionParams.atr
+          position_direction: params.direction,
+          timeframe: params.timeframe,
+          atr: params.atr
         })
       });
       const stopLossData = await stopLossRes.json();
@@ -0,0 +1,115 @@
+// Shared server-push connection for the dashboards.
+// One WebSocket per browser tab stays open for the life of the page; components
+// add and remove topics on it with subscribe/unsubscribe commands instead of
+// reconnecting. Components render the pushed payloads and fall back to interval
+// polling while the stream is down.
+
+const STREAM_URL = 'ws://localhost:8000/api/stream';
+const RECONNECT_DELAY = 5000;
+
+const handlers = {}; // topic -> Set of callbacks
+const states = {}; // state topic -> latest full state, rebuilt from snapshot/diff messages
+const fallbacks = new Set(); // { callback, intervalMs, timer }
+let socket = null;
+let connected = false;
+let reconnectTimer = null;
+let serverTopics = new Set(); // topics the server is currently sending us
+
+const activeTopics = () => Object.keys(handlers).filter((topic) => handlers[topic].size > 0);
+
+const startFallbacks = () => {
+  fallbacks.forEach((fallback) => {
+    if (!fallback.timer && fallback.callback) {
+      fallback.timer = setInterval(fallback.callback, fallback.intervalMs);
+    }
+  });
+};
+
+const stopFallbacks = () => {
+  fallbacks.forEach((fallback) => {
+    clearInterval(fallback.timer);
+    fallback.timer = null;
+  });
+};
+
+// State topics (publish_state) send a snapshot, then diffs of the changed keys
+const applyMessage = (topic, data) => {
+  if (data?.type === 'snapshot') {
+    states[topic] = { ...data.changes };
+  } else if (data?.type === 'diff') {
+    const state = { ...states[topic], ...data.changes };
+    data.removed.forEach((key) => delete state[key]);
+    states[topic] = state;
+  } else {
+    return data;
+  }
+  return states[topic];
+};
+
+// Bring the server's topic set in line with what mounted components need
+const syncTopics = () => {
+  if (!connected) return;
+  const wanted = new Set(activeTopics());
+  const subscribe = [...wanted].filter((topic) => !serverTopics.has(topic));
+  const unsubscribe = [...serverTopics].filter((topic) => !wanted.has(topic));
+  if (subscribe.length === 0 && unsubscribe.length === 0) return;
+  socket.send(JSON.stringify({ subscribe, unsubscribe }));
+  serverTopics = wanted;
+};
+
+const connect = () => {
+  const topics = activeTopics();
+  if (socket || topics.length === 0) return;
+  if (typeof WebSocket === 'undefined') {
+    startFallbacks();
+    return;
+  }
+
+  socket = new WebSocket(`${STREAM_URL}?topics=${topics.join(',')}`);
+  serverTopics = new Set(topics);
+  socket.onopen = () => {
+    connected = true;
+    stopFallbacks();
+    // Topics may have changed while the connection was opening
+    syncTopics();
+  };
+  socket.onmessage = (event) => {
+    const { topic, data } = JSON.parse(event.data);
+    if (!handlers[topic]) return; // heartbeat, or a topic just unsubscribed
+    const payload = applyMessage(topic, data);
+    handlers[topic].forEach((callback) => callback(payload, topic));
+  };
+  socket.onclose = () => {
+    connected = false;
+    socket = null;
+    startFallbacks();
+    clearTimeout(reconnectTimer);
+    reconnectTimer = setTimeout(connect, RECONNECT_DELAY);
+  };
+};
+
+// Call onMessage(data, topic) whenever one of the topics is pushed; for state topics data is
+// the full current state. Call onPoll (if given) every fallbackMs while the stream is down.
+// Returns an unsubscribe function suitable for a useEffect cleanup.
+export const subscribeToTopics = (topics, onMessage, onPoll = null, fallbackMs = 30000) => {
+  topics.forEach((topic) => {
+    handlers[topic] = handlers[topic] || new Set();
+    handlers[topic].add(onMessage);
+    // A component mounting after the snapshot arrived renders the state it missed
+    if (states[topic]) onMessage(states[topic], topic);
+  });
+  const fallback = { callback: onPoll, intervalMs: fallbackMs, timer: null };
+  fallbacks.add(fallback);
+  if (!connected && socket === null && reconnectTimer !== null && onPoll) {
+    fallback.timer = setInterval(onPoll, fallbackMs);
+  }
+  connect();
+  syncTopics();
+
+  return () => {
+    topics.forEach((topic) => handlers[topic]?.delete(onMessage));
+    clearInterval(fallback.timer);
+    fallbacks.delete(fallback);
+    syncTopics();
+  };
+};
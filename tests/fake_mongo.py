@@ -0,0 +1,231 @@
+"""
+In-memory stand-in for the slice of the Motor API the services use
+Queries support equality, $or, $regex, $gt/$gte/$lt/$lte/$ne and $in; updates
+support $inc, $set and $setOnInsert; aggregate() runs a single $group stage
+"""
+
+import asyncio
+import copy
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _match_value(value, condition):
+    if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$regex":
+                if not isinstance(value, str) or not re.search(operand, value):
+                    return False
+            elif op == "$gt" and not (value is not None and value > operand):
+                return False
+            elif op == "$gte" and not (value is not None and value >= operand):
+                return False
+            elif op == "$lt" and not (value is not None and value < operand):
+                return False
+            elif op == "$lte" and not (value is not None and value <= operand):
+                return False
+            elif op == "$ne" and value == operand:
+                return False
+            elif op == "$in" and value not in operand:
+                return False
+        return True
+    return value == condition
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif not _match_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _evaluate(expression, doc):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get(doc, expression[1:])
+    if isinstance(expression, dict) and not any(key.startswith("$") for key in expression):
+        return {key: _evaluate(value, doc) for key, value in expression.items()}
+    if isinstance(expression, dict):
+        (op, args), = expression.items()
+        if op == "$ifNull":
+            value = _evaluate(args[0], doc)
+            return value if value is not None else _evaluate(args[1], doc)
+        if op == "$max":
+            return max(_evaluate(arg, doc) for arg in args)
+        if op == "$multiply":
+            result = 1
+            for arg in args:
+                result *= _evaluate(arg, doc)
+            return result
+        if op == "$dateToString":
+            value = _evaluate(args["date"], doc)
+            return value.strftime(args["format"]) if isinstance(value, datetime) else None
+        raise NotImplementedError(op)
+    if isinstance(expression, list):
+        return [_evaluate(item, doc) for item in expression]
+    return expression
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = [copy.deepcopy(doc) for doc in docs]
+
+    def sort(self, key, direction=1):
+        self.docs.sort(key=lambda doc: _get(doc, key), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else list(self.docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            # Yield to the loop like a real cursor fetching batches
+            await asyncio.sleep(0)
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = []
+        self._ids = 0
+
+    def _new_id(self):
+        self._ids += 1
+        return f"{self.name}-{self._ids}"
+
+    async def insert_one(self, doc):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", self._new_id())
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs):
+        return [(await self.insert_one(doc)).inserted_id for doc in docs]
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(doc for doc in self.docs if matches(doc, query))
+
+    async def find_one(self, query=None):
+        return next((copy.deepcopy(doc) for doc in self.docs if matches(doc, query)), None)
+
+    def _apply(self, doc, update, inserted):
+        for field, value in update.get("$set", {}).items():
+            doc[field] = value
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+        if inserted:
+            for field, value in update.get("$setOnInsert", {}).items():
+                doc[field] = value
+
+    def _update(self, query, update, upsert):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        before = copy.deepcopy(doc)
+        if doc is None:
+            if not upsert:
+                return None, None
+            doc = {key: value for key, value in query.items() if not key.startswith("$")
+                   and not isinstance(value, dict)}
+            doc.setdefault("_id", self._new_id())
+            self.docs.append(doc)
+            self._apply(doc, update, inserted=True)
+            return None, doc["_id"]
+        self._apply(doc, update, inserted=False)
+        return before, None
+
+    async def update_one(self, query, update, upsert=False):
+        before, upserted = self._update(query, update, upsert)
+        return SimpleNamespace(matched_count=int(before is not None), upserted_id=upserted)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False):
+        before, _ = self._update(query, update, upsert)
+        return before
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = {}
+        matched = 0
+        for index, operation in enumerate(operations):
+            before, upserted_id = self._update(operation._filter, operation._doc, operation._upsert)
+            matched += before is not None
+            if upserted_id is not None:
+                upserted[index] = upserted_id
+        return SimpleNamespace(upserted_ids=upserted, matched_count=matched)
+
+    async def delete_many(self, query):
+        kept = [doc for doc in self.docs if not matches(doc, query)]
+        deleted, self.docs = len(self.docs) - len(kept), kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def drop(self):
+        self.docs = []
+
+    async def rename(self, new_name, dropTarget=False):
+        target = self.db[new_name]
+        target.docs, self.docs = self.docs, []
+
+    def aggregate(self, pipeline):
+        return FakeAggregation(self, pipeline)
+
+
+class FakeAggregation:
+    """A $group over a live collection, scanned lazily so concurrent writes can interleave"""
+
+    def __init__(self, collection, pipeline):
+        (stage,) = pipeline
+        self.collection = collection
+        self.spec = dict(stage["$group"])
+        self.id_spec = self.spec.pop("_id")
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        groups = {}
+        position = 0
+        while position < len(self.collection.docs):
+            doc = self.collection.docs[position]
+            position += 1
+            key = _evaluate(self.id_spec, doc)
+            frozen = repr(sorted(key.items())) if isinstance(key, dict) else repr(key)
+            group = groups.setdefault(frozen, {"_id": key, **{name: 0 for name in self.spec}})
+            for name, accumulator in self.spec.items():
+                group[name] += _evaluate(accumulator["$sum"], doc)
+            await asyncio.sleep(0)
+        for group in groups.values():
+            yield copy.deepcopy(group)
+
+
+class FakeDb:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
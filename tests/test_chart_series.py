@@ -0,0 +1,42 @@
+import numpy as np
+
+from services.chart_series import SeriesPyramid
+
+
+def build(n=20000, chunks=7, seed=3):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64) * 60_000
+    y = np.cumsum(rng.normal(size=n)) + 100
+    pyramid = SeriesPyramid()
+    for part_x, part_y in zip(np.array_split(x, chunks), np.array_split(y, chunks)):
+        pyramid.extend(part_x, part_y)
+    return pyramid, x, y
+
+
+def test_fine_query_matches_raw_series():
+    pyramid, x, y = build()
+    result = pyramid.query(x[100], x[399], points=1000)
+    assert result["level"] == 0
+    assert np.array_equal(result["x"], x[100:400])
+    assert np.array_equal(result["y"], y[100:400])
+
+
+def test_coarse_query_keeps_extremes_and_latest_point():
+    pyramid, x, y = build()
+    result = pyramid.query(None, None, points=200)
+    assert result["level"] > 0
+    assert len(result["x"]) <= 200
+    assert np.all(np.diff(result["x"]) > 0)
+    assert result["x"][-1] == x[-1] and result["y"][-1] == y[-1]
+    # Every drawn point is a real point of the raw series
+    assert np.array_equal(y[np.searchsorted(x, result["x"])], result["y"])
+    # Source points cover the folded levels plus their unfolded tails
+    assert result["source_points"] >= 4 * 200
+
+
+def test_window_query_counts_tails_of_lower_levels():
+    pyramid, x, y = build(n=5000, chunks=13)
+    start, end = x[1000], x[-1]
+    result = pyramid.query(start, end, points=50)
+    assert result["x"][0] >= start and result["x"][-1] == end
+    assert np.array_equal(y[np.searchsorted(x, result["x"])], result["y"])
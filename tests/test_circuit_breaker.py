@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+async def _fail():
+    raise ConnectionError("exchange down")
+
+async def _ok():
+    return "ok"
+
+def _open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0.0)
+
+    async def trip():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(_fail)
+
+    asyncio.run(trip())
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+def test_opens_after_threshold_and_recovers_through_probe():
+    breaker = _open_breaker()
+    assert asyncio.run(breaker.call(_ok)) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_probe_reopens():
+    breaker = _open_breaker()
+    breaker.recovery_timeout = 60.0
+    breaker.opened_at -= 60.0
+    with pytest.raises(ConnectionError):
+        asyncio.run(breaker.call(_fail))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breaker.call(_ok))
+
+def test_cancelled_probe_frees_the_probe_slot():
+    breaker = _open_breaker()
+
+    async def scenario():
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_ok)  # probe in flight
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await breaker.call(_ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
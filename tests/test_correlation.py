@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import services.correlation as correlation
+from services.correlation import CorrelationEngine, CorrelationStream
+
+HOUR_MS = 3_600_000
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+
+
+def closes(bars=900, seed=5):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, bars)
+    returns = {
+        "BTCUSDT": market,
+        "ETHUSDT": 1.3 * market + rng.normal(0, 0.006, bars),
+        "SOLUSDT": 1.8 * market + rng.normal(0, 0.015, bars),
+        "XRPUSDT": rng.normal(0, 0.012, bars),
+    }
+    return {symbol: 100 * np.exp(np.cumsum(returns[symbol])) for symbol in SYMBOLS}
+
+
+def expected(series, window):
+    returns = np.column_stack([np.diff(np.log(series[symbol]))[-window:] for symbol in SYMBOLS])
+    covariance = np.cov(returns, rowvar=False)
+    return np.corrcoef(returns, rowvar=False), covariance[:, 0] / covariance[0, 0]
+
+
+def test_streamed_correlation_matches_corrcoef():
+    series = closes()
+    window = 200
+    engine = CorrelationEngine(window=window, capacity=2)
+    bars = len(series["BTCUSDT"])
+    for bar in range(bars):
+        for symbol in SYMBOLS:
+            engine.on_close(symbol, bar * HOUR_MS, series[symbol][bar])
+    # The first close of the next bar finishes the last one
+    engine.on_close("BTCUSDT", bars * HOUR_MS, series["BTCUSDT"][-1])
+
+    correlation, betas = expected(series, window)
+    assert engine.rows == window
+    assert np.allclose(engine.correlation_matrix(), correlation, atol=1e-9)
+    assert np.allclose(engine.betas(), betas, atol=1e-9)
+    assert engine.beta("BTCUSDT") == pytest.approx(1.0)
+
+
+def test_seeded_then_streamed_correlation_matches_corrcoef():
+    series = closes(bars=600, seed=9)
+    window = 150
+    engine = CorrelationEngine(window=window)
+    engine.seed({symbol: values[:400] for symbol, values in series.items()})
+    for bar in range(400, 600):
+        for symbol in SYMBOLS:
+            engine.on_close(symbol, bar * HOUR_MS, series[symbol][bar])
+    engine.on_close("BTCUSDT", 600 * HOUR_MS, series["BTCUSDT"][-1])
+
+    correlation, betas = expected(series, window)
+    assert np.allclose(engine.correlation_matrix(), correlation, atol=1e-9)
+    assert np.allclose(engine.betas(), betas, atol=1e-9)
+    assert engine.discount("ETHUSDT", ["BTCUSDT"]) == pytest.approx(1 - 0.5 * correlation[1, 0])
+    assert engine.discount("XRPUSDT", []) == 1.0
+
+
+def test_seeding_a_single_close_loads_no_returns():
+    engine = CorrelationEngine(window=50)
+    engine.seed({"BTCUSDT": np.array([65000.0]), "ETHUSDT": np.array([3000.0, 3100.0])})
+    assert engine.rows == 0
+    assert not engine.returns.any()
+    assert engine.correlation("BTCUSDT", "ETHUSDT") == 0.0
+
+
+def test_combined_stream_seeds_from_rest_then_applies_closed_klines(monkeypatch):
+    series = closes(bars=301, seed=3)
+    window = 150
+    engine = CorrelationEngine(window=window)
+    stream = CorrelationStream(engine, SYMBOLS)
+    assert stream.stream_url.endswith("?streams=btcusdt@kline_1h/ethusdt@kline_1h/solusdt@kline_1h/xrpusdt@kline_1h")
+
+    async def binance_get(client, path, params, priority=None):
+        # Bars 0..249 closed, plus bar 250 still forming
+        klines = [[bar * HOUR_MS, 0, 0, 0, str(series[params["symbol"]][bar])] for bar in range(251)]
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: klines[-params["limit"]:])
+
+    monkeypatch.setattr(correlation, "binance_get", binance_get)
+    asyncio.run(stream._seed())
+    assert engine.rows == window
+
+    def kline(symbol, bar, closed=True):
+        return {"stream": f"{symbol.lower()}@kline_1h",
+                "data": {"k": {"s": symbol, "t": bar * HOUR_MS, "c": str(series[symbol][bar]), "x": closed}}}
+
+    # A replayed seeded bar and a forming update change nothing
+    stream.on_message(kline("BTCUSDT", 249))
+    stream.on_message(kline("ETHUSDT", 250, closed=False))
+    for bar in range(250, 301):
+        for symbol in SYMBOLS:
+            stream.on_message(kline(symbol, bar))
+    stream.on_message(kline("BTCUSDT", 0))  # stale, ignored
+    engine.on_close("BTCUSDT", 301 * HOUR_MS, series["BTCUSDT"][-1])
+
+    expected_correlation, betas = expected(series, window)
+    assert np.allclose(engine.correlation_matrix(), expected_correlation, atol=1e-9)
+    assert np.allclose(engine.betas(), betas, atol=1e-9)
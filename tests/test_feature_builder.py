@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+from services.feature_builder import (FEATURE_NAMES, FEATURE_NEUTRAL, WARMUP_PERIODS, FeatureExporter,
+                                      build_feature_matrix, build_latest_features)
+
+
+def candles(n=400, seed=4, flat=0):
+    rng = np.random.default_rng(seed)
+    close = 65000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    high = close * (1 + rng.uniform(0, 0.003, n))
+    low = close * (1 - rng.uniform(0, 0.003, n))
+    close[:flat] = high[:flat] = low[:flat] = 65000.0
+    return {"open": close, "high": high, "low": low, "close": close, "volume": rng.uniform(1, 50, n)}
+
+
+class Smoother:
+    """Recursive average seeded with its first value (pandas ewm(adjust=False))"""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+def ema(span):
+    return Smoother(2 / (span + 1))
+
+
+def wilder(period):
+    return Smoother(1 / period)
+
+
+def ratio(numerator, denominator):
+    return numerator / denominator if denominator else math.nan
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def std(values):
+    m = mean(values)
+    return math.sqrt(sum((v - m) ** 2 for v in values) / (len(values) - 1))
+
+
+def reference_features(data):
+    """The 15 features one candle at a time, straight from the textbook definitions"""
+    high, low, close, volume = (list(data[key]) for key in ("high", "low", "close", "volume"))
+    typical = [(h + l + c) / 3 for h, l, c in zip(high, low, close)]
+    ema_20, ema_12, ema_26, macd_signal = ema(20), ema(12), ema(26), ema(9)
+    volume_fast, volume_slow = ema(5), ema(20)
+    avg_gain, avg_loss = wilder(14), wilder(14)
+    atr, plus_dm, minus_dm, adx = wilder(14), wilder(14), wilder(14), wilder(14)
+    stoch_k, returns, rows = [], [math.nan], []
+
+    for i in range(len(close)):
+        c = close[i]
+        row = {}
+        e20 = ema_20.update(c)
+        macd = ema_12.update(c) - ema_26.update(c)
+        signal = macd_signal.update(macd)
+        v_fast, v_slow = volume_fast.update(volume[i]), volume_slow.update(volume[i])
+        if i:
+            delta = c - close[i - 1]
+            gain, loss = avg_gain.update(max(delta, 0.0)), avg_loss.update(max(-delta, 0.0))
+            up, down = high[i] - high[i - 1], low[i - 1] - low[i]
+            true_range = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+            smoothed_tr = atr.update(true_range)
+            plus_di = ratio(plus_dm.update(up if up > down and up > 0 else 0.0), smoothed_tr)
+            minus_di = ratio(minus_dm.update(down if down > up and down > 0 else 0.0), smoothed_tr)
+            dx = ratio(abs(plus_di - minus_di), plus_di + minus_di)
+            if adx.value is not None or not math.isnan(dx):
+                adx.update(0.0 if math.isnan(dx) else dx)
+            returns.append((c - close[i - 1]) / close[i - 1])
+
+        if i < WARMUP_PERIODS:
+            stoch_k.append(math.nan if i < 13 else
+                           ratio(c - min(low[i - 13:i + 1]), max(high[i - 13:i + 1]) - min(low[i - 13:i + 1])))
+            rows.append([math.nan] * len(FEATURE_NAMES))
+            continue
+
+        sma_20 = mean(close[i - 19:i + 1])
+        row["price_sma_ratio"] = c / sma_20 - 1
+        row["price_ema_ratio"] = c / e20 - 1
+        row["sma_ema_divergence"] = (sma_20 - e20) / c
+        row["rsi_norm"] = 1.0 if loss == 0 else (100 - 100 / (1 + gain / loss)) / 100
+
+        highest, lowest = max(high[i - 13:i + 1]), min(low[i - 13:i + 1])
+        stoch_k.append(ratio(c - lowest, highest - lowest))
+        row["stoch_norm"] = mean(stoch_k[-3:])
+        row["williams_norm"] = 1 - ratio(highest - c, highest - lowest)
+
+        window = typical[i - 19:i + 1]
+        tp_sma = mean(window)
+        mean_dev = mean([abs(tp - tp_sma) for tp in window])
+        row["cci_norm"] = min(max(ratio(typical[i] - tp_sma, 0.015 * mean_dev) / 200, -1), 1)
+
+        positive = sum(typical[j] * volume[j] for j in range(i - 13, i + 1) if typical[j] > typical[j - 1])
+        negative = sum(typical[j] * volume[j] for j in range(i - 13, i + 1) if typical[j] < typical[j - 1])
+        row["mfi_norm"] = 1.0 if negative == 0 else (100 - 100 / (1 + positive / negative)) / 100
+
+        row["macd_divergence"] = (macd - signal) / c
+        row["adx_norm"] = math.nan if adx.value is None else adx.value
+        std_20 = std(close[i - 19:i + 1])
+        row["bb_position"] = ratio(c - (sma_20 - 2 * std_20), 4 * std_20)
+        row["volatility_ratio"] = ratio(std(returns[i - 9:i + 1]), std(returns[i - 49:i + 1]))
+
+        flows = [ratio((close[j] - low[j]) - (high[j] - close[j]), high[j] - low[j]) for j in range(i - 19, i + 1)]
+        flows = [0.0 if math.isnan(flow) else flow for flow in flows]
+        row["cmf"] = sum(f * v for f, v in zip(flows, volume[i - 19:i + 1])) / sum(volume[i - 19:i + 1])
+        row["volume_osc_norm"] = (v_fast - v_slow) / v_slow
+        lowest_20, highest_20 = min(low[i - 19:i + 1]), max(high[i - 19:i + 1])
+        row["price_range_position"] = ratio(c - lowest_20, highest_20 - lowest_20)
+
+        rows.append([FEATURE_NEUTRAL.get(name, 0.0) if math.isnan(row[name]) else row[name]
+                     for name in FEATURE_NAMES])
+    return np.array(rows)
+
+
+def test_vectorized_matrix_matches_the_per_row_definitions():
+    data = candles()
+    matrix = build_feature_matrix(data)
+    expected = reference_features(data)
+    assert matrix.shape == (400, len(FEATURE_NAMES))
+    assert np.isnan(matrix[:WARMUP_PERIODS]).all()
+    for column, name in enumerate(FEATURE_NAMES):
+        assert np.allclose(matrix[WARMUP_PERIODS:, column], expected[WARMUP_PERIODS:, column],
+                           rtol=1e-9, atol=1e-12), name
+
+
+def test_adx_warm_up_starts_from_the_first_defined_dx():
+    # A flat start has no directional movement, so DX is undefined there
+    data = candles(flat=80)
+    matrix = build_feature_matrix(data)
+    expected = reference_features(data)
+    adx = FEATURE_NAMES.index("adx_norm")
+    assert np.allclose(matrix[WARMUP_PERIODS:, adx], expected[WARMUP_PERIODS:, adx], rtol=1e-9)
+    # Seeded from real DX rather than decaying up from zero
+    assert matrix[82, adx] > 0.2
+
+
+def test_latest_features_and_chunked_export_agree_with_one_pass(tmp_path):
+    data = candles(n=1200)
+    full = build_feature_matrix(data)
+    latest = build_latest_features(data)
+    assert list(latest) == FEATURE_NAMES
+    assert np.allclose(list(latest.values()), full[-1])
+
+    chunks = [{key: values[start:start + 300] for key, values in data.items()} for start in range(0, 1200, 300)]
+    manifest = FeatureExporter(str(tmp_path), overlap=500).export(chunks)
+    assert manifest["rows"] == 1200 - WARMUP_PERIODS
+    last = np.load(tmp_path / manifest["files"][-1]["file"])
+    assert np.allclose(last["rsi_norm"], full[-300:, FEATURE_NAMES.index("rsi_norm")], atol=1e-6)
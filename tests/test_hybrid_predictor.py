@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.hybrid_predictor import ACTIONS, HybridPredictor, MicroBatcher
+from services.strategy_config import ConfigStore
+
+
+def test_concurrent_requests_share_one_batch():
+    calls = []
+
+    def predict(rows):
+        calls.append(len(rows))
+        return rows[:, :3] * 2
+
+    async def scenario():
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=20)
+        rows = [np.full((1, 3), float(i)) for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert calls == [5]
+    assert [float(row[0]) for row in results] == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_malformed_row_fails_its_batch_and_the_worker_survives():
+    async def scenario():
+        batcher = MicroBatcher(lambda rows: rows, max_batch_size=8, max_wait_ms=20)
+        good = batcher.submit(np.ones((1, 3)))
+        bad = batcher.submit(np.ones((1, 4)))
+        first = await asyncio.wait_for(asyncio.gather(good, bad, return_exceptions=True), 1.0)
+        later = await asyncio.wait_for(batcher.submit(np.full((1, 3), 7.0)), 1.0)
+        await batcher.close()
+        return first, later
+
+    first, later = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in first)
+    assert later.tolist() == [7.0, 7.0, 7.0]
+
+
+def test_model_errors_reach_every_caller():
+    def predict(rows):
+        raise RuntimeError("model exploded")
+
+    async def scenario():
+        batcher = MicroBatcher(predict, max_wait_ms=20)
+        results = await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(np.ones((1, 3))) for _ in range(3)), return_exceptions=True), 1.0)
+        await batcher.close()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+class FakeModel:
+    def __init__(self, classes, probabilities):
+        self.classes_ = np.array(classes)
+        self.probabilities = np.array(probabilities)
+
+    def predict_proba(self, rows):
+        return np.tile(self.probabilities, (len(rows), 1))
+
+
+class StubEngine:
+    def __init__(self):
+        self.config = ConfigStore()
+
+
+def test_ensemble_probabilities_are_weighted_by_model(tmp_path):
+    predictor = HybridPredictor(engine=StubEngine(), model_dir=str(tmp_path),
+                                model_weights={"random_forest": 3.0, "gradient_boost": 1.0})
+    predictor.models = {
+        "random_forest": FakeModel(["buy", "sell", "wait"], [0.6, 0.2, 0.2]),
+        "gradient_boost": FakeModel(["sell", "wait"], [0.4, 0.6]),
+    }
+
+    async def scenario():
+        try:
+            return await predictor.predict_proba(np.zeros(15))
+        finally:
+            await predictor.close()
+
+    probabilities = asyncio.run(scenario())
+    assert list(probabilities) == ACTIONS
+    assert probabilities["BUY"] == pytest.approx(0.45)
+    assert probabilities["SELL"] == pytest.approx(0.25)
+    assert probabilities["HOLD"] == pytest.approx(0.3)
+
+
+def test_closing_a_predictor_drops_its_config_listener(tmp_path):
+    engine = StubEngine()
+    predictor = HybridPredictor(engine=engine, model_dir=str(tmp_path))
+    assert len(engine.config.listeners) == 1
+    engine.config.apply({"hybrid_weights": {"rule_based": 0.5, "ai_based": 0.5}})
+    assert predictor.hybrid_weights["ai_based"] == 0.5
+
+    asyncio.run(predictor.close())
+    assert engine.config.listeners == []
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+
+from verify_api_endpoints import LoadTester, parse_args, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_load_run_follows_the_mix_and_sends_the_token():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.headers.get("Authorization")))
+        return httpx.Response(200, json={"ok": True})
+
+    tester = LoadTester({"/api/bitcoin/price": 3, "/api/signals/quick-action": 1}, concurrency=4,
+                        duration=0.3, ramp_up=0.1, auth_token="token", transport=httpx.MockTransport(handler))
+    asyncio.run(tester.run())
+
+    price, quick = (len(tester.samples[e]) for e in ("/api/bitcoin/price", "/api/signals/quick-action"))
+    assert price + quick == len(seen) > 40
+    assert 2 < price / quick < 4.5
+    assert {token for _, token in seen} == {"Bearer token"}
+    assert tester.elapsed >= 0.3
+
+
+def test_summary_applies_budgets_and_counts_errors(tmp_path):
+    tester = LoadTester({"/fast": 1, "/slow": 1, "/broken": 1, "/idle": 1},
+                        budgets={"/fast": 50, "/slow": 50}, default_budget_ms=1000)
+    tester.samples["/fast"] = [(float(ms), True) for ms in range(1, 41)]
+    tester.samples["/slow"] = [(10.0, True)] * 90 + [(200.0, True)] * 10
+    tester.samples["/broken"] = [(5.0, True), (5.0, False)]
+    tester.elapsed = 2.0
+
+    report = tester.generate_report(str(tmp_path / "load.json"))
+    endpoints = report["endpoints"]
+    assert endpoints["/fast"]["latency_ms"]["p95"] == 38
+    assert endpoints["/fast"]["throughput_rps"] == 20
+    assert endpoints["/fast"]["within_budget"]
+    assert endpoints["/slow"]["latency_ms"]["p95"] == 200 and not endpoints["/slow"]["within_budget"]
+    assert endpoints["/broken"]["error_rate"] == 50 and not endpoints["/broken"]["within_budget"]
+    # An endpoint that was never hit cannot claim to be within budget
+    assert endpoints["/idle"]["requests"] == 0 and not endpoints["/idle"]["within_budget"]
+    assert report["summary"]["requests"] == 142
+    assert sorted(report["summary"]["endpoints_over_budget"]) == ["/broken", "/idle", "/slow"]
+    assert json.loads((tmp_path / "load.json").read_text())["summary"] == report["summary"]
+
+
+def test_failed_requests_are_recorded_as_errors():
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(503)
+
+    tester = LoadTester({"/down": 1, "/unavailable": 1}, concurrency=2, duration=0.1, ramp_up=0,
+                        transport=httpx.MockTransport(handler))
+    asyncio.run(tester.run())
+    assert all(not ok for samples in tester.samples.values() for _, ok in samples)
+    assert all(tester.samples.values())
+
+
+def test_load_flags():
+    args = parse_args(["--load", "--concurrency", "50", "--duration", "30", "--ramp-up", "5",
+                       "--budget-ms", "250", "--report", "out.json"])
+    assert args.load and args.concurrency == 50 and args.duration == 30 and args.ramp_up == 5
+    assert args.budget_ms == 250 and args.report == "out.json"
+    assert not parse_args([]).load
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import logging
+
+from services import startup
+from services.log_pipeline import LogPipeline, RepeatFilter
+from services.signal_execution import SignalExecutionEngine
+
+
+class BrokenFrame(dict):
+    """Candles whose every read fails with a different message, like a live data error"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        raise ValueError(f"bad candle {self.reads}")
+
+
+def test_engine_errors_with_changing_details_share_one_key():
+    engine = SignalExecutionEngine()
+    engine.price_data["1h"] = BrokenFrame()
+    repeat = RepeatFilter(burst=3)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(repeat)
+    engine_logger = logging.getLogger("services.signal_execution")
+    engine_logger.addHandler(handler)
+    try:
+        for _ in range(10):
+            assert asyncio.run(engine._get_volatility_index()) == 0.02
+    finally:
+        engine_logger.removeHandler(handler)
+
+    assert len(records) == 3
+    assert repeat.suppressed_total == 7
+    assert records[0].getMessage() == "Error calculating volatility: bad candle 1"
+
+
+def test_suppressed_count_rides_on_the_next_record(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("services.log_pipeline.time.monotonic", lambda: clock[0])
+    repeat = RepeatFilter(burst=1, interval=60)
+
+    def record(value):
+        return logging.LogRecord("engine", logging.ERROR, __file__, 1, "Error fetching %s", (value,), None)
+
+    assert repeat.filter(record(1))
+    assert not repeat.filter(record(2))
+    assert not repeat.filter(record(3))
+    clock[0] = 61
+    passed = record(4)
+    assert repeat.filter(passed)
+    assert passed.suppressed == 2
+    # Below the minimum level nothing is limited
+    info = logging.LogRecord("engine", logging.INFO, __file__, 1, "tick %s", (1,), None)
+    assert all(repeat.filter(info) for _ in range(5))
+
+
+def test_install_routes_the_root_logger_through_the_writer():
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    stream = io.StringIO()
+    pipeline = LogPipeline(burst=2)
+    pipeline.install(handlers=[logging.StreamHandler(stream)])
+    writer = pipeline.writer
+    try:
+        assert pipeline.install() is pipeline and pipeline.writer is writer
+        assert root.handlers == [pipeline.handler]
+        for attempt in range(5):
+            logging.getLogger("services.precision_trading").error("Error fetching OHLCV data: %s", attempt)
+    finally:
+        pipeline.stop()
+        root.setLevel(level)
+
+    assert root.handlers == handlers
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("Error fetching OHLCV data: 0")
+    assert pipeline.get_stats()["suppressed"] == 3
+
+
+def test_start_preload_installs_the_log_pipeline(monkeypatch):
+    installs = []
+    monkeypatch.setattr(startup.log_pipeline, "install", lambda: installs.append(True))
+    monkeypatch.setattr(startup.readiness, "start", lambda: None)
+    assert startup.start_preload() is startup.readiness
+    assert installs == [True]
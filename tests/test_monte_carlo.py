@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.monte_carlo import MonteCarloSimulator
+
+
+def candles(n=600, sigma=0.004, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 65000 * np.exp(np.cumsum(rng.normal(0, sigma, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, sigma / 2, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, sigma / 2, n))
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": 1.0})
+
+
+def reference(moves, start, action, entry, take_profit, stop_loss):
+    """One path at a time in prices: wait for the fill, then the first of TP or SL"""
+    closes, highs, lows = (start * np.exp(m) for m in moves)
+    outcomes, fills = [], 0
+    for path in range(len(closes)):
+        filled_at = 0 if (entry >= start if action == "BUY" else entry <= start) else None
+        result = 0.0
+        for step in range(closes.shape[1]):
+            high, low = highs[path, step], lows[path, step]
+            fill_candle = filled_at is None
+            if filled_at is None:
+                if (low <= entry) if action == "BUY" else (high >= entry):
+                    filled_at = step
+                else:
+                    continue
+            stopped = low <= stop_loss if action == "BUY" else high >= stop_loss
+            target = high >= take_profit if action == "BUY" else low <= take_profit
+            if stopped:
+                result = -abs(entry - stop_loss) / entry
+                break
+            if target and not fill_candle:
+                result = abs(take_profit - entry) / entry
+                break
+        else:
+            if filled_at is not None:
+                direction = 1 if action == "BUY" else -1
+                result = direction * (closes[path, -1] - entry) / entry
+        fills += filled_at is not None
+        outcomes.append(result)
+    return fills / len(closes), float(np.mean(outcomes))
+
+
+@pytest.mark.parametrize("action,entry_offset", [("BUY", -0.006), ("BUY", 0.0), ("SELL", 0.004), ("SELL", -0.002)])
+def test_simulation_matches_a_path_by_path_reference(action, entry_offset):
+    data = candles()
+    start = float(data["close"].iloc[-1])
+    entry = start * (1 + entry_offset)
+    direction = 1 if action == "BUY" else -1
+    take_profit, stop_loss = entry * (1 + direction * 0.01), entry * (1 - direction * 0.008)
+
+    result = MonteCarloSimulator(n_paths=2000, seed=3).simulate(
+        data, action, entry, [{"level": take_profit, "weight": 1.0}], stop_loss, horizon=20)
+    moves = MonteCarloSimulator(n_paths=2000, seed=3).simulate_moves(data, 20)
+    fill_probability, expected = reference(moves, start, action, entry, take_profit, stop_loss)
+
+    assert result["fill_probability"] == pytest.approx(fill_probability, abs=1e-4)
+    assert result["take_profit"][0]["expected_value_pct"] == pytest.approx(expected * 100, abs=2e-3)
+    assert result["expected_value_pct"] == pytest.approx(expected * 100, abs=2e-3)
+
+
+def test_an_entry_out_of_reach_never_fills():
+    data = candles(sigma=0.0005)
+    start = float(data["close"].iloc[-1])
+    entry = start * 0.9
+    result = MonteCarloSimulator(n_paths=1000, seed=1).simulate(
+        data, "BUY", entry, [{"level": entry * 1.01, "weight": 1.0}], entry * 0.99, horizon=12)
+    # Measured from the last close, these barriers would be hit all the time
+    assert result["fill_probability"] == 0
+    assert result["take_profit"][0]["probability"] == 0
+    assert result["stop_loss_probability"] == 0
+    assert result["expiry_probability"] == 0
+    assert result["expected_value_pct"] == 0
+
+
+def test_outcomes_only_cover_filled_paths():
+    data = candles()
+    start = float(data["close"].iloc[-1])
+    result = MonteCarloSimulator(n_paths=3000, seed=5).simulate(
+        data, "SELL", start * 1.003, [{"level": start * 0.99, "weight": 1.0}], start * 1.011, horizon=16)
+    filled = result["fill_probability"]
+    assert 0 < filled < 1
+    # Stop-outs include paths that touched the SL after the TP, so only bound them
+    stopped_first = filled - result["take_profit"][0]["probability"] - result["expiry_probability"]
+    assert 0 < stopped_first <= result["stop_loss_probability"] + 2e-4
+    assert result["stop_loss_probability"] <= filled
+
+
+def test_signal_wrapper_skips_hold_and_thin_history():
+    simulator = MonteCarloSimulator(n_paths=100, seed=0)
+    signal = {"timeframe": "15m", "action": "HOLD", "entry_price": 65000.0,
+              "take_profit": [{"level": 66000.0, "weight": 1.0}], "stop_loss": 64000.0}
+    assert simulator.simulate_signal(signal, candles()) == {}
+    assert simulator.simulate_signal({**signal, "action": "BUY"}, candles(n=20)) == {}
+    assert simulator.simulate_signal({**signal, "action": "BUY"}, candles())["horizon_candles"] == 16
@@ -0,0 +1,98 @@
+import asyncio
+
+from services.order_book import OrderBook, OrderBookSync, order_books
+from services.precision_trading import PrecisionTradingEngine
+
+
+def snapshot(last_update_id, bid=64999.0, ask=65001.0):
+    return {"lastUpdateId": last_update_id, "bids": [[str(bid), "2.0"]], "asks": [[str(ask), "1.5"]]}
+
+
+def diff(first, final, bids=(), asks=()):
+    return {"U": first, "u": final, "b": [list(level) for level in bids], "a": [list(level) for level in asks]}
+
+
+def test_diffs_apply_in_sequence_and_a_gap_unsyncs_the_book():
+    book = OrderBook()
+    assert book.resync(snapshot(100), [])
+    assert book.apply_diff(diff(90, 100, bids=[("1.0", "9")]))  # covered by the snapshot
+    assert book.best_bid() == 64999.0
+    assert book.apply_diff(diff(101, 103, bids=[("65000.0", "1")], asks=[("65001.0", "0")]))
+    assert (book.best_bid(), book.best_ask(), book.last_update_id) == (65000.0, None, 103)
+
+    assert not book.apply_diff(diff(105, 106, asks=[("65002.0", "1")]))
+    assert not book.synced
+    assert book.best_ask() is None  # nothing applied across the gap
+
+
+def test_resync_replays_buffered_diffs_before_marking_synced():
+    book = OrderBook()
+    buffered = [diff(95, 101, bids=[("64998.0", "3")]), diff(102, 104, asks=[("65001.0", "0"), ("65003.0", "1")])]
+    assert book.resync(snapshot(100), buffered)
+    assert book.synced and book.last_update_id == 104
+    assert (book.best_bid(), book.best_ask()) == (64999.0, 65003.0)
+
+    stale = OrderBook()
+    assert not stale.resync(snapshot(100), [diff(103, 104)])  # events 101-102 were missed
+    assert not stale.synced
+
+
+class ScriptedSync(OrderBookSync):
+    """Snapshots come from a queue of futures instead of the exchange"""
+
+    def __init__(self, book):
+        super().__init__(book)
+        self.requests = []
+
+    async def _fetch_snapshot(self):
+        future = asyncio.get_running_loop().create_future()
+        self.requests.append(future)
+        return await future
+
+
+def test_stream_sync_buffers_until_snapshot_and_resyncs_on_gap():
+    book = OrderBook()
+    sync = ScriptedSync(book)
+
+    async def scenario():
+        sync._request_snapshot()
+        await asyncio.sleep(0)
+        sync.on_event(diff(99, 101, bids=[("64998.0", "3")]))
+        sync.on_event(diff(102, 102, asks=[("65002.0", "1")]))
+        assert not book.synced and book.best_bid() is None
+
+        sync.requests[0].set_result(snapshot(100))
+        await asyncio.sleep(0)
+        # The snapshot is in, but the buffered diffs are not applied yet
+        assert not book.synced
+
+        sync.on_event(diff(103, 103, bids=[("65000.0", "1")]))
+        assert book.synced and book.last_update_id == 103
+        assert (book.best_bid(), book.best_ask()) == (65000.0, 65001.0)
+
+        sync.on_event(diff(110, 111))
+        assert not book.synced and book.resyncs == 1
+        await asyncio.sleep(0)
+        assert len(sync.requests) == 2
+
+        sync.on_event(diff(112, 114, bids=[("65000.5", "1")]))
+        sync.requests[1].set_result(snapshot(113, bid=64990.0, ask=65010.0))
+        await asyncio.sleep(0)
+        sync.on_event(diff(115, 115))
+        return book
+
+    asyncio.run(scenario())
+    assert book.synced and book.last_update_id == 115
+    assert (book.best_bid(), book.best_ask()) == (65000.5, 65010.0)
+
+
+def test_spread_adjustment_keeps_a_one_bp_floor(monkeypatch):
+    engine = PrecisionTradingEngine()
+    book = OrderBook()
+    book.resync(snapshot(1, bid=64999.99, ask=65000.0), [])
+    monkeypatch.setitem(order_books, "BTCUSDT", book)
+    # A one-tick book spread does not shrink the entry offset below 1 bp
+    assert abs(engine._get_spread_adjustment(65000.0) - 6.5) < 1e-9
+
+    book.resync(snapshot(2, bid=64980.0, ask=65000.0), [])
+    assert engine._get_spread_adjustment(65000.0) == 20.0
@@ -0,0 +1,44 @@
+from services.order_flow import OrderFlowAggregator
+
+DAY_MS = 86400 * 1000
+START_MS = 20000 * DAY_MS + 3600 * 1000  # one hour into a UTC day
+
+
+def test_trades_fold_into_cvd_windows_and_session_vwap():
+    flow = OrderFlowAggregator()
+    flow.on_trade(100.0, 2.0, START_MS, buyer_is_maker=False)
+    flow.on_agg_trade({"p": "110.0", "q": "1.0", "T": START_MS + 500, "m": True})
+    flow.on_trade(120.0, 1.0, START_MS + 120_000, buyer_is_maker=False)
+
+    assert flow.cvd == 2.0
+    assert flow.session_vwap(START_MS + 120_000) == (200 + 110 + 120) / 4
+    now = START_MS + 120_000
+    snapshot = flow.snapshot(now)
+    assert snapshot["windows"]["1m"]["vwap"] == 120.0  # the first two trades left the 1m window
+    assert snapshot["windows"]["5m"]["volume"] == 4.0
+    assert flow.imbalance("5m", now) == (3.0 - 1.0) / 4.0
+    assert flow.imbalance("4h", now) == 0.0
+
+
+def test_windows_expire_on_read_without_new_trades():
+    flow = OrderFlowAggregator()
+    flow.on_trade(100.0, 1.0, START_MS, buyer_is_maker=False)
+    flow.on_trade(101.0, 3.0, START_MS + 240_000, buyer_is_maker=True)
+    assert flow.imbalance("5m", START_MS + 240_000) == -0.5
+
+    # Four minutes of silence: the buy left the 5m window, only the sell remains
+    assert flow.imbalance("5m", START_MS + 330_000) == -1.0
+    snapshot = flow.snapshot(START_MS + 600_000)
+    assert snapshot["windows"]["5m"]["volume"] == 0.0
+    assert snapshot["windows"]["5m"]["vwap"] is None
+    assert snapshot["windows"]["1h"]["volume"] == 4.0
+
+
+def test_session_vwap_ends_with_the_utc_day():
+    flow = OrderFlowAggregator()
+    flow.on_trade(100.0, 1.0, START_MS, buyer_is_maker=False)
+    assert flow.session_vwap(START_MS + 3600_000) == 100.0
+    # Yesterday's session is not today's VWAP, even before today's first trade
+    assert flow.session_vwap(START_MS + DAY_MS) is None
+    flow.on_trade(90.0, 1.0, START_MS + DAY_MS, buyer_is_maker=False)
+    assert flow.session_vwap(START_MS + DAY_MS) == 90.0
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from services.paper_trading import PaperTradingEngine
+
+
+def signal(action="BUY", entry=100.0, stop=95.0, targets=((105.0, 0.5), (110.0, 0.5)), expiration=None):
+    return {"action": action, "entry_price": entry, "stop_loss": stop, "timeframe": "1h",
+            "take_profit": [{"level": level, "weight": weight} for level, weight in targets],
+            "expiration": expiration}
+
+
+def test_entry_then_take_profit_ladder():
+    closed = []
+    engine = PaperTradingEngine(fee_bps=0.0, on_close=closed.append)
+    position = engine.submit_signal(signal(), notional=1000.0, timestamp=0.0)
+    assert engine.on_tick("BTCUSDT", 101.0, 1.0) == 0
+    # Gapping through the limit fills at the better tick price
+    assert engine.on_tick("BTCUSDT", 99.0, 2.0) == 1
+    assert position.status == "open" and position.fill_price == 99.0
+    # The bracket rests from the next tick on
+    assert engine.on_tick("BTCUSDT", 106.0, 3.0) == 1
+    assert position.remaining == pytest.approx(5.0)
+    assert engine.orders[position.stop_order].quantity == pytest.approx(5.0)
+    assert engine.on_tick("BTCUSDT", 111.0, 4.0) == 1
+
+    assert closed == [position] and position.status == "closed"
+    assert position.realized_pnl == pytest.approx(5 * (106 - 99) + 5 * (111 - 99))
+    # The finished position and its orders leave the live maps and the price levels
+    assert engine.positions == {} and engine.orders == {}
+    assert all(len(side) == 0 for sides in engine.levels.values() for side in sides)
+    stats = engine.get_stats()
+    assert stats["closed_trades"] == 1 and stats["win_rate"] == 100.0
+    assert stats["realized_pnl"] == pytest.approx(95.0)
+
+
+def test_stop_cancels_take_profits_with_slippage():
+    engine = PaperTradingEngine(stop_slippage_bps=10.0, fee_bps=0.0)
+    position = engine.submit_signal(signal(action="SELL", entry=100.0, stop=105.0,
+                                           targets=((90.0, 1.0),)), notional=1000.0, timestamp=0.0)
+    engine.on_tick("BTCUSDT", 100.0, 1.0)
+    engine.on_tick("BTCUSDT", 104.0, 2.0)
+    assert engine.on_tick("BTCUSDT", 106.0, 3.0) == 1
+    assert position.exits[0][0] == "stop"
+    assert position.exits[0][1] == pytest.approx(106.0 * 1.001)
+    assert engine.stats["cancelled"] == 1
+    # The stop triggered a point through its level and then paid the slippage allowance
+    assert engine.get_stats()["avg_slippage_bps"] == {
+        "entry": 0.0, "stop": pytest.approx((106.0 * 1.001 - 105.0) / 105.0 * 10000, abs=0.01), "take_profit": None}
+    assert all(len(side) == 0 for sides in engine.levels.values() for side in sides)
+
+
+def test_cancelled_and_expired_entries_are_pruned():
+    engine = PaperTradingEngine(history=2)
+    kept = engine.submit_signal(signal(entry=90.0), notional=500.0, timestamp=0.0)
+    cancelled = engine.submit_signal(signal(entry=80.0), notional=500.0, timestamp=0.0)
+    expiring = engine.submit_signal(signal(entry=70.0, expiration=10.0), notional=500.0, timestamp=0.0)
+    engine.cancel_position(cancelled.position_id)
+    engine.on_tick("BTCUSDT", 100.0, 11.0)
+
+    assert expiring.status == "expired" and cancelled.status == "cancelled"
+    assert list(engine.positions) == [kept.position_id]
+    falling, rising = engine.levels["BTCUSDT"]
+    assert falling.keys == [90.0] and len(rising) == 0
+    assert list(engine.finished) == [cancelled, expiring]
+    assert engine.get_stats()["entries_expired"] == 1
+
+
+def random_session(seed):
+    rng = random.Random(seed)
+    price, ticks, signals = 100.0, [], []
+    for i in range(5000):
+        price *= 1 + rng.gauss(0, 0.002)
+        ticks.append(("BTCUSDT", round(price, 2), float(i)))
+        if i % 50 == 0:
+            action = rng.choice(["BUY", "SELL"])
+            side = 1 if action == "BUY" else -1
+            entry = price * (1 - side * 0.002)
+            signals.append((float(i), signal(action, entry, entry * (1 - side * 0.01),
+                                             ((entry * (1 + side * 0.01), 0.6), (entry * (1 + side * 0.02), 0.4)),
+                                             expiration=i + 200.0), 1000.0))
+    return ticks, signals
+
+
+def test_replay_is_deterministic():
+    ticks, signals = random_session(7)
+    engine = PaperTradingEngine()
+    first = engine.replay(ticks, signals)
+    first_exits = [(p.position_id, p.exits) for p in engine.finished]
+    second = engine.replay(ticks, signals)
+    assert first == second
+    assert [(p.position_id, p.exits) for p in engine.finished] == first_exits
+    assert first["entries_filled"] > 0 and first["closed_trades"] > 0
+    # Only live positions and their orders are kept
+    assert len(engine.positions) == first["open_positions"] + first["pending_entries"]
+
+
+def test_slippage_stats_stay_bounded_over_a_long_session():
+    engine = PaperTradingEngine(stop_slippage_bps=5.0, fee_bps=0.0)
+    for i in range(500):
+        engine.submit_signal(signal(entry=100.0, stop=99.0, targets=((101.0, 1.0),)), notional=100.0, timestamp=i)
+        engine.on_tick("BTCUSDT", 100.0, i + 0.1)
+        engine.on_tick("BTCUSDT", 98.0 if i % 2 else 102.0, i + 0.2)
+    assert engine.slippage_bps["entry"] == [0.0, 500]
+    assert engine.slippage_bps["stop"][1] + engine.slippage_bps["take_profit"][1] == 500
+    # Take-profits gapped through 101 and filled better, at 102
+    assert engine.get_stats()["avg_slippage_bps"]["take_profit"] == pytest.approx(-(102 - 101) / 101 * 10000, abs=0.01)
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fake_mongo import FakeDb
+from services.performance_rollups import PerformanceRollups
+
+START = datetime(2024, 3, 1, 12)
+
+
+def signal_doc(i, result="Pending", profit_loss_usd=0.0):
+    return {"trade_id": f"t{i}", "timestamp": START + timedelta(hours=7 * i),
+            "timeframe": ("15m", "1h", "4h")[i % 3], "action": ("Buy", "Sell")[i % 2],
+            "prediction_method": "hybrid", "result": result, "profit_loss_usd": profit_loss_usd}
+
+
+async def store(rollups, db, doc):
+    async with rollups.lock:
+        await db.trading_signals.insert_one(doc)
+        await rollups.record_signal(doc)
+
+
+async def resolve(rollups, db, trade_id, result, profit_loss_usd):
+    async with rollups.lock:
+        before = await db.trading_signals.find_one_and_update(
+            {"trade_id": trade_id}, {"$set": {"result": result, "profit_loss_usd": profit_loss_usd}})
+        await rollups.record_outcome(before, result, profit_loss_usd, previous_result=before["result"])
+
+
+def without_timestamp(stats):
+    return {key: value for key, value in stats.items() if key != "timestamp"}
+
+
+def test_incremental_rollups_match_a_rebuild():
+    db = FakeDb()
+    rollups = PerformanceRollups(db)
+
+    async def scenario():
+        for i in range(30):
+            await store(rollups, db, signal_doc(i))
+        for i in range(0, 30, 3):
+            await resolve(rollups, db, f"t{i}", "Win" if i % 2 else "Loss", 40.0 if i % 2 else -25.0)
+        incremental = await rollups.get_performance_stats(days=365)
+        assert await rollups.rebuild() > 0
+        return incremental, await rollups.get_performance_stats(days=365)
+
+    incremental, rebuilt = asyncio.run(scenario())
+    assert without_timestamp(incremental) == without_timestamp(rebuilt)
+    assert incremental["overall"]["total_signals"] == 30
+    assert incremental["overall"]["wins"] + incremental["overall"]["losses"] == 10
+
+
+def test_writes_during_a_rebuild_are_counted_once():
+    db = FakeDb()
+    rollups = PerformanceRollups(db)
+
+    async def writer():
+        for i in range(40, 60):
+            await store(rollups, db, signal_doc(i))
+        for i in range(0, 40, 4):
+            await resolve(rollups, db, f"t{i}", "Win", 10.0)
+
+    async def scenario():
+        # History written before the rollups existed; the rebuild backfills it
+        for i in range(40):
+            await db.trading_signals.insert_one(signal_doc(i))
+        await asyncio.gather(rollups.rebuild(), writer())
+        live = await rollups.get_performance_stats(days=365)
+        await rollups.rebuild()
+        return live, await rollups.get_performance_stats(days=365)
+
+    live, rebuilt = asyncio.run(scenario())
+    assert without_timestamp(live) == without_timestamp(rebuilt)
+    assert live["overall"]["total_signals"] == 60 and live["overall"]["wins"] == 10
+
+
+def test_daily_stats_read_only_the_newest_days():
+    db = FakeDb()
+    rollups = PerformanceRollups(db)
+
+    async def scenario():
+        for i in range(40):
+            await store(rollups, db, signal_doc(i))
+        return await rollups.get_performance_stats(days=5)
+
+    stats = asyncio.run(scenario())
+    dates = [day["date"] for day in stats["daily"]]
+    assert len(dates) == 5 and dates == sorted(dates, reverse=True)
+    assert dates[0] == (START + timedelta(hours=7 * 39)).strftime("%Y-%m-%d")
+    assert set(stats["by_timeframe"]) == {"15m", "1h", "4h"}
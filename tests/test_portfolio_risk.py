@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+
+from services import portfolio_risk as module
+from services.portfolio_risk import PortfolioRiskEngine
+
+def _signal(action="BUY", timeframe="15m", entry=65000.0):
+    return {"action": action, "timeframe": timeframe, "entry_price": entry}
+
+def test_engines_keep_separate_positions_for_one_timeframe():
+    engine = PortfolioRiskEngine()
+    engine.on_price("BTCUSDT", 65000.0, timestamp=0)
+    engine.track_signal(_signal(), notional_usd=650.0, source="precision")
+    engine.track_signal(_signal(), notional_usd=1300.0, source="execution")
+
+    portfolio = engine.get_assessment()["portfolio"]
+    assert portfolio["open_positions"] == 2
+    assert portfolio["gross_exposure"] == 1950.0
+
+    engine.track_signal(_signal(action="HOLD"), notional_usd=0.0, source="execution")
+    assert engine.get_assessment()["portfolio"]["gross_exposure"] == 650.0
+
+def test_incremental_scenarios_match_a_rebuild():
+    rng = np.random.default_rng(11)
+    engine = PortfolioRiskEngine(window=40, bar_seconds=60)
+    engine.track_signal(_signal(), notional_usd=5000.0, source="precision")
+    price = 65000.0
+    for bar in range(120):
+        price *= float(np.exp(rng.normal(0, 0.01)))
+        engine.on_price("BTCUSDT", price, timestamp=bar * 60)
+
+    incremental = engine.scenario_pnl.copy()
+    engine._rebuild()
+    np.testing.assert_allclose(incremental, engine.scenario_pnl, rtol=1e-9, atol=1e-9)
+
+def test_portfolio_risk_seeds_a_fresh_engine():
+    engine = PortfolioRiskEngine(window=50)
+    closes = 65000 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, 80)))
+    engine.seed_history({"BTCUSDT": closes})
+    assert engine.rows == 50
+    assert engine.get_assessment()["portfolio"]["scenarios"] == 50
+
+def test_bars_close_on_the_wall_clock_without_ticks():
+    engine = PortfolioRiskEngine(window=10, bar_seconds=60)
+    engine.on_price("BTCUSDT", 65000.0, timestamp=0)
+    engine.on_price("BTCUSDT", 65650.0, timestamp=30)
+    engine.get_assessment(now=300)
+    # The moving bar plus four quiet ones, each closed without a tick
+    assert engine.rows == 5
+    assert engine.returns[0, 0] == np.log(65650.0 / 65000.0)
+    assert not engine.returns[1:5].any()
+
+    engine.on_price("BTCUSDT", 66000.0, timestamp=10_000)
+    assert engine.rows == 10
+
+def test_seeding_after_live_ticks_only_fills_older_bars():
+    engine = PortfolioRiskEngine(window=50, bar_seconds=60)
+    engine.track_signal(_signal(), notional_usd=6500.0, source="precision")
+    engine.on_price("BTCUSDT", 65000.0, timestamp=100 * 60)
+    engine.on_price("BTCUSDT", 65500.0, timestamp=101 * 60)
+    engine.on_price("BTCUSDT", 66000.0, timestamp=102 * 60 + 5)
+    live = engine._chronological()
+
+    # Bars 40..101 closed on the exchange; 100 and 101 are already live rows
+    closes = 60000 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.01, 62)))
+    engine.seed_history({"BTCUSDT": closes}, last_bar=101)
+    assert engine.rows == 50
+    chronological = engine._chronological()
+    np.testing.assert_allclose(chronological[-2:], live)
+    np.testing.assert_allclose(chronological[:-2, 0], np.diff(np.log(closes))[-50:-2])
+    # The live mark survives; the seeded closes are older
+    assert engine.prices[0] == 66000.0
+    assert engine.get_assessment(now=102 * 60 + 10)["portfolio"]["gross_exposure"] == round(6500.0 / 65000.0 * 66000.0, 2)
+
+def test_seeding_retries_with_backoff(monkeypatch):
+    engine = PortfolioRiskEngine(window=50)
+    attempts, delays = [], []
+
+    async def seed(symbols):
+        attempts.append(symbols)
+        return 0 if len(attempts) < 3 else 50
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(engine, "seed_from_exchange", seed)
+    monkeypatch.setattr(module.asyncio, "sleep", sleep)
+
+    async def run():
+        engine.start_seeding(("BTCUSDT",))
+        engine.start_seeding(("BTCUSDT",))
+        await engine._seeding
+
+    asyncio.run(run())
+    assert len(attempts) == 3
+    assert delays == [module.SEED_RETRY_DELAY, module.SEED_RETRY_DELAY * 2]
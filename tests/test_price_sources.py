@@ -0,0 +1,115 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from services.price_sources import HedgedPriceFetcher, PriceQuote, PriceSource
+
+def _source(name):
+    return PriceSource(name, f"http://{name}.test/ticker", lambda data: float(data["price"]))
+
+class StandIn:
+    """Local stand-in venues: per-host price, delay and status code"""
+
+    def __init__(self, **venues):
+        self.venues = venues
+        self.requests = []
+
+    async def handler(self, request):
+        name = request.url.host.split(".")[0]
+        self.requests.append(name)
+        venue = self.venues[name]
+        await asyncio.sleep(venue.get("delay", 0.0))
+        if venue.get("status", 200) != 200:
+            return httpx.Response(venue["status"], json={"error": "unavailable"})
+        return httpx.Response(200, json={"price": str(venue["price"])})
+
+def _fetcher(stand_in, names, **options):
+    fetcher = HedgedPriceFetcher([_source(name) for name in names], **options)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(stand_in.handler))
+    return fetcher
+
+async def _fetch(fetcher):
+    try:
+        return await fetcher.fetch()
+    finally:
+        await fetcher.close()
+
+def test_slow_primary_is_hedged_after_the_delay():
+    stand_in = StandIn(slow={"price": 65000, "delay": 1.0}, fast={"price": 65010})
+    fetcher = _fetcher(stand_in, ["slow", "fast"], max_hedge_delay_ms=100)
+
+    started = time.perf_counter()
+    quote = asyncio.run(_fetch(fetcher))
+    elapsed = time.perf_counter() - started
+
+    assert quote.source == "fast"
+    assert stand_in.requests == ["slow", "fast"]
+    assert 0.1 <= elapsed < 0.5
+    # The losing request is cancelled, not counted as an error
+    assert fetcher.stats["slow"].errors == 0
+    assert fetcher.stats["fast"].requests == 1
+
+def test_fast_primary_is_not_hedged():
+    stand_in = StandIn(first={"price": 65000}, second={"price": 65010})
+    fetcher = _fetcher(stand_in, ["first", "second"], max_hedge_delay_ms=500)
+    quote = asyncio.run(_fetch(fetcher))
+    assert quote.source == "first"
+    assert stand_in.requests == ["first"]
+
+def test_error_routes_to_next_source_without_waiting():
+    stand_in = StandIn(broken={"price": 0, "status": 503}, backup={"price": 65000})
+    fetcher = _fetcher(stand_in, ["broken", "backup"], min_hedge_delay_ms=1000, max_hedge_delay_ms=1000)
+
+    started = time.perf_counter()
+    quote = asyncio.run(_fetch(fetcher))
+
+    assert quote.source == "backup"
+    assert time.perf_counter() - started < 0.5
+    assert fetcher.stats["broken"].errors == 1
+
+def test_ewma_ranks_failing_source_last():
+    stand_in = StandIn(flaky={"price": 0, "status": 500}, steady={"price": 65000})
+    fetcher = _fetcher(stand_in, ["flaky", "steady"])
+
+    async def scenario():
+        first = await fetcher.fetch()
+        stand_in.requests.clear()
+        second = await fetcher.fetch()
+        await fetcher.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.source == second.source == "steady"
+    assert [source.name for source in fetcher.ranked_sources()] == ["steady", "flaky"]
+    assert stand_in.requests == ["steady"]
+
+def test_lower_latency_ewma_is_asked_first():
+    fetcher = HedgedPriceFetcher([_source("a"), _source("b")])
+    for _ in range(10):
+        fetcher.stats["a"].record_success(120.0)
+        fetcher.stats["b"].record_success(20.0)
+    assert [source.name for source in fetcher.ranked_sources()] == ["b", "a"]
+
+def test_single_outlier_is_rejected():
+    stand_in = StandIn(bad={"price": 40000}, good={"price": 65100})
+    fetcher = _fetcher(stand_in, ["bad", "good"])
+    fetcher.last_quote = PriceQuote(price=65000, source="good", latency_ms=10)
+    quote = asyncio.run(_fetch(fetcher))
+    assert quote.source == "good"
+
+def test_move_during_outage_is_accepted_when_sources_agree():
+    stand_in = StandIn(a={"price": 50000}, b={"price": 50050})
+    fetcher = _fetcher(stand_in, ["a", "b"])
+    fetcher.last_quote = PriceQuote(price=65000, source="a", latency_ms=10)
+    quote = asyncio.run(_fetch(fetcher))
+    assert quote.source == "b"
+    assert quote.price == 50050
+
+def test_stale_reference_is_not_used():
+    stand_in = StandIn(only={"price": 50000})
+    fetcher = _fetcher(stand_in, ["only"])
+    fetcher.last_quote = PriceQuote(price=65000, source="only", latency_ms=10,
+                                    timestamp=datetime.now() - timedelta(minutes=5))
+    assert asyncio.run(_fetch(fetcher)).price == 50000
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import time
+
+from services.profiling import Profiler, StackSampler
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampled_call_writes_collapsed_stacks(tmp_path):
+    profiler = Profiler()
+    profiler.configure(enabled=True, sample_rate=1.0, output_dir=str(tmp_path))
+
+    @profiler.profile("recommendation")
+    async def recommendation():
+        busy_work(0.1)
+        return "ok"
+
+    assert asyncio.run(recommendation()) == "ok"
+    assert profiler.stats["sampled"] == 1
+    folded = (tmp_path / "recommendation.folded").read_text().splitlines()
+    assert any("busy_work" in line for line in folded)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+
+
+def test_slow_call_trace_records_spans(tmp_path):
+    profiler = Profiler()
+    profiler.configure(enabled=True, slow_call_ms=10, output_dir=str(tmp_path))
+
+    @profiler.profile("plan")
+    async def plan():
+        with profiler.span("indicators"):
+            busy_work(0.02)
+
+    asyncio.run(plan())
+    record = json.loads((tmp_path / "slow_calls.jsonl").read_text())
+    assert record["name"] == "plan"
+    assert [span["path"] for span in record["spans"]] == ["plan/indicators"]
+    assert (tmp_path / "plan.slow.folded").exists()
+
+
+def test_stopping_the_sampler_does_not_block_the_loop():
+    sampler = StackSampler(threading.get_ident(), interval=0.001)
+    sampler.start()
+    # Stand in for a sample that is slow to finish
+    sampler._thread = threading.Thread(target=time.sleep, args=(0.2,))
+    sampler._thread.start()
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        await sampler.stop_async()
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(ticks) > 5
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+
+from services.rate_limiter import Priority, WeightRateLimiter, binance_get, endpoint_weight
+
+
+def test_endpoint_weights_follow_the_binance_table():
+    assert endpoint_weight("/api/v3/klines", {"limit": 50}) == 1
+    assert endpoint_weight("/api/v3/klines", {"limit": 100}) == 2
+    assert endpoint_weight("/api/v3/klines", {"limit": 1000}) == 5
+    assert endpoint_weight("/api/v3/klines") == 5  # Binance's default limit is 500
+    assert endpoint_weight("/api/v3/depth", {"limit": 5000}) == 250
+    assert endpoint_weight("/api/v3/ticker/price", {"symbol": "BTCUSDT"}) == 2
+    assert endpoint_weight("/api/v3/ticker/24hr") == 80
+    assert endpoint_weight("/api/v3/time") == 1
+
+
+def test_waiters_are_served_by_priority_lane():
+    # 100 weight/s refill and no live reserve, so only the lane order matters
+    limiter = WeightRateLimiter(weight_per_minute=6000, safety_margin=1.0, live_reserve=0.0)
+    served = []
+
+    async def request(name, priority):
+        await limiter.acquire(5, priority)
+        served.append(name)
+
+    async def scenario():
+        limiter.tokens = 0.0
+        tasks = [asyncio.create_task(request(name, priority)) for name, priority in
+                 (("backfill", Priority.BACKFILL), ("normal", Priority.NORMAL), ("live-1", Priority.LIVE),
+                  ("live-2", Priority.LIVE))]
+        await asyncio.wait_for(asyncio.gather(*tasks), 2)
+
+    asyncio.run(scenario())
+    assert served == ["live-1", "live-2", "normal", "backfill"]
+    assert limiter.stats["waited"] == 4
+
+
+def test_live_reserve_is_held_back_from_other_lanes():
+    limiter = WeightRateLimiter(weight_per_minute=600, safety_margin=1.0, live_reserve=0.2)
+
+    async def scenario():
+        limiter.tokens = 110.0  # the reserve is 120
+        await asyncio.wait_for(limiter.acquire(5, Priority.LIVE), 0.1)
+        backfill = asyncio.create_task(limiter.acquire(5, Priority.BACKFILL))
+        await asyncio.sleep(0.01)
+        waiting = not backfill.done()
+        backfill.cancel()
+        return waiting
+
+    assert asyncio.run(scenario())
+    assert limiter.get_stats()["queued"] == 0
+
+
+def test_header_resync_lowers_tokens_but_never_below_zero():
+    limiter = WeightRateLimiter(weight_per_minute=1000, safety_margin=0.8)
+    limiter.update_from_headers({"x-mbx-used-weight-1m": "300"})
+    assert 499 <= limiter.tokens <= 501
+    # The exchange counts traffic we did not see, even beyond our safety-margined capacity
+    limiter.update_from_headers({"x-mbx-used-weight-1m": "950"})
+    assert limiter.tokens == 0.0
+    # Reporting less use than we assumed does not hand out extra tokens
+    limiter.update_from_headers({"x-mbx-used-weight-1m": "10"})
+    assert limiter.tokens < 1
+
+
+def test_throttled_response_blocks_every_lane():
+    limiter = WeightRateLimiter()
+    limiter.update_from_headers({"retry-after": "0.05"}, status_code=429)
+    assert limiter.stats["throttled_responses"] == 1
+
+    async def scenario():
+        started = time.monotonic()
+        await asyncio.wait_for(limiter.acquire(1, Priority.LIVE), 1)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.04
+
+
+def test_binance_get_charges_the_weight_and_reads_the_headers():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[], headers={"x-mbx-used-weight-1m": "4700"})
+
+    limiter = WeightRateLimiter()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await binance_get(client, "/api/v3/klines", {"symbol": "BTCUSDT", "limit": 500},
+                                     priority=Priority.LIVE, limiter=limiter)
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert requests[0].url.params["limit"] == "500"
+    assert limiter.stats["requests"] == 1
+    assert 100 <= limiter.tokens <= 101  # 4800 capacity - 4700 used by the exchange's count
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.resampler import CANDLE_COLUMNS, CandleResampler, resample_ohlcv
+
+def _base_candles(count=3000, start=1_700_000_040_000, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 65000 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 20, count))
+    return pd.DataFrame({
+        "timestamp": start + 60_000 * np.arange(count, dtype=np.int64),
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(1, 10, count)
+    })
+
+def _stream(resampler, frame):
+    for row in frame[CANDLE_COLUMNS].to_numpy():
+        resampler.on_base_candle(int(row[0]), *row[1:], closed=True)
+
+@pytest.mark.parametrize("timeframe", ["5m", "15m", "1h", "4h"])
+def test_streaming_matches_bulk_resample(timeframe):
+    frame = _base_candles()
+    resampler = CandleResampler(history=1000)
+    _stream(resampler, frame)
+
+    expected = resample_ohlcv(frame, timeframe)
+    actual = resampler.get_candles(timeframe, limit=len(expected))
+    np.testing.assert_allclose(actual[CANDLE_COLUMNS].to_numpy(), expected[CANDLE_COLUMNS].to_numpy())
+
+def test_seed_from_base_then_stream_matches_bulk_resample():
+    frame = _base_candles()
+    resampler = CandleResampler(history=1000)
+    resampler.seed_from_base(frame.iloc[:1700])
+    _stream(resampler, frame.iloc[1700:])
+
+    for timeframe in ("15m", "1h"):
+        expected = resample_ohlcv(frame, timeframe)
+        actual = resampler.get_candles(timeframe, limit=len(expected))
+        np.testing.assert_allclose(actual[CANDLE_COLUMNS].to_numpy(), expected[CANDLE_COLUMNS].to_numpy())
+
+def test_forming_candle_is_merged_into_the_last_row():
+    frame = _base_candles(count=30)
+    resampler = CandleResampler()
+    _stream(resampler, frame.iloc[:-1])
+    last = frame.iloc[-1]
+    resampler.on_base_candle(int(last["timestamp"]), last["open"], last["high"], last["low"], last["close"],
+                             last["volume"], closed=False)
+
+    expected = resample_ohlcv(frame, "15m")
+    actual = resampler.get_candles("15m")
+    np.testing.assert_allclose(actual[CANDLE_COLUMNS].to_numpy(), expected[CANDLE_COLUMNS].to_numpy())
+
+def test_replayed_candles_are_ignored():
+    frame = _base_candles(count=120)
+    resampler = CandleResampler()
+    _stream(resampler, frame)
+    _stream(resampler, frame.iloc[-20:])
+    expected = resample_ohlcv(frame, "5m")
+    np.testing.assert_allclose(resampler.get_candles("5m")[CANDLE_COLUMNS].to_numpy(),
+                               expected[CANDLE_COLUMNS].to_numpy())
+
+def test_local_candles_stop_when_the_stream_goes_quiet(monkeypatch):
+    import time
+
+    from services import resampler as module
+
+    resampler = CandleResampler(targets=["1m", "5m"])
+    resampler.seed_from_base(_base_candles(count=600))
+    monkeypatch.setitem(module.resamplers, "TESTUSDT", resampler)
+    # Seeded but never streamed: nothing says these candles are current
+    assert module.local_candles("5m", 50, symbol="TESTUSDT") is None
+
+    last = _base_candles(count=601).iloc[-1]
+    resampler.on_kline({"k": {"t": int(last["timestamp"]), "o": last["open"], "h": last["high"],
+                              "l": last["low"], "c": last["close"], "v": last["volume"], "x": False}})
+    assert len(module.local_candles("5m", 50, symbol="TESTUSDT")) == 50
+
+    resampler.last_kline_at = time.monotonic() - 90  # silent for longer than a 1m bar
+    assert module.local_candles("5m", 50, symbol="TESTUSDT") is None
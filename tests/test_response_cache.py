@@ -0,0 +1,184 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.response_cache import (ResponseCache, register_analytics_route, register_precision_routes,
+                                     register_signal_routes)
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_etag_ignores_computation_timestamp():
+    cache = ResponseCache()
+    calls = []
+
+    async def producer():
+        calls.append(1)
+        return {"total": 3, "timestamp": datetime.now().isoformat() + str(len(calls))}
+
+    cache.register("/stats", producer, ttl=0.0)
+
+    async def scenario():
+        first = await cache._produce("/stats")
+        second = await cache._produce("/stats")
+        return first, second
+
+    first, second = _run(scenario())
+    assert len(calls) == 2
+    assert first.etag == second.etag
+    assert first.body == second.body  # the body stays the one the ETag was issued for
+
+def test_etag_changes_with_content():
+    cache = ResponseCache()
+    values = iter([1, 2])
+
+    async def producer():
+        return {"total": next(values), "timestamp": datetime.now().isoformat()}
+
+    cache.register("/stats", producer)
+
+    async def scenario():
+        return (await cache._produce("/stats")).etag, (await cache._produce("/stats")).etag
+
+    first, second = _run(scenario())
+    assert first != second
+
+class FakeEngine:
+    def __init__(self):
+        self.entry = 65000.0
+
+    async def generate_trade_recommendation(self, timeframe):
+        now = datetime.now()
+        return {"timeframe": timeframe, "action": "BUY", "entry_price": self.entry, "stop_loss": 64000.0,
+                "take_profit": [{"level": 66000.0}], "confidence": 72.0,
+                "timestamp": now.isoformat(), "expiration": (now + timedelta(minutes=15)).isoformat()}
+
+def test_precision_route_keeps_etag_until_signal_changes():
+    cache = ResponseCache()
+    engine = FakeEngine()
+    register_precision_routes(cache, engine, timeframes=("15m",))
+    path = "/api/trading/precision-signal/15m"
+
+    async def scenario():
+        first = await cache._produce(path)
+        engine.entry += 1.0  # inside the tolerance
+        second = await cache._produce(path)
+        engine.entry += 500.0
+        third = await cache._produce(path)
+        return first.etag, second.etag, third.etag
+
+    first, second, third = _run(scenario())
+    assert first == second
+    assert third != first
+
+def test_failed_refresh_stops_serving_past_stale_bound():
+    cache = ResponseCache()
+    fail = []
+
+    async def producer():
+        if fail:
+            raise RuntimeError("exchange down")
+        return {"price": 1}
+
+    cache.register("/price", producer, ttl=1.0, stale_ttl=1.0)
+
+    async def scenario():
+        entry = await cache._produce("/price")
+        fail.append(True)
+        assert await cache._produce("/price") is entry  # within ttl + stale_ttl
+        entry.created -= 5.0
+        with pytest.raises(RuntimeError):
+            await cache._produce("/price")
+
+    _run(scenario())
+
+def test_tolerated_drift_is_reserialized_past_the_stale_bound():
+    cache = ResponseCache()
+    engine = FakeEngine()
+    register_precision_routes(cache, engine, timeframes=("15m",), ttl=1.0)
+    path = "/api/trading/precision-signal/15m"
+    cache.routes[path].stale_ttl = 1.0
+
+    async def scenario():
+        first = await cache._produce(path)
+        engine.entry += 1.0
+        kept = await cache._produce(path)
+        assert kept is first and first.body_age() < 1.0
+        # Each recompute confirmed the body, but the body itself is now too old to keep
+        first.produced -= 5.0
+        engine.entry += 1.0
+        return first, await cache._produce(path)
+
+    first, replaced = _run(scenario())
+    assert replaced is not first
+    assert b"65002.0" in replaced.body
+    assert replaced.etag != first.etag
+
+def test_failed_background_refresh_is_logged(caplog):
+    cache = ResponseCache()
+
+    async def producer():
+        raise RuntimeError("exchange down")
+
+    cache.register("/price", producer)
+
+    async def scenario():
+        task = cache._refresh("/price")
+        await asyncio.wait([task])
+        await asyncio.sleep(0)
+
+    with caplog.at_level("ERROR", logger="services.response_cache"):
+        _run(scenario())
+    assert "Error refreshing cached response for /price: exchange down" in caplog.text
+
+class TimeframeEngine:
+    def __init__(self, actions):
+        self.actions = actions
+        self.calls = []
+
+    async def generate_trade_recommendation(self, timeframe):
+        self.calls.append(timeframe)
+        action, confidence = self.actions[timeframe]
+        return {"timeframe": timeframe, "action": action, "confidence": confidence, "entry_price": 65000.0,
+                "stop_loss": 64000.0, "take_profit": [{"level": 66000.0}], "key_triggers": ["trend"],
+                "timestamp": datetime.now().isoformat(),
+                "expiration": (datetime.now() + timedelta(minutes=15)).isoformat()}
+
+def test_aggregate_routes_reuse_the_cached_signals():
+    engine = TimeframeEngine({"5m": ("SELL", 60.0), "15m": ("BUY", 80.0), "1h": ("BUY", 70.0)})
+    cache = ResponseCache()
+    register_signal_routes(cache, engine)
+
+    async def scenario():
+        multi = await cache.get("/api/signals/multi-timeframe")
+        quick = await cache.get("/api/signals/quick-action")
+        again = await cache._produce("/api/signals/multi-timeframe")
+        return multi, quick, again
+
+    multi, quick, again = _run(scenario())
+    assert sorted(engine.calls) == ["15m", "1h", "5m"]  # each timeframe computed once
+    payload = json.loads(multi.body)
+    assert payload["consensus"] == "BUY" and payload["sentiment"] == "BULLISH"
+    assert payload["agreement"] == 0.67
+    assert set(payload["signals"]) == {"5m", "15m", "1h"}
+    assert json.loads(quick.body)["timeframe"] == "15m"
+    assert again.etag == multi.etag
+
+def test_quick_action_holds_without_an_actionable_signal():
+    engine = TimeframeEngine({"15m": ("HOLD", 40.0)})
+    cache = ResponseCache()
+    register_signal_routes(cache, engine, timeframes=("15m",))
+    payload = json.loads(_run(cache.get("/api/signals/quick-action")).body)
+    assert payload["action"] == "HOLD" and payload["timeframe"] is None
+
+def test_elite_analytics_combines_the_live_services():
+    engine = TimeframeEngine({"15m": ("BUY", 80.0)})
+    cache = ResponseCache()
+    register_signal_routes(cache, engine, timeframes=("15m",))
+    register_analytics_route(cache)
+    payload = json.loads(_run(cache.get("/api/bitcoin/elite-analytics")).body)
+    assert payload["signals"]["consensus"] == "BUY"
+    assert {"order_flow", "volume_levels", "correlations", "portfolio_risk"} <= set(payload)
+    assert payload["portfolio_risk"]["overall_risk_level"]
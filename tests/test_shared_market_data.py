@@ -0,0 +1,127 @@
+import asyncio
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+
+import pandas as pd
+import pytest
+
+from services.portfolio_risk import PortfolioRiskEngine
+from services.price_sources import PriceQuote
+from services.shared_market_data import SharedMarketData
+from services.signal_execution import SignalExecutionEngine
+import services.signal_execution as signal_execution
+
+
+def _candles(close, rows=60):
+    return pd.DataFrame({"timestamp": range(rows), "open": close, "high": close + 50, "low": close - 50,
+                         "close": close, "volume": 1.0})
+
+
+@pytest.fixture
+def segment_name():
+    name = f"test_market_{uuid.uuid4().hex[:8]}"
+    yield name
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def test_publish_keeps_timeframes_missing_from_a_snapshot(segment_name):
+    publisher = SharedMarketData(segment_name, timeframes=("15m", "1h"), capacity=100, enabled=True)
+    reader = SharedMarketData(segment_name, timeframes=("15m", "1h"), capacity=100, enabled=True)
+    try:
+        assert publisher.publish(65000.0, {"15m": _candles(65000.0), "1h": _candles(64000.0)})
+        assert publisher.publish(65100.0, {"15m": _candles(65100.0)})
+        assert not reader.try_become_publisher()
+
+        view = reader.read()
+        assert view.version == 2 and view.price == 65100.0
+        assert view.candles["15m"][-1, 4] == 65100.0
+        assert view.candles["1h"][-1, 4] == 64000.0
+        assert view.indicators["1h"]["sma_20"] == 64000.0
+    finally:
+        reader.close()
+        publisher.close()
+
+
+class StubPrices:
+    def __init__(self):
+        self.price = 65000.0
+
+    async def fetch(self):
+        self.price += 1.0
+        return PriceQuote(price=self.price, source="stub", latency_ms=1.0)
+
+
+def _publisher_engine(segment_name, monkeypatch, fetched):
+    shared = SharedMarketData(segment_name, timeframes=("15m", "1h", "4h"), capacity=100, stale_after=0.06,
+                              enabled=True)
+    monkeypatch.setattr(signal_execution, "shared_market_data", shared)
+    monkeypatch.setattr(signal_execution, "portfolio_risk", PortfolioRiskEngine())
+    monkeypatch.setattr(signal_execution.portfolio_risk, "start_seeding", lambda *args: None)
+    engine = SignalExecutionEngine(prices=StubPrices())
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        fetched.append((timeframe, priority))
+        return _candles(65000.0)
+
+    engine._fetch_klines = fetch_klines
+    return shared, engine
+
+
+def test_idle_publisher_keeps_refreshing(segment_name, monkeypatch):
+    fetched = []
+    shared, engine = _publisher_engine(segment_name, monkeypatch, fetched)
+    reader = SharedMarketData(segment_name, timeframes=("15m", "1h", "4h"), capacity=100, stale_after=0.06,
+                              enabled=True)
+
+    async def scenario():
+        await engine.generate_execution_plan("15m")
+        # No more plans: the refresh loop alone has to keep the snapshot fresh
+        await asyncio.sleep(0.25)
+        view = reader.read()
+        await engine.close()
+        return view
+
+    try:
+        view = asyncio.run(scenario())
+        assert shared.is_publisher and shared.stats["publishes"] > 2
+        assert view is not None and set(view.candles) == {"15m", "1h"}
+        assert any(priority == signal_execution.Priority.NORMAL for _, priority in fetched)
+        # Only what a plan published is kept fresh; nobody asked for 4h
+        assert {tf for tf, _ in fetched} == {"15m", "1h"}
+        assert SignalExecutionEngine._refresh_task is None and engine._client is None
+    finally:
+        reader.close()
+        shared.close()
+
+
+def test_one_refresh_loop_per_process_stopped_by_close(segment_name, monkeypatch):
+    fetched = []
+    shared, first = _publisher_engine(segment_name, monkeypatch, fetched)
+    second = SignalExecutionEngine(prices=StubPrices())
+    second._fetch_klines = first._fetch_klines
+
+    async def scenario():
+        await first.generate_execution_plan("15m")
+        task = SignalExecutionEngine._refresh_task
+        await second.generate_execution_plan("1h")
+        assert SignalExecutionEngine._refresh_task is task
+        # Closing an engine that did not start the loop leaves it running
+        await second.close()
+        assert not task.done()
+        await first.close()
+        assert task.cancelled()
+        # Nothing left to rebuild the client after close
+        await asyncio.sleep(0.15)
+        return first._client
+
+    try:
+        assert asyncio.run(scenario()) is None
+        assert SignalExecutionEngine._refresh_task is None
+    finally:
+        shared.close()
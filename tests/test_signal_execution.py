@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pandas as pd
+
+from services.circuit_breaker import CircuitBreaker
+from services.order_flow import OrderFlowAggregator
+from services.portfolio_risk import PortfolioRiskEngine
+from services.price_sources import PriceQuote
+from services.shared_market_data import SharedMarketData
+from services.signal_execution import SignalExecutionEngine
+from services.strategy_config import ConfigStore
+import services.signal_execution as signal_execution
+
+class StubPrices:
+    async def fetch(self):
+        return PriceQuote(price=65000.0, source="stub", latency_ms=1.0)
+
+def _candles(rows=100):
+    return pd.DataFrame({"timestamp": range(rows), "open": 65000.0, "high": 65100.0, "low": 64900.0,
+                         "close": 65000.0, "volume": 1.0})
+
+def test_plan_fetches_only_the_timeframes_it_reads(monkeypatch):
+    monkeypatch.setattr(signal_execution, "shared_market_data", SharedMarketData(enabled=False))
+    monkeypatch.setattr(signal_execution, "portfolio_risk", PortfolioRiskEngine())
+    monkeypatch.setattr(signal_execution.portfolio_risk, "start_seeding", lambda *args: None)
+    engine = SignalExecutionEngine(prices=StubPrices())
+    fetched = []
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        fetched.append(timeframe)
+        return _candles()
+
+    engine._fetch_klines = fetch_klines
+    plan = asyncio.run(engine.generate_execution_plan("15m"))
+
+    assert sorted(fetched) == ["15m", "1h"]
+    assert plan["timeframe"] == "15m"
+    assert plan["market_context"]["current_price"] == 65000.0
+
+def test_plan_reports_the_configured_minimum_risk_reward(monkeypatch):
+    monkeypatch.setattr(signal_execution, "shared_market_data", SharedMarketData(enabled=False))
+    monkeypatch.setattr(signal_execution, "portfolio_risk", PortfolioRiskEngine())
+    monkeypatch.setattr(signal_execution.portfolio_risk, "start_seeding", lambda *args: None)
+    config = ConfigStore()
+    config.apply({"risk_reward_ratios": {"15m": {"high_confidence": 9.0, "medium_confidence": 9.0,
+                                                 "low_confidence": 9.0}}})
+    engine = SignalExecutionEngine(config=config, prices=StubPrices())
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        return _candles()
+
+    async def buy(timeframe):
+        return "BUY"
+
+    engine._fetch_klines = fetch_klines
+    engine._determine_action = buy
+    plan = asyncio.run(engine.generate_execution_plan("15m"))
+    assert plan["min_risk_reward"] == 9.0
+    assert any("below the 9.0 minimum" in trigger for trigger in plan["key_triggers"])
+
+def test_vwap_entry_uses_the_timeframe_candles_and_reports_session_vwap(monkeypatch):
+    monkeypatch.setattr(signal_execution, "shared_market_data", SharedMarketData(enabled=False))
+    monkeypatch.setattr(signal_execution, "portfolio_risk", PortfolioRiskEngine())
+    monkeypatch.setattr(signal_execution.portfolio_risk, "start_seeding", lambda *args: None)
+    flow = OrderFlowAggregator()
+    flow.on_trade(60000.0, 1.0, int(time.time() * 1000), buyer_is_maker=False)
+    monkeypatch.setattr(signal_execution, "live_order_flow", lambda symbol: flow)
+    engine = SignalExecutionEngine(prices=StubPrices())
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        candles = _candles()
+        if timeframe == "1h":
+            candles["high"], candles["low"], candles["close"] = 64300.0, 64100.0, 64200.0
+        return candles
+
+    engine._fetch_klines = fetch_klines
+    plan = asyncio.run(engine.generate_execution_plan("1h"))
+    assert asyncio.run(engine._calculate_vwap("1h")) == 64200.0
+    assert plan["market_context"]["session_vwap"] == 60000.0
+
+def test_outage_after_a_plan_does_not_invent_levels_for_other_timeframes(monkeypatch):
+    monkeypatch.setattr(signal_execution, "shared_market_data", SharedMarketData(enabled=False))
+    monkeypatch.setattr(signal_execution, "portfolio_risk", PortfolioRiskEngine())
+    monkeypatch.setattr(signal_execution.portfolio_risk, "start_seeding", lambda *args: None)
+    monkeypatch.setattr(signal_execution, "klines_breaker", CircuitBreaker("klines-test"))
+    engine = SignalExecutionEngine(prices=StubPrices())
+    exchange = {"down": False}
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        if exchange["down"]:
+            raise ConnectionError("exchange unreachable")
+        return _candles()
+
+    async def buy(timeframe):
+        return "BUY"
+
+    engine._fetch_klines = fetch_klines
+    engine._determine_action = buy
+    scalp = asyncio.run(engine.generate_execution_plan("5m"))
+    assert scalp["market_context"]["current_price"] == 65000.0
+    assert set(engine.updated_at) == {"5m", "1h"}
+
+    exchange["down"] = True
+    swing = asyncio.run(engine.generate_execution_plan("15m"))
+    # No 15m candles were ever fetched: report the fallback instead of levels from a made-up ATR
+    assert "Market data unavailable" in swing["key_triggers"]
+
+    # The 5m plan still has its own (recent) candles and keeps their 200-point ATR
+    scalp = asyncio.run(engine.generate_execution_plan("5m"))
+    assert "Market data unavailable" not in scalp["key_triggers"]
+    assert scalp["market_context"]["stale_data"]
+    assert abs(abs(scalp["take_profit"][0]["level"] - scalp["entry_price"]) - 0.8 * 200) < 1e-6
+
+def test_candles_fetched_for_one_plan_are_merged_not_replaced(monkeypatch):
+    monkeypatch.setattr(signal_execution, "shared_market_data", SharedMarketData(enabled=False))
+    engine = SignalExecutionEngine(prices=StubPrices())
+
+    async def fetch_klines(timeframe, limit=100, priority=None):
+        return _candles()
+
+    engine._fetch_klines = fetch_klines
+    asyncio.run(engine._fetch_market_data(["5m", "1h"]))
+    first = engine.updated_at["5m"]
+    asyncio.run(engine._fetch_market_data(["15m", "1h"]))
+    assert set(engine.price_data) == {"5m", "15m", "1h"}
+    assert engine.updated_at["5m"] == first < engine.updated_at["15m"]
+    assert engine._get_data_age(["5m", "1h"]) >= engine._get_data_age(["15m", "1h"])
+    assert engine._get_data_age(["4h"]) is None
@@ -0,0 +1,201 @@
+import asyncio
+import glob
+import os
+from datetime import datetime
+
+import pytest
+
+from fake_mongo import FakeDb
+from services.performance_rollups import PerformanceRollups
+from services.signal_changes import SignalChangeDetector
+from services.signal_journal import KIND_OUTCOME, KIND_SIGNAL, MongoForwarder, SignalJournal
+
+def _journal(path, **options):
+    options.setdefault("fsync", False)
+    options.setdefault("commit_interval", 0.001)
+    return SignalJournal(str(path), **options)
+
+def _signal(timeframe, price):
+    return {"timeframe": timeframe, "action": "BUY", "entry_price": price, "confidence": 70}
+
+def test_append_and_replay_in_order(tmp_path):
+    journal = _journal(tmp_path)
+    seqs = [journal.append_signal(_signal("15m", 65000 + i)) for i in range(10)]
+    journal.append_outcome(seqs[3], "Win", 120.0)
+    assert journal.sync()
+
+    records = list(journal.replay())
+    assert [record.seq for record in records] == list(range(1, 12))
+    assert records[0].data["entry_price"] == 65000
+    assert [record.kind for record in journal.replay(kinds=[KIND_OUTCOME])] == [KIND_OUTCOME]
+    assert [record.seq for record in journal.replay(since_seq=9)] == [9, 10, 11]
+    journal.close()
+
+def test_reopen_recovers_and_truncates_torn_tail(tmp_path):
+    journal = _journal(tmp_path)
+    for i in range(5):
+        journal.append_signal(_signal("1h", 65000 + i))
+    journal.sync()
+    journal.close()
+
+    # A crash mid-commit leaves a partial record behind
+    last = sorted(glob.glob(os.path.join(str(tmp_path), "journal-*.log")))[-1]
+    with open(last, "ab") as handle:
+        handle.write(b"\x20\x00\x00\x00partial")
+
+    reopened = _journal(tmp_path)
+    assert [record.seq for record in reopened.replay()] == [1, 2, 3, 4, 5]
+    assert reopened.stats["truncated_bytes"] == 11
+    assert reopened.append_signal(_signal("1h", 1.0)) == 6
+    reopened.sync()
+    assert [record.seq for record in reopened.replay()][-1] == 6
+    reopened.close()
+
+def test_rotation_replay_and_seek_across_segments(tmp_path):
+    journal = _journal(tmp_path, segment_bytes=2048, index_interval=4)
+    for i in range(200):
+        journal.append_signal(_signal("15m", 60000 + i))
+        if i % 20 == 0:
+            journal.sync()
+    journal.sync()
+    assert len(journal.segments) > 2
+
+    assert [record.seq for record in journal.replay(since_seq=150)] == list(range(150, 201))
+    middle = list(journal.replay())[100]
+    assert journal.seek(datetime.fromtimestamp(middle.timestamp_us / 1_000_000)) <= middle.seq
+    journal.close()
+
+    reopened = _journal(tmp_path, segment_bytes=2048, index_interval=4)
+    assert [record.seq for record in reopened.replay()] == list(range(1, 201))
+    reopened.close()
+
+def test_rebuild_state_primes_the_change_detector(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append_signal(_signal("15m", 65000))
+    journal.append_signal(_signal("1h", 66000))
+    latest = journal.append_signal(_signal("15m", 65500))
+    journal.append_outcome(latest, "Loss", -50.0)
+    journal.sync()
+
+    detector = SignalChangeDetector()
+    state = journal.rebuild_state(detector=detector)
+    assert state["latest"]["BTCUSDT:15m"]["entry_price"] == 65500
+    assert state["outcomes"][latest]["result"] == "Loss"
+    outcome, _ = detector.evaluate({**_signal("15m", 65500), "symbol": "BTCUSDT"})
+    assert outcome != "publish"
+    journal.close()
+
+def test_compaction_keeps_latest_signal_per_key(tmp_path):
+    journal = _journal(tmp_path, segment_bytes=1024)
+    journal.append_signal(_signal("1d", 1.0))
+    for i in range(100):
+        journal.append_signal(_signal("15m", 60000 + i))
+        journal.sync()
+    journal.forwarded_seq = journal.durable_seq
+    before = len(journal.segments)
+
+    result = journal.compact(retention_seconds=0)
+    assert result["removed_segments"] + result["rewritten_segments"] > 0
+    assert len(journal.segments) < before
+    signals = [record for record in journal.replay(kinds=[KIND_SIGNAL])]
+    assert any(record.data["timeframe"] == "1d" for record in signals)
+    assert signals[-1].data["entry_price"] == 60099
+    journal.close()
+
+def test_reopen_deletes_empty_sealed_segments(tmp_path):
+    journal = _journal(tmp_path, segment_bytes=512)
+    for i in range(20):
+        journal.append_signal(_signal("15m", 60000 + i))
+        journal.sync()
+    journal.close()
+
+    # A crash right after a rotation leaves an empty segment behind a newer one
+    segments = sorted(glob.glob(os.path.join(str(tmp_path), "journal-*.log")))
+    empty = segments[1]
+    with open(empty, "wb"):
+        pass
+    with open(empty[:-len(".log")] + ".idx", "w") as handle:
+        handle.write("{}")
+
+    reopened = _journal(tmp_path, segment_bytes=512)
+    reopened.open()
+    assert not os.path.exists(empty)
+    assert not os.path.exists(empty[:-len(".log")] + ".idx")
+    assert all(segment.path != empty for segment in reopened.segments)
+    assert [record.seq for record in reopened.replay()][-1] == 20
+    reopened.close()
+
+def _stats(rollups):
+    stats = asyncio.run(rollups.get_performance_stats(days=365))
+    return {key: value for key, value in stats.items() if key != "timestamp"}
+
+def _fill(journal):
+    seqs = {}
+    for i, timeframe in enumerate(["15m", "5m", "1h", "5m", "4h"]):
+        seqs[timeframe, i] = journal.append_signal({**_signal(timeframe, 65000 + i),
+                                                    "timestamp": f"2024-03-0{i + 1}T12:00:00"})
+    journal.append_outcome(seqs["15m", 0], "Win", 40.0)
+    journal.append_outcome(seqs["5m", 1], "Loss", -20.0)
+    journal.append_outcome(seqs["1h", 2], "Loss", -25.0)
+    journal.sync()
+
+def test_forwarder_keeps_rollups_in_step_and_reports_skips(tmp_path):
+    journal = _journal(tmp_path)
+    _fill(journal)
+    db = FakeDb()
+    forwarder = MongoForwarder(journal, db)
+
+    assert asyncio.run(forwarder.forward_once()) == 8
+    assert len(db.trading_signals.docs) == 3
+    stats = forwarder.get_stats()
+    assert stats["skipped"] == 2
+    assert stats["skipped_by_reason"] == {"timeframe 5m": 2}
+    assert stats["skipped_outcomes"] == 1
+
+    incremental = _stats(forwarder.rollups)
+    assert incremental["overall"]["total_signals"] == 3
+    assert incremental["overall"]["wins"] == 1 and incremental["overall"]["losses"] == 1
+    asyncio.run(forwarder.rollups.rebuild())
+    assert _stats(forwarder.rollups) == incremental
+    journal.close()
+
+@pytest.mark.parametrize("crash", ["rollups", "checkpoint"])
+def test_a_batch_replayed_after_a_crash_is_counted_once(tmp_path, monkeypatch, crash):
+    journal = _journal(tmp_path)
+    _fill(journal)
+    db = FakeDb()
+    forwarder = MongoForwarder(journal, db)
+    # Resolve an earlier signal again in a later batch, across the crash
+    asyncio.run(forwarder.forward_once())
+    journal.append_outcome(1, "Loss", -30.0)
+    journal.append_signal({**_signal("1d", 70000), "timestamp": "2024-03-09T12:00:00"})
+    journal.sync()
+
+    target, name = (forwarder.rollups, "record_journal") if crash == "rollups" else (forwarder, "_save_checkpoint")
+    original = getattr(target, name)
+    calls = []
+
+    def crashing(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("process died")
+        return original(*args)
+
+    async def crashing_async(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("process died")
+        return await original(*args)
+
+    monkeypatch.setattr(target, name, crashing_async if crash == "rollups" else crashing)
+    with pytest.raises(RuntimeError):
+        asyncio.run(forwarder.forward_once())
+    assert asyncio.run(forwarder.forward_once()) == 2
+
+    replayed = _stats(forwarder.rollups)
+    assert replayed["overall"]["total_signals"] == 4
+    assert replayed["overall"]["wins"] == 0 and replayed["overall"]["losses"] == 2
+    assert replayed["overall"]["total_profit_loss"] == -55.0
+    asyncio.run(forwarder.rollups.rebuild())
+    assert _stats(forwarder.rollups) == replayed
+    journal.close()
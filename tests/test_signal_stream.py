@@ -0,0 +1,216 @@
+import asyncio
+import json
+
+from services import signal_stream
+from services.paper_trading import PaperTradingEngine
+from services.price_sources import PriceQuote
+from services.signal_stream import (TOPICS, SignalBroadcaster, StreamEndpoint, run_price_publisher,
+                                    run_state_publisher)
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0)
+
+def _drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(json.loads(subscriber.queue.get_nowait().text))
+    return messages
+
+def test_publish_state_sends_only_changed_keys():
+    broadcaster = SignalBroadcaster()
+    subscriber = broadcaster.subscribe(["stats"])
+    broadcaster.publish_state("stats", {"health": {"status": "ok"}, "trade_history": [1]})
+    assert broadcaster.publish_state("stats", {"health": {"status": "ok"}, "trade_history": [1]}) == 0
+    broadcaster.publish_state("stats", {"health": {"status": "degraded"}, "trade_history": [1]})
+
+    messages = _drain(subscriber)
+    assert len(messages) == 2
+    assert messages[1]["data"]["changes"] == {"health": {"status": "degraded"}}
+
+    late = broadcaster.subscribe(["stats"])
+    snapshot = _drain(late)[0]["data"]
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["changes"] == {"health": {"status": "degraded"}, "trade_history": [1]}
+
+def test_state_publisher_keeps_last_value_of_failing_producer():
+    broadcaster = SignalBroadcaster()
+    subscriber = broadcaster.subscribe(["stats"])
+    calls = {"health": 0}
+
+    async def health():
+        calls["health"] += 1
+        return {"status": "ok"}
+
+    async def trade_history():
+        if calls["health"] > 1:
+            raise RuntimeError("database unavailable")
+        return {"trades": 3}
+
+    async def scenario():
+        task = asyncio.create_task(run_state_publisher(
+            "stats", {"health": health, "trade_history": trade_history}, broadcaster, interval=0))
+        await asyncio.wait_for(_until(lambda: calls["health"] >= 4), 1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    # One publish: the failing producer kept its value and nothing else changed
+    assert len(_drain(subscriber)) == 1
+    assert broadcaster.states["stats"] == {"health": {"status": "ok"}, "trade_history": {"trades": 3}}
+
+def test_late_subscriber_gets_every_timeframe():
+    broadcaster = SignalBroadcaster()
+    for timeframe, price in (("5m", 1.0), ("15m", 2.0), ("1h", 3.0), ("15m", 4.0)):
+        broadcaster.publish("signals", {"timeframe": timeframe, "entry_price": price})
+
+    late = broadcaster.subscribe(["signals"])
+    latest = {message["data"]["timeframe"]: message["data"]["entry_price"] for message in _drain(late)}
+    assert latest == {"5m": 1.0, "15m": 4.0, "1h": 3.0}
+
+def test_publisher_skips_unchanged_signals_but_late_joiners_see_them():
+    from services.signal_stream import run_signal_publisher
+
+    class Engine:
+        def __init__(self):
+            self.calls = 0
+
+        async def generate_trade_recommendation(self, timeframe):
+            self.calls += 1
+            return {"timeframe": timeframe, "action": "BUY", "entry_price": 65000.0, "stop_loss": 64000.0,
+                    "take_profit": [{"level": 66000.0}], "confidence": 70.0}
+
+    broadcaster = SignalBroadcaster()
+    engine = Engine()
+
+    async def scenario():
+        task = asyncio.create_task(run_signal_publisher(engine, broadcaster, interval=0))
+        await asyncio.wait_for(_until(lambda: engine.calls > 6), 1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert engine.calls > 6
+    assert broadcaster.published == 3  # one per timeframe, unchanged recomputes skipped
+    late = broadcaster.subscribe(["signals"])
+    assert sorted(message["data"]["timeframe"] for message in _drain(late)) == ["15m", "1h", "5m"]
+
+def test_published_signals_are_paper_traded(monkeypatch):
+    from services.signal_stream import run_signal_publisher
+
+    started = []
+    monkeypatch.setattr(signal_stream, "start_paper_trading", lambda engine: started.append(engine))
+
+    class Engine:
+        def __init__(self):
+            self.calls = 0
+
+        async def generate_trade_recommendation(self, timeframe):
+            self.calls += 1
+            # The 15m entry moves once, superseding the unfilled one
+            entry = 65000.0 if self.calls < 4 or timeframe != "15m" else 64000.0
+            return {"timeframe": timeframe, "action": "BUY", "entry_price": entry, "stop_loss": entry - 1000,
+                    "take_profit": [{"level": entry + 1000, "weight": 1.0}], "confidence": 70.0,
+                    "position_size": 650.0}
+
+    engine = Engine()
+    paper = PaperTradingEngine()
+
+    async def scenario():
+        task = asyncio.create_task(run_signal_publisher(engine, SignalBroadcaster(), timeframes=("15m", "1h"),
+                                                        interval=0, paper_trader=paper))
+        await asyncio.wait_for(_until(lambda: engine.calls > 8), 1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert started == [paper]
+    assert paper.stats["entries_submitted"] == 3
+    assert sorted(position.entry_price for position in paper.positions.values()) == [64000.0, 65000.0]
+    assert [position.status for position in paper.finished] == ["superseded"]
+    assert all(position.quantity == 650.0 / position.entry_price for position in paper.positions.values())
+
+class QuoteFetcher:
+    def __init__(self, prices):
+        self.prices = iter(prices)
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        return PriceQuote(price=next(self.prices), source="coinbase", latency_ms=5.0)
+
+def test_price_topic_publishes_only_moves():
+    assert "prices" in TOPICS
+    broadcaster = SignalBroadcaster()
+    subscriber = broadcaster.subscribe(["prices"])
+    fetcher = QuoteFetcher([65000.0, 65000.0, 65010.0] + [65010.0] * 1000)
+
+    async def scenario():
+        task = asyncio.create_task(run_price_publisher(broadcaster, symbol="NOSTREAM", interval=0,
+                                                       rest_interval=0, fetcher=fetcher))
+        first = json.loads((await asyncio.wait_for(subscriber.queue.get(), 1)).text)
+        second = json.loads((await asyncio.wait_for(subscriber.queue.get(), 1)).text)
+        task.cancel()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first["data"]["price"], second["data"]["price"]) == (65000.0, 65010.0)
+    assert second["data"]["source"] == "coinbase"
+    assert fetcher.calls >= 3
+    # The last price is retained for dashboards that open later
+    assert [m["data"]["price"] for m in _drain(broadcaster.subscribe(["prices"]))] == [65010.0]
+
+def test_price_topic_throttles_rest_fallback():
+    broadcaster = SignalBroadcaster()
+    fetcher = QuoteFetcher(float(price) for price in range(65000, 66000))
+
+    async def scenario():
+        task = asyncio.create_task(run_price_publisher(broadcaster, symbol="NOSTREAM", interval=0,
+                                                       rest_interval=60, fetcher=fetcher))
+        for _ in range(50):
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert fetcher.calls == 1
+    assert broadcaster.published == 1
+
+def test_websocket_changes_topics_without_reconnecting():
+    broadcaster = SignalBroadcaster()
+    broadcaster.publish("prices", {"symbol": "BTCUSDT", "price": 65000.0})
+    endpoint = StreamEndpoint(broadcaster, heartbeat=60)
+    incoming, sent = asyncio.Queue(), asyncio.Queue()
+
+    async def send(event):
+        await sent.put(event)
+
+    async def next_text():
+        while True:
+            event = await asyncio.wait_for(sent.get(), 1)
+            if event["type"] == "websocket.send":
+                return json.loads(event["text"])
+
+    async def scenario():
+        scope = {"type": "websocket", "query_string": b"topics=stats"}
+        await incoming.put({"type": "websocket.connect"})
+        server = asyncio.create_task(endpoint(scope, incoming.get, send))
+        assert (await asyncio.wait_for(sent.get(), 1))["type"] == "websocket.accept"
+        await _until(lambda: broadcaster.subscribers)
+        (subscriber,) = broadcaster.subscribers
+
+        await incoming.put({"type": "websocket.receive", "text": json.dumps({"subscribe": ["prices", "signals"]})})
+        retained = await next_text()
+        broadcaster.publish("signals", {"timeframe": "15m", "action": "BUY"})
+        pushed = await next_text()
+
+        await incoming.put({"type": "websocket.receive", "text": json.dumps({"unsubscribe": ["signals"]})})
+        await _until(lambda: "signals" not in subscriber.topics)
+        delivered = broadcaster.publish("signals", {"timeframe": "15m", "action": "SELL"})
+
+        await incoming.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(server, 1)
+        return subscriber, retained, pushed, delivered
+
+    subscriber, retained, pushed, delivered = asyncio.run(scenario())
+    assert retained["topic"] == "prices" and retained["data"]["price"] == 65000.0
+    assert pushed["data"]["action"] == "BUY"
+    assert delivered == 0
+    assert subscriber.topics == {"stats", "prices"}
+    assert not broadcaster.subscribers
@@ -0,0 +1,41 @@
+import asyncio
+import subprocess
+import sys
+
+import httpx
+
+from services.signal_execution import SignalExecutionEngine
+from services.startup import LazyModule, lazy_import
+
+def test_lazy_import_loads_on_first_attribute():
+    module = LazyModule("json")
+    assert module.dumps({"a": 1}) == '{"a": 1}'
+    assert lazy_import("sys") is sys
+
+def test_engine_imports_do_not_load_heavy_modules():
+    code = ("import sys, services.precision_trading, services.signal_execution; "
+            "print(','.join(m for m in ('numpy', 'pandas', 'httpx') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_execution_engine_creates_its_client_on_first_use():
+    engine = SignalExecutionEngine()
+    assert engine._client is None
+    assert isinstance(engine.client, httpx.AsyncClient)
+    assert engine.client is engine.client
+    asyncio.run(engine.close())
+    assert engine._client is None
+
+def test_fetch_klines_goes_through_the_client():
+    engine = SignalExecutionEngine()
+    kline = [1_700_000_000_000, "65000", "65100", "64900", "65050", "12.5", 0, "0", 10, "0", "0", "0"]
+    engine._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[kline])))
+
+    async def scenario():
+        try:
+            return await engine._fetch_klines("15m", limit=1)
+        finally:
+            await engine.close()
+
+    frame = asyncio.run(scenario())
+    assert float(frame["close"].iloc[-1]) == 65050.0
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime
+
+from services.strategy_config import ConfigStore
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query):
+        return FakeCursor(self.docs)
+
+class FakeDb:
+    def __init__(self, docs):
+        self.system_config = FakeCollection(docs)
+
+def _row(value, updated_at=None):
+    doc = {"config_key": "hybrid_weights", "config_value": value}
+    if updated_at is not None:
+        doc["updated_at"] = updated_at
+    return doc
+
+def test_refresh_without_updated_at_applies_once():
+    store = ConfigStore()
+    db = FakeDb([_row({"rule_based": 0.7, "ai_based": 0.3})])
+    assert asyncio.run(store.refresh(db)) is True
+    version = store.current.version
+    assert asyncio.run(store.refresh(db)) is False
+    assert asyncio.run(store.refresh(db)) is False
+    assert store.current.version == version
+
+def test_refresh_without_updated_at_picks_up_content_changes():
+    store = ConfigStore()
+    db = FakeDb([_row({"rule_based": 0.7, "ai_based": 0.3})])
+    asyncio.run(store.refresh(db))
+    db.system_config.docs = [_row({"rule_based": 0.5, "ai_based": 0.5})]
+    assert asyncio.run(store.refresh(db)) is True
+    assert store.current.hybrid_weights["rule_based"] == 0.5
+
+def test_refresh_with_unchanged_updated_at_is_a_no_op():
+    store = ConfigStore()
+    notified = []
+    store.subscribe(notified.append)
+    db = FakeDb([_row({"rule_based": 0.7, "ai_based": 0.3}, datetime(2024, 1, 1))])
+    asyncio.run(store.refresh(db))
+    asyncio.run(store.refresh(db))
+    assert len(notified) == 1
+
+def test_risk_reward_minimum_follows_hot_reloads():
+    store = ConfigStore()
+    check = store.current.risk_reward_check("1h", "BUY", 85, 1.8)
+    assert check["min_risk_reward"] == 2.5 and "below the 2.5 minimum" in check["warning"]
+    assert store.current.risk_reward_check("1h", "HOLD", 85, 1.8)["warning"] is None
+    assert store.current.risk_reward_check("1h", "SELL", 50, 1.8)["warning"] is None
+
+    store.apply({"risk_reward_ratios": {"1h": {"high_confidence": 1.5}}})
+    assert store.current.risk_reward_check("1h", "BUY", 85, 1.8)["warning"] is None
+    assert store.current.risk_reward_check("5m", "BUY", 85, 0.5) == {"min_risk_reward": 0.0, "warning": None}
+
+def test_unsubscribed_listeners_stop_receiving_snapshots():
+    store = ConfigStore()
+    notified = []
+    store.subscribe(notified.append)
+    store.apply({})
+    store.unsubscribe(notified.append)
+    store.apply({})
+    assert len(notified) == 1 and store.listeners == []
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from fake_mongo import FakeDb
+from services import volume_profile
+from services.resampler import CandleResampler, ResamplerStream
+from services.volume_profile import VolumeProfile, attach_volume_profile, live_volume_levels
+
+
+def candles(n=3000, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 65000 + np.cumsum(rng.normal(0, 40, n))
+    high = close + rng.uniform(0, 80, n)
+    low = close - rng.uniform(0, 80, n)
+    volume = rng.uniform(1, 20, n)
+    return high, low, volume
+
+
+def aligned(profile, first_bin, size):
+    out = np.zeros(size)
+    start = profile.first_bin - first_bin
+    out[start:start + len(profile.histogram)] = profile.histogram
+    return out
+
+
+def test_incremental_profile_matches_rebuild():
+    high, low, volume = candles()
+    lookback = 700
+    live = VolumeProfile(lookback=lookback, bin_size=50.0)
+    live.seed(high[:200], low[:200], volume[:200])
+    for h, l, v in zip(high[200:], low[200:], volume[200:]):
+        live.add(h, l, v)
+
+    rebuilt = VolumeProfile(lookback=lookback, bin_size=50.0)
+    rebuilt.seed(high[-lookback:], low[-lookback:], volume[-lookback:])
+
+    assert live.count == rebuilt.count == lookback
+    first_bin = min(live.first_bin, rebuilt.first_bin)
+    size = max(live.first_bin + len(live.histogram), rebuilt.first_bin + len(rebuilt.histogram)) - first_bin
+    assert np.allclose(aligned(live, first_bin, size), aligned(rebuilt, first_bin, size), atol=1e-9)
+    # Only the in-window candles' volume is left
+    assert live.histogram.sum() == pytest.approx(volume[-lookback:].sum())
+    for key in ("poc", "value_area_high", "value_area_low"):
+        assert live.levels()[key] == rebuilt.levels()[key]
+
+
+def test_zero_volume_profile_has_no_levels():
+    profile = VolumeProfile(lookback=10, bin_size=50.0)
+    for i in range(5):
+        profile.add(65100.0 + i, 64900.0 + i, 0.0)
+    assert profile.levels() == {}
+
+
+def test_live_levels_wait_for_enough_candles(monkeypatch):
+    high, low, volume = candles(n=100)
+    profile = VolumeProfile(lookback=500, bin_size=50.0)
+    monkeypatch.setattr(volume_profile, "volume_profiles", {"BTCUSDT": profile})
+    profile.add(high[0], low[0], volume[0])
+    assert live_volume_levels("BTCUSDT", min_candles=50) is None
+
+    profile.seed(high, low, volume)
+    levels = live_volume_levels("BTCUSDT", min_candles=50)
+    assert levels["candles"] == 100 and "poc" in levels
+
+    empty = VolumeProfile(lookback=500, bin_size=50.0)
+    empty.seed(high, low, np.zeros_like(volume))
+    monkeypatch.setattr(volume_profile, "volume_profiles", {"BTCUSDT": empty})
+    assert live_volume_levels("BTCUSDT", min_candles=50) is None
+
+
+def test_only_configured_symbols_get_a_profile(monkeypatch):
+    monkeypatch.setattr(volume_profile, "volume_profiles", {})
+    monkeypatch.setattr(volume_profile, "PROFILE_LOOKBACK", {"BTCUSDT": 1440})
+    traded = CandleResampler("BTCUSDT")
+    profile = attach_volume_profile(traded)
+    assert profile.lookback == 1440
+    assert attach_volume_profile(traded) is profile and traded.listeners == [profile.on_candle]
+
+    watched = CandleResampler("ETHUSDT")
+    assert attach_volume_profile(watched) is None and watched.listeners == []
+    assert attach_volume_profile(watched, lookback=60).lookback == 60
+
+
+def test_stream_seeds_the_profile_from_stored_history_first(monkeypatch):
+    high, low, volume = candles(n=120)
+    start = 1_700_000_040_000
+    db = FakeDb()
+    db.price_history.docs = [
+        {"symbol": "BTCUSDT", "timeframe": "1m", "high": h, "low": l, "volume": v,
+         "timestamp": datetime.fromtimestamp((start + 60_000 * i) / 1000, tz=timezone.utc)}
+        for i, (h, l, v) in enumerate(zip(high[:100], low[:100], volume[:100]))]
+
+    profile = VolumeProfile(lookback=500, bin_size=50.0)
+    monkeypatch.setattr(volume_profile, "volume_profiles", {"BTCUSDT": profile})
+    monkeypatch.setattr("services.resampler.volume_profiles", volume_profile.volume_profiles)
+    resampler = CandleResampler("BTCUSDT", targets=["1m"])
+    resampler.listeners.append(profile.on_candle)
+    stream = ResamplerStream(resampler, history_db=db)
+
+    # The exchange replays from before the stored history ends; overlapping candles are skipped
+    base = [[start + 60_000 * i, 0.0, h, l, 0.0, v, start + 60_000 * (i + 1) - 1]
+            for i, (h, l, v) in enumerate(zip(high, low, volume)) if i >= 90]
+
+    async def klines(client, params):
+        return base if "startTime" in params else []
+
+    monkeypatch.setattr(stream, "_klines", klines)
+    asyncio.run(stream._seed())
+
+    assert profile.count == 120
+    assert profile.histogram.sum() == pytest.approx(volume.sum())
@@ -1,16 +1,44 @@
 #!/usr/bin/env python3
 
+import argparse
 import asyncio
 import httpx
 import json
+import math
+import random
 import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
 AUTH_BASE_URL = "http://localhost:8001"
 
+# Load test request mix: endpoint -> relative weight (roughly what open dashboards poll)
+DEFAULT_LOAD_MIX = {
+    "/api/bitcoin/price": 4,
+    "/api/bitcoin/elite-analytics": 2,
+    "/api/signals/multi-timeframe": 2,
+    "/api/signals/quick-action": 2,
+    "/api/trading/precision-signal/5m": 1,
+    "/api/trading/precision-signal/15m": 2,
+    "/api/trading/precision-signal/1h": 1,
+    "/api/trading/ai-precision/15m": 1,
+    "/api/risk/comprehensive-assessment": 1,
+    "/api/database/performance/stats": 1,
+}
+
+# p95 latency budgets in milliseconds; endpoints not listed use the --budget-ms default
+DEFAULT_LATENCY_BUDGETS = {
+    "/api/bitcoin/price": 200,
+    "/api/trading/precision-signal/5m": 500,
+    "/api/trading/precision-signal/15m": 500,
+    "/api/trading/precision-signal/1h": 500,
+    "/api/trading/ai-precision/15m": 750,
+    "/api/database/performance/stats": 100,
+}
+
 class APIVerifier:
     def __init__(self):
         self.results = {}
@@ -238,6 +266,181 @@ class APIVerifier:
         
         print(f"\n💾 Detailed report saved to: api_verification_report.json")
 
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class LoadTester:
+    """Concurrent load generator with per-endpoint latency percentiles"""
+
+    def __init__(self, mix: Dict[str, float], concurrency: int = 20, duration: float = 60.0,
+                 ramp_up: float = 10.0, budgets: Optional[Dict[str, float]] = None,
+                 default_budget_ms: float = 1000.0, auth_token: Optional[str] = None, seed: int = 42,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.budgets = budgets if budgets is not None else DEFAULT_LATENCY_BUDGETS
+        self.default_budget_ms = default_budget_ms
+        self.auth_token = auth_token
+        self.rng = random.Random(seed)
+        self.transport = transport
+        self.samples: Dict[str, List[Tuple[float, bool]]] = {endpoint: [] for endpoint in mix}
+        self.elapsed = 0.0
+
+    async def _worker(self, client: httpx.AsyncClient, index: int, deadline: float):
+        # Stagger worker start-up evenly across the ramp-up period
+        await asyncio.sleep(self.ramp_up * index / self.concurrency)
+
+        endpoints = list(self.mix)
+        weights = list(self.mix.values())
+        while time.perf_counter() < deadline:
+            endpoint = self.rng.choices(endpoints, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await client.get(f"{API_BASE_URL}{endpoint}")
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            self.samples[endpoint].append(((time.perf_counter() - started) * 1000, ok))
+
+    async def run(self):
+        """Drive the request mix for the configured duration"""
+        print(f"\n🔥 Load testing {len(self.mix)} endpoints: {self.concurrency} workers, "
+              f"{self.duration:.0f}s (ramp-up {self.ramp_up:.0f}s)")
+
+        headers = {}
+        if self.auth_token:
+            headers["Authorization"] = f"Bearer {self.auth_token}"
+
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=30.0, headers=headers, limits=limits,
+                                     transport=self.transport) as client:
+            started = time.perf_counter()
+            deadline = started + self.duration
+            await asyncio.gather(*(self._worker(client, i, deadline) for i in range(self.concurrency)))
+            self.elapsed = time.perf_counter() - started
+
+    def summarize(self) -> Dict[str, Any]:
+        """Per-endpoint throughput, latency percentiles and budget checks"""
+        endpoints = {}
+        all_latencies = []
+        for endpoint, samples in self.samples.items():
+            latencies = sorted(latency for latency, _ in samples)
+            errors = sum(1 for _, ok in samples if not ok)
+            all_latencies.extend(latencies)
+
+            p95 = percentile(latencies, 95)
+            budget = self.budgets.get(endpoint, self.default_budget_ms)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples) * 100, 2) if samples else 0,
+                "throughput_rps": round(len(samples) / self.elapsed, 2) if self.elapsed else 0,
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 2),
+                    "p95": round(p95, 2),
+                    "p99": round(percentile(latencies, 99), 2),
+                    "max": round(latencies[-1], 2) if latencies else 0,
+                    "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0
+                },
+                "p95_budget_ms": budget,
+                "within_budget": bool(samples) and p95 <= budget and errors == 0
+            }
+
+        all_latencies.sort()
+        total = len(all_latencies)
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "config": {
+                "base_url": API_BASE_URL,
+                "concurrency": self.concurrency,
+                "duration_s": self.duration,
+                "ramp_up_s": self.ramp_up,
+                "mix": self.mix
+            },
+            "summary": {
+                "requests": total,
+                "elapsed_s": round(self.elapsed, 2),
+                "throughput_rps": round(total / self.elapsed, 2) if self.elapsed else 0,
+                "p50_ms": round(percentile(all_latencies, 50), 2),
+                "p95_ms": round(percentile(all_latencies, 95), 2),
+                "p99_ms": round(percentile(all_latencies, 99), 2),
+                "endpoints_over_budget": [e for e, r in endpoints.items() if not r["within_budget"]]
+            },
+            "endpoints": endpoints
+        }
+
+    def generate_report(self, path: str = "api_load_report.json") -> Dict[str, Any]:
+        """Print the latency table and save the machine-readable report"""
+        report = self.summarize()
+
+        print("\n" + "="*60)
+        print("📋 API LOAD TEST REPORT")
+        print("="*60)
+        print(f"{'endpoint':<42}{'rps':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  budget")
+        for endpoint, result in report["endpoints"].items():
+            latency = result["latency_ms"]
+            icon = "✅" if result["within_budget"] else "❌"
+            print(f"{endpoint:<42}{result['throughput_rps']:>7}{latency['p50']:>8}{latency['p95']:>8}"
+                  f"{latency['p99']:>8}{latency['max']:>8}  {icon}")
+
+        summary = report["summary"]
+        print(f"\n📊 {summary['requests']} requests in {summary['elapsed_s']}s "
+              f"({summary['throughput_rps']} req/s), p95 {summary['p95_ms']} ms")
+
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"💾 Load report saved to: {path}")
+        return report
+
+async def run_load_test(args) -> int:
+    """Load-testing mode entry point"""
+    print("🔍 Bitcoin Trading AI - API Load Test")
+    print("="*60)
+
+    verifier = APIVerifier()
+    await verifier.test_auth_endpoints()
+
+    mix = DEFAULT_LOAD_MIX
+    if args.mix:
+        with open(args.mix, "r") as f:
+            mix = json.load(f)
+
+    budgets = dict(DEFAULT_LATENCY_BUDGETS)
+    if args.budgets:
+        with open(args.budgets, "r") as f:
+            budgets.update(json.load(f))
+
+    tester = LoadTester(mix, concurrency=args.concurrency, duration=args.duration, ramp_up=args.ramp_up,
+                        budgets=budgets, default_budget_ms=args.budget_ms, auth_token=verifier.auth_token)
+    await tester.run()
+    report = tester.generate_report(args.report)
+
+    over_budget = report["summary"]["endpoints_over_budget"]
+    if over_budget:
+        print(f"\n❌ {len(over_budget)} endpoint(s) over latency budget")
+        return 1
+    print("\n🎉 All endpoints within latency budget")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or load test the trading API")
+    parser.add_argument("--load", action="store_true", help="run the concurrent load test instead of verification")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent workers (simulated dashboards)")
+    parser.add_argument("--duration", type=float, default=60.0, help="test duration in seconds")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds over which workers start")
+    parser.add_argument("--mix", help="JSON file mapping endpoint -> relative weight")
+    parser.add_argument("--budgets", help="JSON file mapping endpoint -> p95 budget in ms")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="default p95 budget in ms")
+    parser.add_argument("--report", default="api_load_report.json", help="load report output path")
+    return parser.parse_args(argv)
+
 async def main():
     """Main verification function"""
     print("🔍 Bitcoin Trading AI - API Endpoint Verification")
@@ -274,7 +477,8 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        exit_code = asyncio.run(main())
+        args = parse_args()
+        exit_code = asyncio.run(run_load_test(args) if args.load else main())
         sys.exit(exit_code)
     except KeyboardInterrupt:
         print("\n\n⏹️  Verification cancelled by user")